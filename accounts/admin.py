@@ -14,12 +14,16 @@ class CustomUserAdmin(UserAdmin):
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     list_display = ('address', 'name', 'user', 'balance', 'is_active', 'created_at')
+    list_select_related = ('user',)
     search_fields = ('address', 'name', 'user__email')
     list_filter = ('is_active', 'key_algorithm')
+    # Moved only by ledger postings
+    readonly_fields = ('balance',)
 
 @admin.register(SecurityPreference)
 class SecurityPreferenceAdmin(admin.ModelAdmin):
     list_display = ('user', 'two_factor_enabled', 'quantum_resistant_only', 'transaction_notifications')
+    list_select_related = ('user',)
     search_fields = ('user__email',)
     list_filter = ('two_factor_enabled', 'quantum_resistant_only', 'transaction_notifications')
 
@@ -4,3 +4,6 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
 
+    def ready(self):
+        # Register signal handlers that invalidate cached responses
+        from . import signals
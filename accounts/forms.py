@@ -27,7 +27,8 @@ class WalletCreationForm(forms.ModelForm):
 class SecurityPreferenceForm(forms.ModelForm):
     class Meta:
         model = SecurityPreference
-        fields = ['two_factor_enabled', 'quantum_resistant_only', 'transaction_notifications', 'max_transaction_amount']
+        fields = ['two_factor_enabled', 'quantum_resistant_only', 'transaction_notifications', 'max_transaction_amount',
+                  'max_window_transactions']
         widgets = {
             'max_transaction_amount': forms.NumberInput(attrs={'step': '0.000001'}),
         }
@@ -0,0 +1,48 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, so nothing imported by this command is counted
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({'seconds': time.perf_counter() - start, 'modules': sorted(sys.modules)}))
+"""
+
+class Command(BaseCommand):
+    help = ('Fails if django.setup() plus URL resolution takes longer than STARTUP_BUDGET allows '
+            'or imports a module that should only load lazily.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to time; the fastest run counts')
+        parser.add_argument('--seconds', type=float, default=None, help='Override the budget in seconds')
+
+    def handle(self, *args, **options):
+        budget = options['seconds'] or settings.STARTUP_BUDGET.get('SECONDS', 1.0)
+        forbidden = settings.STARTUP_BUDGET.get('FORBIDDEN_MODULES', ())
+
+        timings = []
+        for _ in range(options['runs']):
+            completed = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT], capture_output=True, text=True, cwd=settings.BASE_DIR
+            )
+            if completed.returncode != 0:
+                raise CommandError(f"Startup failed:\n{completed.stderr}")
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            timings.append(result['seconds'])
+
+        loaded = sorted({name.split('.')[0] for name in result['modules']} & set(forbidden))
+        fastest = min(timings)
+        self.stdout.write(f"Startup took {fastest:.3f}s (budget {budget:.3f}s) over {len(timings)} runs")
+        if loaded:
+            raise CommandError(f"Startup imported modules that should load lazily: {', '.join(loaded)}")
+        if fastest > budget:
+            raise CommandError(f"Startup took {fastest:.3f}s, over the {budget:.3f}s budget")
+        self.stdout.write(self.style.SUCCESS('Startup is within budget'))
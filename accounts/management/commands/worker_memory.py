@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from quantum_defi.prefork import child_pids, memory_usage
+
+class Command(BaseCommand):
+    help = 'Reports the memory of a gunicorn master and its workers, including the unique (unshared) share of each.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('master_pid', type=int)
+
+    def handle(self, *args, **options):
+        master_pid = options['master_pid']
+        master = memory_usage(master_pid)
+        if master is None:
+            raise CommandError(f"Cannot read /proc/{master_pid}/smaps_rollup")
+
+        mib = 2 ** 20
+        self.stdout.write(f"{'pid':>8} {'rss MiB':>10} {'pss MiB':>10} {'uss MiB':>10}")
+        self.stdout.write(f"{master_pid:>8} {master['rss'] / mib:>10.1f} {master['pss'] / mib:>10.1f} {master['uss'] / mib:>10.1f}  master")
+        workers = [(pid, memory_usage(pid)) for pid in child_pids(master_pid)]
+        workers = [(pid, usage) for pid, usage in workers if usage is not None]
+        for pid, usage in workers:
+            self.stdout.write(f"{pid:>8} {usage['rss'] / mib:>10.1f} {usage['pss'] / mib:>10.1f} {usage['uss'] / mib:>10.1f}")
+
+        if workers:
+            total_pss = master['pss'] + sum(usage['pss'] for _, usage in workers)
+            mean_uss = sum(usage['uss'] for _, usage in workers) / len(workers)
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(workers)} workers: {total_pss / mib:.1f} MiB in total (PSS), "
+                f"{mean_uss / mib:.1f} MiB unique per worker"
+            ))
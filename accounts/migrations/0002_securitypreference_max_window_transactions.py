@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-19 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="securitypreference",
+            name="max_window_transactions",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -25,6 +25,7 @@ class Wallet(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wallets')
     address = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=100, default="Main Wallet")
+    # Running balance, moved only by ledger postings (blockchain.utils.ledger)
     balance = models.DecimalField(max_digits=24, decimal_places=18, default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -34,6 +35,16 @@ class Wallet(models.Model):
     public_key_hash = models.CharField(max_length=255)
     key_algorithm = models.CharField(max_length=50, default="Kyber768")
     
+    def save(self, *args, **kwargs):
+        # Saving a loaded wallet must not write back a balance that a
+        # concurrent posting has since moved
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'balance'
+            ]
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return f"{self.name} ({self.address})"
 
@@ -46,6 +57,8 @@ class SecurityPreference(models.Model):
     quantum_resistant_only = models.BooleanField(default=True)
     transaction_notifications = models.BooleanField(default=True)
     max_transaction_amount = models.DecimalField(max_digits=24, decimal_places=18, null=True, blank=True)
+    # Sends allowed per BLOCKCHAIN_SETTINGS['POLICY_WINDOW']; no limit when empty
+    max_window_transactions = models.PositiveIntegerField(null=True, blank=True)
     
     def __str__(self):
         return f"Security Preferences for {self.user.email}"
@@ -16,5 +16,6 @@ class WalletSerializer(serializers.ModelSerializer):
 class SecurityPreferenceSerializer(serializers.ModelSerializer):
     class Meta:
         model = SecurityPreference
-        fields = ['id', 'two_factor_enabled', 'quantum_resistant_only', 'transaction_notifications', 'max_transaction_amount']
+        fields = ['id', 'two_factor_enabled', 'quantum_resistant_only', 'transaction_notifications', 'max_transaction_amount',
+                  'max_window_transactions']
 
@@ -0,0 +1,21 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import SecurityPreference, User, Wallet
+from quantum_defi.authentication import invalidate_user
+from quantum_defi.response_cache import invalidate
+
+@receiver([post_save, post_delete], sender=Wallet)
+def invalidate_wallet_caches(sender, instance, **kwargs):
+    invalidate('wallets', instance.user_id)
+    # The cached wallet set and the compiled transaction policy (blockchain.utils.policy)
+    invalidate_user(instance.user_id)
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+@receiver([post_save, post_delete], sender=SecurityPreference)
+def invalidate_cached_preferences(sender, instance, **kwargs):
+    # Drops the compiled transaction policy (blockchain.utils.policy)
+    invalidate_user(instance.user_id)
@@ -10,7 +10,11 @@ from rest_framework.response import Response
 from .models import User, Wallet, SecurityPreference
 from .serializers import UserSerializer, WalletSerializer, SecurityPreferenceSerializer
 from .forms import UserRegistrationForm, UserLoginForm, WalletCreationForm, SecurityPreferenceForm
-from quantum_crypto.utils.key_management import generate_quantum_key_pair
+from quantum_crypto.crypto import generate_quantum_key_pair
+from ai_security.models import SecurityAlert
+from ai_security.utils.events import streams_supported
+from blockchain.models import Transaction
+from quantum_defi.response_cache import cached_context, cached_page
 
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -19,6 +23,8 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
+    keyset_ordering = ('id',)
+    query_budget = {'list': 2, 'retrieve': 2, 'me': 1}
     
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def me(self, request):
@@ -31,6 +37,8 @@ class WalletViewSet(viewsets.ModelViewSet):
     """
     serializer_class = WalletSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-created_at', '-id')
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
         return Wallet.objects.filter(user=self.request.user)
@@ -50,6 +58,8 @@ class SecurityPreferenceViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SecurityPreferenceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('id',)
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
         return SecurityPreference.objects.filter(user=self.request.user)
@@ -111,10 +121,20 @@ def logout_view(request):
     logout(request)
     return redirect('home')
 
+DASHBOARD_SCOPES = ('wallets', 'security_alerts', 'transactions')
+
 @login_required
+@cached_page('dashboard', DASHBOARD_SCOPES)
 def dashboard_view(request):
-    wallets = Wallet.objects.filter(user=request.user)
-    return render(request, 'accounts/dashboard.html', {'wallets': wallets})
+    def build_context():
+        return {
+            'wallets': list(Wallet.objects.filter(user=request.user)),
+            'recent_alerts': list(SecurityAlert.objects.filter(user=request.user).order_by('-timestamp', '-id')[:3]),
+            'recent_transactions': list(Transaction.objects.for_user(request.user).order_by('-timestamp', '-id')[:5]),
+        }
+    
+    context = cached_context(request, 'dashboard', DASHBOARD_SCOPES, build_context)
+    return render(request, 'accounts/dashboard.html', {**context, 'live_alerts': streams_supported(request)})
 
 @login_required
 def create_wallet_view(request):
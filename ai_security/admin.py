@@ -1,9 +1,10 @@
 from django.contrib import admin
-from .models import SecurityAlert, AnomalyDetectionModel, SecurityScan
+from .models import SecurityAlert, SecurityAlertCounter, WalletVelocity, AnomalyDetectionModel, SecurityScan
 
 @admin.register(SecurityAlert)
 class SecurityAlertAdmin(admin.ModelAdmin):
     list_display = ('alert_type', 'severity', 'user', 'timestamp', 'is_resolved')
+    list_select_related = ('user',)
     search_fields = ('description', 'user__email', 'transaction__tx_hash')
     list_filter = ('alert_type', 'severity', 'is_resolved', 'timestamp')
     readonly_fields = ('timestamp',)
@@ -18,7 +19,25 @@ class AnomalyDetectionModelAdmin(admin.ModelAdmin):
 @admin.register(SecurityScan)
 class SecurityScanAdmin(admin.ModelAdmin):
     list_display = ('scan_type', 'status', 'started_at', 'completed_at', 'initiated_by')
+    list_select_related = ('initiated_by',)
     search_fields = ('results_summary', 'initiated_by__email')
     list_filter = ('scan_type', 'status', 'started_at')
     readonly_fields = ('started_at',)
 
+
+@admin.register(SecurityAlertCounter)
+class SecurityAlertCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_alerts', 'unresolved_alerts', 'critical_alerts')
+    list_select_related = ('user',)
+    search_fields = ('user__email',)
+    readonly_fields = ('user', 'total_alerts', 'unresolved_alerts', 'critical_alerts')
+
+
+@admin.register(WalletVelocity)
+class WalletVelocityAdmin(admin.ModelAdmin):
+    list_display = ('wallet', 'tx_count_1m', 'tx_count_1h', 'tx_count_24h', 'updated_at')
+    list_select_related = ('wallet',)
+    search_fields = ('wallet__address',)
+    exclude = ('recipients', 'recipients_previous')
+    readonly_fields = ('wallet', 'tx_count_1m', 'tx_count_1h', 'tx_count_24h', 'amount_1m', 'amount_1h', 'amount_24h',
+                       'updated_at', 'recipients_epoch')
@@ -3,4 +3,9 @@ from django.apps import AppConfig
 class AiSecurityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ai_security'
+    
+    def ready(self):
+        # Register signal handlers that maintain SecurityAlertCounter and
+        # invalidate cached responses
+        from . import signals
 
@@ -0,0 +1,137 @@
+"""
+Bounded process pool for model inference from async views.
+
+Scoring a transaction is CPU-bound, so running it on the event loop would
+stall every other request the process is serving. score_transaction()
+sends the features to a pool of INFERENCE_WORKERS processes instead, each
+of which loads the models once when it starts.
+
+At most INFERENCE_MAX_PENDING jobs may be queued or running per serving
+process. Beyond that score_transaction() raises InferenceSaturated at once
+rather than queueing without bound, and the views answer 503 with a
+Retry-After of INFERENCE_RETRY_AFTER seconds.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from ai_security.utils.velocity import sending_wallet_id
+
+logger = logging.getLogger(__name__)
+
+# Fields check_transaction_anomaly reads; only these are sent to the pool
+FEATURES = ('amount', 'gas_fee', 'transaction_type')
+
+_pool = None
+_pool_pid = None
+_pending = 0
+_lock = threading.Lock()
+
+class InferenceSaturated(Exception):
+    """
+    Raised when the pool already has INFERENCE_MAX_PENDING jobs in flight.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__(f"Inference pool is saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+def _setting(name, default):
+    return settings.AI_SECURITY_SETTINGS.get(name, default)
+
+def _initialize_worker():
+    # Spawned workers start from a fresh interpreter
+    import django
+    django.setup()
+
+    from quantum_defi.prefork import warm_up
+    warm_up()
+
+def _score(features, wallet_id):
+    from ai_security.ml_models.anomaly_detection import check_transaction_anomaly
+    from ai_security.utils.velocity import get_velocity_features
+
+    # The velocity row is read here rather than on the event loop
+    velocity = get_velocity_features([wallet_id])[wallet_id] if wallet_id is not None else None
+    is_anomaly, confidence = check_transaction_anomaly(features, velocity=velocity)
+    return bool(is_anomaly), float(confidence)
+
+def get_pool():
+    """
+    Returns the inference pool of the current process, starting it on first
+    use. A forked server worker starts a pool of its own.
+    """
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(
+                max_workers=_setting('INFERENCE_WORKERS', 2),
+                mp_context=multiprocessing.get_context(_setting('INFERENCE_START_METHOD', 'spawn')),
+                initializer=_initialize_worker,
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+def _discard_pool(pool):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _acquire():
+    global _pending
+    with _lock:
+        if _pending >= _setting('INFERENCE_MAX_PENDING', 32):
+            raise InferenceSaturated(_setting('INFERENCE_RETRY_AFTER', 1))
+        _pending += 1
+
+def _release():
+    global _pending
+    with _lock:
+        _pending -= 1
+
+def pending_jobs():
+    """
+    Returns the number of jobs queued or running for this process.
+    """
+    return _pending
+
+async def score_transaction(transaction_data):
+    """
+    Checks a transaction for anomalies in the inference pool.
+
+    Args:
+        transaction_data: Transaction dictionary or Transaction object
+
+    Returns:
+        Tuple of (is_anomaly, confidence)
+
+    Raises:
+        InferenceSaturated: If INFERENCE_MAX_PENDING jobs are already in flight
+    """
+    if isinstance(transaction_data, dict):
+        features = {name: transaction_data[name] for name in FEATURES}
+    else:
+        features = {name: getattr(transaction_data, name) for name in FEATURES}
+    wallet_id = sending_wallet_id(transaction_data)
+
+    _acquire()
+    try:
+        pool = get_pool()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, _score, features, wallet_id)
+        except BrokenProcessPool:
+            # A worker died, e.g. killed for memory; the next job starts a new pool
+            logger.error("Inference pool broke, restarting it")
+            _discard_pool(pool)
+            raise
+    finally:
+        _release()
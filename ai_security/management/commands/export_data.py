@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from ai_security.utils.export import EXPORTS, FORMATS, write_export
+
+class Command(BaseCommand):
+    help = 'Exports transactions, security alerts or key usage logs as Parquet, Arrow IPC or gzip CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='output_format', choices=sorted(FORMATS), default='parquet')
+        parser.add_argument('--output', help='Output file, defaults to <table><extension>')
+        parser.add_argument('--since', help='Only rows with timestamp at or after this ISO datetime')
+        parser.add_argument('--until', help='Only rows with timestamp before this ISO datetime')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows read and written per batch')
+
+    def _parse(self, value, name):
+        if value is None:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f"--{name} must be an ISO datetime, got '{value}'")
+        return parsed
+
+    def handle(self, *args, **options):
+        table = options['table']
+        output_format = options['output_format']
+        path = options['output'] or f"{table}{FORMATS[output_format][1]}"
+
+        rows = write_export(
+            table, output_format, path,
+            since=self._parse(options['since'], 'since'),
+            until=self._parse(options['until'], 'until'),
+            chunk_size=options['chunk_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Exported {rows} {table} rows to {path}"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ai_security.utils.events import prune_events
+
+class Command(BaseCommand):
+    help = 'Deletes security feed events older than the retention period (AI_SECURITY_SETTINGS EVENT_RETENTION_HOURS).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, help='Retention in hours, overriding EVENT_RETENTION_HOURS')
+
+    def handle(self, *args, **options):
+        deleted = prune_events(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} security events"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from ai_security.utils.velocity import rebuild_all
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per-wallet velocity features from the last day of transactions, e.g. after a bulk import.'
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt velocity features for {rebuilt} wallets"))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from ai_security.utils.alert_counters import reconcile_all
+
+class Command(BaseCommand):
+    help = 'Recomputes per-user security alert counters and fixes any that have drifted.'
+
+    def handle(self, *args, **options):
+        corrected = reconcile_all()
+        self.stdout.write(self.style.SUCCESS(f"Corrected {corrected} alert counters"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from ai_security.ml_models.anomaly_detection import train_anomaly_detection_model
+from ai_security.ml_models.features import transaction_feature_frame
+from ai_security.models import AnomalyDetectionModel
+from blockchain.models import Transaction
+
+class Command(BaseCommand):
+    help = 'Trains the anomaly detection model on stored transactions and registers it.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only train on transactions at or after this ISO datetime')
+
+    def handle(self, *args, **options):
+        transactions = Transaction.objects.all()
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                raise CommandError(f"--since must be an ISO datetime, got '{options['since']}'")
+            transactions = transactions.filter(timestamp__gte=since)
+
+        features = transaction_feature_frame(transactions)
+        if features.empty:
+            raise CommandError('No transactions to train on')
+
+        model, metadata = train_anomaly_detection_model(features)
+        AnomalyDetectionModel.objects.create(
+            name=f"Anomaly detection ({len(features)} transactions)",
+            model_type=metadata['model_type'],
+            version=metadata['version'],
+            file_path=metadata['file_path'],
+            **metadata['metrics']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Trained {metadata['model_type']} v{metadata['version']} on {len(features)} transactions"
+        ))
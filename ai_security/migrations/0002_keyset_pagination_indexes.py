@@ -0,0 +1,26 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ai_security", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="securityalert",
+            index=models.Index(
+                fields=["user", "-timestamp", "-id"], name="alert_user_timestamp_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="securityscan",
+            index=models.Index(
+                fields=["initiated_by", "-started_at", "-id"],
+                name="scan_user_started_idx",
+            ),
+        ),
+    ]
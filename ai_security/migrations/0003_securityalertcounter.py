@@ -0,0 +1,34 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:31
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("ai_security", "0002_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SecurityAlertCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="alert_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("total_alerts", models.IntegerField(default=0)),
+                ("unresolved_alerts", models.IntegerField(default=0)),
+                ("critical_alerts", models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.10 on 2026-10-19 18:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("ai_security", "0004_securityevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WalletVelocity",
+            fields=[
+                (
+                    "wallet",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="velocity",
+                        serialize=False,
+                        to="accounts.wallet",
+                    ),
+                ),
+                ("tx_count_1m", models.FloatField(default=0)),
+                ("tx_count_1h", models.FloatField(default=0)),
+                ("tx_count_24h", models.FloatField(default=0)),
+                ("amount_1m", models.FloatField(default=0)),
+                ("amount_1h", models.FloatField(default=0)),
+                ("amount_24h", models.FloatField(default=0)),
+                ("updated_at", models.DateTimeField(null=True)),
+                ("recipients", models.BinaryField(null=True)),
+                ("recipients_previous", models.BinaryField(null=True)),
+                ("recipients_epoch", models.BigIntegerField(null=True)),
+            ],
+        ),
+    ]
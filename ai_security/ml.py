@@ -0,0 +1,21 @@
+"""
+Facade for the ML models, which import numpy, pandas and scikit-learn.
+Each function imports its implementation in ai_security.ml_models on its
+first call.
+"""
+
+from quantum_defi.lazy import lazy_function, load_modules
+
+ANOMALY_DETECTION = 'ai_security.ml_models.anomaly_detection'
+THREAT_MODELS = 'ai_security.ml_models.threat_models'
+
+MODULES = (ANOMALY_DETECTION, THREAT_MODELS)
+
+check_transaction_anomaly = lazy_function(ANOMALY_DETECTION, 'check_transaction_anomaly')
+check_transactions_anomaly = lazy_function(ANOMALY_DETECTION, 'check_transactions_anomaly')
+train_anomaly_detection_model = lazy_function(ANOMALY_DETECTION, 'train_anomaly_detection_model')
+detect_threat = lazy_function(THREAT_MODELS, 'detect_threat')
+train_threat_detection_model = lazy_function(THREAT_MODELS, 'train_threat_detection_model')
+
+def load():
+    load_modules(MODULES)
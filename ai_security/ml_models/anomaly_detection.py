@@ -7,6 +7,11 @@ import joblib
 from django.conf import settings
 from datetime import datetime
 
+from .features import decimals_to_float64
+from .registry import get_model
+from ai_security.utils.velocity import apply_velocity, get_velocity_features, sending_wallet_id
+from quantum_defi.instrumentation import timed
+
 def train_anomaly_detection_model(transaction_data=None, model_type='ISOLATION_FOREST'):
     """
     Trains an anomaly detection model on transaction data.
@@ -68,15 +73,24 @@ def train_anomaly_detection_model(transaction_data=None, model_type='ISOLATION_F
 
 def load_anomaly_detection_model():
     """
-    Loads the latest anomaly detection model.
+    Loads the active registered anomaly detection model, or else the latest
+    model file.
     
     Returns:
         Loaded model
     """
+    from ai_security.models import AnomalyDetectionModel
+    
+    active = AnomalyDetectionModel.objects.filter(
+        is_active=True, model_type='ISOLATION_FOREST'
+    ).order_by('-created_at', '-id').values_list('file_path', flat=True).first()
+    if active and os.path.exists(active):
+        return joblib.load(active)
+    
     model_dir = settings.AI_SECURITY_SETTINGS.get('MODEL_PATH', os.path.join(os.path.dirname(__file__), 'trained_models'))
     
-    # Find the latest model file
-    model_files = [f for f in os.listdir(model_dir) if f.endswith('.joblib')]
+    # Find the latest model file; the threat model is saved in the same directory
+    model_files = [f for f in os.listdir(model_dir) if f.startswith('isolation_forest_') and f.endswith('.joblib')]
     if not model_files:
         # If no model exists, train a new one
         model, _ = train_anomaly_detection_model()
@@ -88,22 +102,40 @@ def load_anomaly_detection_model():
     
     return joblib.load(model_path)
 
-def check_transaction_anomaly(transaction_data):
+def _load_or_train_anomaly_detection_model():
+    try:
+        return load_anomaly_detection_model()
+    except:
+        # If model loading fails, train a new one
+        model, _ = train_anomaly_detection_model()
+        return model
+
+def get_anomaly_detection_model():
     """
-    Checks if a transaction is anomalous.
+    Returns the anomaly detection model, loading it once per process and
+    training a new one if loading fails.
+    
+    Returns:
+        Loaded model
+    """
+    return get_model('anomaly', _load_or_train_anomaly_detection_model)
+
+@timed('anomaly')
+def check_transaction_anomaly(transaction_data, velocity=None):
+    """
+    Checks if a transaction is anomalous. Besides the model's verdict, the
+    sending wallet's recent activity is checked against the velocity limits.
     
     Args:
         transaction_data: Transaction data to check
+        velocity: Sending wallet's velocity features, read from its
+            WalletVelocity row when not given
     
     Returns:
         Tuple of (is_anomaly, confidence)
     """
     # Load model
-    try:
-        model = load_anomaly_detection_model()
-    except:
-        # If model loading fails, train a new one
-        model, _ = train_anomaly_detection_model()
+    model = get_anomaly_detection_model()
     
     # Preprocess transaction data
     if isinstance(transaction_data, dict):
@@ -130,7 +162,53 @@ def check_transaction_anomaly(transaction_data):
     # Normalize to [0, 1] range
     confidence = 1 / (1 + np.exp(anomaly_score))
     
-    return is_anomaly, confidence
+    if velocity is None:
+        wallet_id = sending_wallet_id(transaction_data)
+        velocity = get_velocity_features([wallet_id])[wallet_id] if wallet_id is not None else None
+    return apply_velocity(is_anomaly, confidence, velocity)
+
+@timed('anomaly_batch')
+def check_transactions_anomaly(transactions):
+    """
+    Checks a batch of transactions for anomalies with a single model call.
+    
+    Args:
+        transactions: List of transaction dictionaries or Transaction objects
+    
+    Returns:
+        List of (is_anomaly, confidence) tuples in input order
+    """
+    if not transactions:
+        return []
+    
+    model = get_anomaly_detection_model()
+    
+    def field(transaction_data, name):
+        if isinstance(transaction_data, dict):
+            return transaction_data[name]
+        return getattr(transaction_data, name)
+    
+    # Decimal amounts become float64 columns directly rather than object columns for pd.to_numeric
+    records = pd.DataFrame({
+        'amount': decimals_to_float64([field(transaction_data, 'amount') for transaction_data in transactions]),
+        'gas_fee': decimals_to_float64([field(transaction_data, 'gas_fee') for transaction_data in transactions]),
+        'transaction_type': [field(transaction_data, 'transaction_type') for transaction_data in transactions],
+    })
+    
+    features = preprocess_transaction_data(records)
+    
+    predictions = model.predict(features)
+    anomaly_scores = model.decision_function(features)
+    confidences = 1 / (1 + np.exp(anomaly_scores))
+    
+    # One query for the velocity of every sending wallet in the batch
+    wallet_ids = [sending_wallet_id(transaction_data) for transaction_data in transactions]
+    velocity = get_velocity_features(wallet_id for wallet_id in wallet_ids if wallet_id is not None)
+    
+    return [
+        apply_velocity(bool(prediction == -1), float(confidence), velocity.get(wallet_id))
+        for prediction, confidence, wallet_id in zip(predictions, confidences, wallet_ids)
+    ]
 
 def preprocess_transaction_data(transaction_data):
     """
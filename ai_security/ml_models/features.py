@@ -0,0 +1,111 @@
+"""
+Vectorized conversion of Decimal transaction columns into NumPy arrays.
+
+Transaction.amount and gas_fee are DECIMAL(24, 18) values in ether. For
+bulk feature building the scaling happens in the database and rows are
+read with values_list, so no model instances or Decimal objects are
+created. The result is collected straight into NumPy arrays.
+
+Two representations are offered, with different precision guarantees:
+
+- Fixed point (int64): the value times 10**decimals of the unit, rounded
+  down. 'gwei' keeps 9 of the 18 decimal places, so anything below 1 gwei
+  is dropped, and holds up to about 9.2e9 ether. 'wei' is exact, but only
+  for values below about 9.22 ether, because 1e18 wei per ether leaves
+  int64 little headroom. Values that do not fit raise OverflowError.
+  PostgreSQL raises this itself; on SQLite, which saturates, it is
+  detected afterwards.
+- Scaled float64: the value times 10**decimals of the unit, converted to
+  a double once in the database. A double carries about 15-16
+  significant digits, while the column has up to 24. Amounts with more
+  significant digits are rounded to a relative error of at most 2**-53.
+  That is harmless for model features but unsuitable for accounting.
+
+Both guarantees assume PostgreSQL NUMERIC storage. SQLite keeps these
+columns as REAL, so values there are already rounded before conversion.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from django.db.models import BigIntegerField, F, FloatField, Value
+from django.db.models.functions import Cast, Floor
+
+# Decimal places of each unit relative to ether
+UNIT_DECIMALS = {'ether': 0, 'gwei': 9, 'wei': 18}
+
+INT64_MAX = np.iinfo(np.int64).max
+
+def _scaled(field, unit):
+    if unit not in UNIT_DECIMALS:
+        raise ValueError(f"Unknown unit: {unit}")
+    return F(field) * Value(Decimal(10) ** UNIT_DECIMALS[unit])
+
+def fixed_point(field, unit='gwei'):
+    """
+    Returns a database expression for a Decimal field as an integer count of unit.
+    """
+    return Cast(Floor(_scaled(field, unit)), BigIntegerField())
+
+def scaled_float(field, unit='ether'):
+    """
+    Returns a database expression for a Decimal field as a double in unit.
+    """
+    return Cast(_scaled(field, unit), FloatField())
+
+def decimal_arrays(queryset, fields=('amount', 'gas_fee'), unit='gwei', exact=True, extra=()):
+    """
+    Reads Decimal columns of a queryset into NumPy arrays in one query.
+
+    Args:
+        queryset: QuerySet to read
+        fields: Decimal fields to convert
+        unit: 'ether', 'gwei' or 'wei'
+        exact: True for fixed-point int64 arrays, False for scaled float64 arrays
+        extra: Other fields read unchanged alongside, e.g. 'transaction_type'
+
+    Returns:
+        Dictionary of field name to NumPy array, in queryset order
+
+    Raises:
+        OverflowError: If an exact value does not fit in int64 at this unit
+    """
+    convert = fixed_point if exact else scaled_float
+    aliases = {f"_{field}_{unit}": field for field in fields}
+    rows = queryset.annotate(**{
+        alias: convert(field, unit) for alias, field in aliases.items()
+    }).values_list(*aliases, *extra)
+
+    frame = pd.DataFrame.from_records(rows.iterator(chunk_size=10000), columns=[*fields, *extra])
+    arrays = {}
+    for field in fields:
+        values = frame[field].to_numpy(dtype=np.int64 if exact else np.float64)
+        if exact and values.size and values.max() == INT64_MAX:
+            raise OverflowError(f"{field} does not fit in int64 {unit}; use a coarser unit or exact=False")
+        arrays[field] = values
+    for field in extra:
+        arrays[field] = frame[field].to_numpy()
+    return arrays
+
+def transaction_feature_frame(queryset, unit='ether'):
+    """
+    Builds the amount, gas_fee and transaction_type frame expected by
+    train_anomaly_detection_model, with float64 amounts in unit.
+
+    Args:
+        queryset: Transaction QuerySet
+        unit: Unit of the amount columns
+
+    Returns:
+        DataFrame
+    """
+    arrays = decimal_arrays(queryset, unit=unit, exact=False, extra=('transaction_type',))
+    return pd.DataFrame(arrays, columns=['amount', 'gas_fee', 'transaction_type'])
+
+def decimals_to_float64(values):
+    """
+    Converts an in-memory sequence of Decimals (or numbers) to a float64 array,
+    with the same rounding as scaled_float at unit 'ether'.
+    """
+    return np.fromiter((float(value) for value in values), dtype=np.float64, count=len(values))
@@ -0,0 +1,43 @@
+"""
+Process-wide cache of loaded ML models.
+
+A model is unpickled once per process rather than on every prediction.
+Under gunicorn the models are loaded in the master before it forks (see
+quantum_defi.prefork), so every worker shares the same pages
+copy-on-write instead of holding its own copy. A newly trained model is
+picked up when the workers are restarted, or after clear_models().
+"""
+
+import threading
+
+_models = {}
+_lock = threading.Lock()
+
+def get_model(name, loader):
+    """
+    Returns the cached model, loading it with loader() on first use.
+
+    Args:
+        name: Cache key, e.g. 'anomaly'
+        loader: Callable returning the model
+    """
+    model = _models.get(name)
+    if model is None:
+        with _lock:
+            model = _models.get(name)
+            if model is None:
+                model = _models[name] = loader()
+    return model
+
+def loaded_models():
+    """
+    Returns the names of the models loaded in this process.
+    """
+    return sorted(_models)
+
+def clear_models():
+    """
+    Drops the cached models so the next prediction loads the current ones.
+    """
+    with _lock:
+        _models.clear()
@@ -7,6 +7,9 @@ import joblib
 import os
 from django.conf import settings
 
+from .registry import get_model
+from ai_security.utils.velocity import apply_velocity, get_velocity_features, sending_wallet_id
+
 def train_threat_detection_model(data=None):
     """
     Trains a model to detect potential threats in blockchain transactions.
@@ -52,25 +55,38 @@ def train_threat_detection_model(data=None):
         'f1_score': report['1']['f1-score']
     }
 
-def detect_threat(transaction_data):
+def load_threat_detection_model():
     """
-    Detects if a transaction poses a security threat.
-    
-    Args:
-        transaction_data: Transaction data to analyze
+    Loads the threat detection model, training a new one if it does not exist.
     
     Returns:
-        Tuple of (is_threat, confidence)
+        Loaded model
     """
-    # Load model
     model_dir = settings.AI_SECURITY_SETTINGS.get('MODEL_PATH', os.path.join(os.path.dirname(__file__), 'trained_models'))
     model_path = os.path.join(model_dir, 'threat_detection_model.joblib')
     
     try:
-        model = joblib.load(model_path)
+        return joblib.load(model_path)
     except:
         # If model doesn't exist, train a new one
         model, _ = train_threat_detection_model()
+        return model
+
+def detect_threat(transaction_data, velocity=None):
+    """
+    Detects if a transaction poses a security threat, taking the sending
+    wallet's recent activity into account.
+    
+    Args:
+        transaction_data: Transaction data to analyze
+        velocity: Sending wallet's velocity features, read from its
+            WalletVelocity row when not given
+    
+    Returns:
+        Tuple of (is_threat, confidence)
+    """
+    # Loaded once per process
+    model = get_model('threat', load_threat_detection_model)
     
     # Preprocess transaction data
     features = preprocess_transaction_data(transaction_data)
@@ -81,7 +97,10 @@ def detect_threat(transaction_data):
     # Get prediction probability
     confidence = model.predict_proba(features)[0][1]
     
-    return bool(is_threat), confidence
+    if velocity is None:
+        wallet_id = sending_wallet_id(transaction_data)
+        velocity = get_velocity_features([wallet_id])[wallet_id] if wallet_id is not None else None
+    return apply_velocity(bool(is_threat), confidence, velocity)
 
 def preprocess_transaction_data(transaction_data):
     """
@@ -123,9 +142,9 @@ def preprocess_transaction_data(transaction_data):
     if 'to_address' in features.columns:
         features.drop('to_address', axis=1, inplace=True)
     
-    # Ensure all features are present that the model expects
+    # Ensure all features are present that the model expects, in the order it was trained on
     expected_features = ['amount', 'gas_fee', 'fee_to_amount_ratio', 
-                         'type_SEND', 'type_RECEIVE', 'type_SWAP', 'type_STAKE', 'type_UNSTAKE']
+                         'type_RECEIVE', 'type_SEND', 'type_STAKE', 'type_SWAP', 'type_UNSTAKE']
     
     for feature in expected_features:
         if feature not in features.columns:
@@ -134,7 +153,7 @@ def preprocess_transaction_data(transaction_data):
             else:
                 features[feature] = 0
     
-    return features
+    return features[expected_features]
 
 def generate_sample_threat_data(n_samples=1000):
     """
@@ -1,5 +1,6 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
-from accounts.models import User
+from accounts.models import User, Wallet
 from blockchain.models import Transaction
 
 class SecurityAlert(models.Model):
@@ -31,9 +32,50 @@ class SecurityAlert(models.Model):
     resolved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='resolved_alerts')
     resolution_notes = models.TextField(blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-timestamp', '-id'], name='alert_user_timestamp_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.alert_type} - {self.severity} - {self.timestamp}"
 
+class SecurityAlertCounter(models.Model):
+    """
+    Per-user alert totals, kept up to date by signals when alerts are
+    created, resolved or deleted, so the security dashboard does not
+    count a user's whole alert history on every load.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='alert_counter')
+    total_alerts = models.IntegerField(default=0)
+    unresolved_alerts = models.IntegerField(default=0)
+    critical_alerts = models.IntegerField(default=0)  # Critical and unresolved
+    
+    def __str__(self):
+        return f"Alert counters for user {self.user_id}"
+
+class WalletVelocity(models.Model):
+    """
+    Rolling send activity of a wallet, read as features when its
+    transactions are scored (see ai_security.utils.velocity). Counts and
+    amounts are exponentially decayed as of updated_at.
+    """
+    wallet = models.OneToOneField(Wallet, on_delete=models.CASCADE, primary_key=True, related_name='velocity')
+    tx_count_1m = models.FloatField(default=0)
+    tx_count_1h = models.FloatField(default=0)
+    tx_count_24h = models.FloatField(default=0)
+    amount_1m = models.FloatField(default=0)
+    amount_1h = models.FloatField(default=0)
+    amount_24h = models.FloatField(default=0)
+    updated_at = models.DateTimeField(null=True)
+    # HyperLogLog sketches of recipient addresses in recipients_epoch and the epoch before
+    recipients = models.BinaryField(null=True)
+    recipients_previous = models.BinaryField(null=True)
+    recipients_epoch = models.BigIntegerField(null=True)
+    
+    def __str__(self):
+        return f"Velocity of wallet {self.wallet_id}"
+
 class AnomalyDetectionModel(models.Model):
     """
     Represents a trained anomaly detection model.
@@ -86,6 +128,36 @@ class SecurityScan(models.Model):
     issues_found = models.IntegerField(default=0)
     critical_issues = models.IntegerField(default=0)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['initiated_by', '-started_at', '-id'], name='scan_user_started_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.scan_type} - {self.status} - {self.started_at}"
 
+
+class SecurityEvent(models.Model):
+    """
+    Log of the alert and scan events streamed to a user's open feeds. The
+    id is the SSE event id, so a reconnecting client is sent the events
+    after its Last-Event-ID. Rows older than EVENT_RETENTION_HOURS are
+    pruned by prune_security_events.
+    """
+    EVENT_TYPES = (
+        ('alert', 'Security alert created'),
+        ('scan', 'Security scan status changed'),
+    )
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='security_events', db_index=False)  # Indexed through event_user_idx
+    event_type = models.CharField(max_length=10, choices=EVENT_TYPES)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='event_user_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type} {self.id} for user {self.user_id}"
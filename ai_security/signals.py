@@ -0,0 +1,78 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import SecurityAlert, SecurityScan
+from .utils.alert_counters import alert_flags, apply_delta, reconcile_user
+from .utils.events import alert_data, publish, scan_data
+from .utils.velocity import record_transactions
+from blockchain.models import Transaction
+from quantum_defi.response_cache import invalidate
+
+def _counted_state(instance):
+    # Read from __dict__ so deferred fields never trigger a query per loaded row
+    values = instance.__dict__
+    if instance.pk is None or not {'user_id', 'is_resolved', 'severity'} <= values.keys():
+        return None
+    return values['user_id'], alert_flags(values['is_resolved'], values['severity'])
+
+@receiver(post_init, sender=SecurityAlert)
+def remember_alert_state(sender, instance, **kwargs):
+    """
+    Records what a loaded alert contributes to the counters, so a later
+    save can apply only the difference.
+    """
+    instance._counted_state = _counted_state(instance)
+
+@receiver(post_save, sender=SecurityAlert)
+def update_alert_counters(sender, instance, created, **kwargs):
+    new_state = (instance.user_id, alert_flags(instance.is_resolved, instance.severity))
+    old_state = None if created else instance._counted_state
+
+    if created:
+        apply_delta(instance.user_id, new_state[1])
+    elif old_state is None:
+        # Loaded with deferred fields, so the previous contribution is unknown
+        reconcile_user(instance.user_id)
+    elif old_state[0] != instance.user_id:
+        apply_delta(old_state[0], tuple(-value for value in old_state[1]))
+        apply_delta(instance.user_id, new_state[1])
+    else:
+        apply_delta(instance.user_id, tuple(new - old for new, old in zip(new_state[1], old_state[1])))
+
+    instance._counted_state = new_state
+    invalidate('security_alerts', instance.user_id)
+    if old_state is not None and old_state[0] != instance.user_id:
+        invalidate('security_alerts', old_state[0])
+
+@receiver(post_save, sender=SecurityAlert)
+def publish_alert_event(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish(instance.user_id, 'alert', alert_data(instance))
+
+@receiver(post_delete, sender=SecurityAlert)
+def remove_alert_from_counters(sender, instance, **kwargs):
+    apply_delta(instance.user_id, tuple(-value for value in alert_flags(instance.is_resolved, instance.severity)))
+    invalidate('security_alerts', instance.user_id)
+
+@receiver(post_init, sender=SecurityScan)
+def remember_scan_status(sender, instance, **kwargs):
+    instance._published_status = instance.__dict__.get('status') if instance.pk is not None else None
+
+@receiver(post_save, sender=SecurityScan)
+def publish_scan_event(sender, instance, created, raw=False, **kwargs):
+    if raw or instance.initiated_by_id is None:
+        return
+    if created or instance.status != instance._published_status:
+        publish(instance.initiated_by_id, 'scan', scan_data(instance))
+    instance._published_status = instance.status
+
+@receiver([post_save, post_delete], sender=SecurityScan)
+def invalidate_scan_responses(sender, instance, **kwargs):
+    if instance.initiated_by_id is not None:
+        invalidate('security_scans', instance.initiated_by_id)
+
+@receiver(post_save, sender=Transaction)
+def record_wallet_velocity(sender, instance, created, raw=False, **kwargs):
+    # Bulk inserts do not send post_save and record their sends themselves
+    if created and not raw:
+        record_transactions([instance])
@@ -0,0 +1,111 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import User
+from ai_security import inference_pool
+from ai_security.models import SecurityAlert, SecurityScan
+from ai_security.views import SecurityAlertViewSet, SecurityScanViewSet
+from blockchain.models import Transaction
+from blockchain.tests import create_transaction, create_wallet
+from quantum_defi.query_budget import assert_view_within_budget
+
+class ViewSetQueryBudgetTests(TestCase):
+    """
+    List and retrieve must stay within each ViewSet's query_budget however
+    many rows they return.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', email='alice@example.com', password='password')
+        wallet = create_wallet(cls.user, '0x' + '11' * 20)
+        cls.alerts = [
+            SecurityAlert.objects.create(
+                user=cls.user, transaction=create_transaction(wallet, f'0xalert{index}'),
+                alert_type='ANOMALY', severity='HIGH', description='Unusual amount',
+            )
+            for index in range(5)
+        ]
+        cls.scans = [
+            SecurityScan.objects.create(scan_type='TRANSACTION', status='COMPLETED', initiated_by=cls.user)
+            for _ in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def assert_list_and_retrieve(self, viewset_class, obj):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        response = assert_view_within_budget(viewset_class, request, 'list')
+        self.assertEqual(response.status_code, 200)
+
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        response = assert_view_within_budget(viewset_class, request, 'retrieve', pk=obj.pk)
+        self.assertEqual(response.status_code, 200)
+
+    def test_security_alerts(self):
+        self.assert_list_and_retrieve(SecurityAlertViewSet, self.alerts[0])
+
+    def test_security_scans(self):
+        self.assert_list_and_retrieve(SecurityScanViewSet, self.scans[0])
+
+class InferenceSaturationTests(TestCase):
+    """
+    Once INFERENCE_MAX_PENDING scoring jobs are in flight, async submissions
+    are turned away with 503 and Retry-After instead of queueing.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', email='alice@example.com', password='password')
+        cls.wallet = create_wallet(cls.user, '0x' + '11' * 20)
+
+    def setUp(self):
+        cache.clear()
+        # Threads stand in for the inference processes; each job runs until released
+        self.release = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        self.addCleanup(self.release.set)
+        for name, value in (('get_pool', lambda: executor), ('_score', self.held_score)):
+            patcher = mock.patch.object(inference_pool, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def held_score(self, features, wallet_id):
+        self.release.wait(timeout=10)
+        return False, 0.0
+
+    @override_settings(AI_SECURITY_SETTINGS={**settings.AI_SECURITY_SETTINGS, 'INFERENCE_MAX_PENDING': 1, 'INFERENCE_RETRY_AFTER': 3})
+    async def test_saturated_pool_answers_503_with_retry_after(self):
+        data = {'from_wallet': self.wallet, 'amount': Decimal('1'), 'gas_fee': Decimal('0.01'), 'transaction_type': 'SEND'}
+        held = asyncio.create_task(inference_pool.score_transaction(data))
+        await asyncio.sleep(0)
+        self.assertEqual(inference_pool.pending_jobs(), 1)
+
+        response = await self.async_client.post(
+            reverse('submit_transaction_async'),
+            {'from_wallet': self.wallet.id, 'to_address': '0x' + 'cc' * 20, 'amount': '1', 'gas_fee': '0.01', 'transaction_type': 'SEND'},
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {AccessToken.for_user(self.user)}'},
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertFalse(await Transaction.objects.filter(from_wallet=self.wallet).aexists())
+
+        self.release.set()
+        self.assertEqual(await held, (False, 0.0))
+        self.assertEqual(inference_pool.pending_jobs(), 0)
@@ -0,0 +1,108 @@
+"""
+Maintenance of the per-user SecurityAlertCounter rows.
+
+Counters are adjusted with F() expressions from the alert signals, read
+in one primary-key lookup by the dashboard, and recomputed from the
+SecurityAlert table when a row is missing or has drifted (for example
+after a queryset.update() that bypassed the signals).
+"""
+
+from django.db.models import Count, F, Q
+
+from ai_security.models import SecurityAlert, SecurityAlertCounter
+from quantum_defi.response_cache import invalidate
+
+COUNTER_FIELDS = ('total_alerts', 'unresolved_alerts', 'critical_alerts')
+
+def alert_flags(is_resolved, severity):
+    """
+    Returns the contribution of one alert to each counter, in COUNTER_FIELDS order.
+    """
+    unresolved = 0 if is_resolved else 1
+    return (1, unresolved, unresolved if severity == 'CRITICAL' else 0)
+
+def count_alerts(user_id):
+    """
+    Computes a user's counters with a single conditional-aggregate query.
+
+    Returns:
+        Dictionary keyed by COUNTER_FIELDS
+    """
+    return SecurityAlert.objects.filter(user_id=user_id).aggregate(
+        total_alerts=Count('id'),
+        unresolved_alerts=Count('id', filter=Q(is_resolved=False)),
+        critical_alerts=Count('id', filter=Q(is_resolved=False, severity='CRITICAL')),
+    )
+
+def reconcile_user(user_id):
+    """
+    Recomputes and stores one user's counters from the alert table.
+
+    Returns:
+        SecurityAlertCounter object
+    """
+    counter, _ = SecurityAlertCounter.objects.update_or_create(user_id=user_id, defaults=count_alerts(user_id))
+    return counter
+
+def apply_delta(user_id, delta):
+    """
+    Atomically adds delta (in COUNTER_FIELDS order) to a user's counters.
+    A missing row is created from the alert table when alerts are added;
+    for pure decrements it is left to be built on the next read, which
+    also avoids recreating it while the user is being deleted.
+    """
+    if not any(delta):
+        return
+    updated = SecurityAlertCounter.objects.filter(user_id=user_id).update(**{
+        field: F(field) + change for field, change in zip(COUNTER_FIELDS, delta)
+    })
+    if not updated and any(change > 0 for change in delta):
+        reconcile_user(user_id)
+
+def get_alert_counts(user):
+    """
+    Returns a user's alert counters for the dashboard.
+
+    Returns:
+        Dictionary keyed by COUNTER_FIELDS
+    """
+    counter = SecurityAlertCounter.objects.filter(user=user).first()
+    if counter is None:
+        counter = reconcile_user(user.id)
+    return {field: getattr(counter, field) for field in COUNTER_FIELDS}
+
+def reconcile_all():
+    """
+    Fixes drifted or missing counters for every user in one aggregate pass.
+
+    Returns:
+        Number of counter rows corrected
+    """
+    actual = {
+        row.pop('user_id'): row
+        for row in SecurityAlert.objects.values('user_id').annotate(
+            total_alerts=Count('id'),
+            unresolved_alerts=Count('id', filter=Q(is_resolved=False)),
+            critical_alerts=Count('id', filter=Q(is_resolved=False, severity='CRITICAL')),
+        ).order_by()
+    }
+    stored = {counter.user_id: counter for counter in SecurityAlertCounter.objects.all()}
+    zero = dict.fromkeys(COUNTER_FIELDS, 0)
+
+    drifted = []
+    for user_id, counter in stored.items():
+        expected = actual.get(user_id, zero)
+        if any(getattr(counter, field) != expected[field] for field in COUNTER_FIELDS):
+            for field in COUNTER_FIELDS:
+                setattr(counter, field, expected[field])
+            drifted.append(counter)
+    missing = [
+        SecurityAlertCounter(user_id=user_id, **counts)
+        for user_id, counts in actual.items() if user_id not in stored
+    ]
+
+    SecurityAlertCounter.objects.bulk_update(drifted, COUNTER_FIELDS, batch_size=1000)
+    SecurityAlertCounter.objects.bulk_create(missing, batch_size=1000, ignore_conflicts=True)
+    for counter in drifted + missing:
+        invalidate('security_alerts', counter.user_id)
+    return len(drifted) + len(missing)
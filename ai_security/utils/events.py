@@ -0,0 +1,381 @@
+"""
+Live feed of security alerts and scan status changes, streamed to
+browsers as server-sent events.
+
+Signals call publish() when an alert is created or a scan changes
+status. publish() logs the event as a SecurityEvent row, whose id is the
+SSE event id, and sends it to every serving process once the database
+transaction commits. Two bridges connect the processes:
+
+- postgres: NOTIFY on CHANNEL. One connection per process LISTENs to it,
+  so feeds on every host are reached.
+- socket: a datagram to each process's Unix socket in EVENT_SOCKET_DIR.
+  This reaches the processes on the same host only.
+
+In each process, a Broker thread receives the events and hands them to
+the open feeds of the event's user. Nothing is queried per connected
+client while it waits. A client that reconnects with Last-Event-ID is
+first sent the logged events it missed. The same happens when a feed
+falls more than EVENT_QUEUE_SIZE events behind, and after the bridge
+reconnects.
+"""
+
+import abc
+import asyncio
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import select
+import socket
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from ai_security.models import SecurityEvent
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'security_events'
+
+# PostgreSQL limits NOTIFY payloads to 8000 bytes; larger events are sent
+# as their id and user, and receivers read the rest from the log
+MAX_PAYLOAD = 7900
+
+# Milliseconds EventSource waits before reconnecting
+RECONNECT_MS = 3000
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def _setting(name, default=None):
+    return settings.AI_SECURITY_SETTINGS.get(name, default)
+
+def bridge_type():
+    """
+    Returns the configured bridge, resolving 'auto' from the database vendor.
+    """
+    bridge = _setting('EVENT_BRIDGE', 'auto')
+    if bridge == 'auto':
+        return 'postgres' if connection.vendor == 'postgresql' else 'socket'
+    return bridge
+
+def streams_supported(request):
+    """
+    Returns whether event streams are served for a request: always under
+    ASGI, and under WSGI only with EVENT_STREAM_WSGI set, as each open
+    stream would hold a sync worker for EVENT_STREAM_SECONDS.
+    """
+    return isinstance(request, ASGIRequest) or _setting('EVENT_STREAM_WSGI', False)
+
+def alert_data(alert):
+    return {
+        'id': alert.id,
+        'alert_type': alert.alert_type,
+        'alert_type_display': alert.get_alert_type_display(),
+        'severity': alert.severity,
+        'severity_display': alert.get_severity_display(),
+        'description': alert.description,
+        'transaction': alert.transaction_id,
+        'timestamp': alert.timestamp,
+        'is_resolved': alert.is_resolved,
+    }
+
+def scan_data(scan):
+    return {
+        'id': scan.id,
+        'scan_type': scan.scan_type,
+        'status': scan.status,
+        'started_at': scan.started_at,
+        'completed_at': scan.completed_at,
+        'issues_found': scan.issues_found,
+        'critical_issues': scan.critical_issues,
+    }
+
+def _message(event):
+    return {'id': event.id, 'user': event.user_id, 'event': event.event_type, 'data': event.data}
+
+def _encode(event):
+    payload = json.dumps(_message(event), cls=DjangoJSONEncoder)
+    if len(payload.encode()) > MAX_PAYLOAD:
+        payload = json.dumps({'id': event.id, 'user': event.user_id})
+    return payload
+
+def publish(user_id, event_type, data):
+    """
+    Logs an event and sends it to the user's open feeds in every process
+    once the current database transaction commits.
+
+    Args:
+        user_id: User whose feeds receive the event
+        event_type: One of SecurityEvent.EVENT_TYPES
+        data: JSON-serializable event body, e.g. from alert_data()
+
+    Returns:
+        The SecurityEvent logged
+    """
+    event = SecurityEvent.objects.create(user_id=user_id, event_type=event_type, data=data)
+    payload = _encode(event)
+    if bridge_type() == 'postgres':
+        with connection.cursor() as cursor:
+            # Delivered when the transaction commits and dropped if it rolls back
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+    else:
+        db_transaction.on_commit(lambda: _send_datagrams(payload.encode()))
+    return event
+
+def _send_datagrams(payload):
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sender.setblocking(False)
+    try:
+        for path in glob.glob(os.path.join(_setting('EVENT_SOCKET_DIR'), 'events-*.sock')):
+            try:
+                sender.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The process that bound the socket has exited
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                logger.warning("Dropped a feed event for %s, whose receive buffer is full", path)
+    finally:
+        sender.close()
+
+class Feed(abc.ABC):
+    """
+    One open event stream. Events the broker cannot queue are not lost:
+    the feed is marked stale and reads them from the log instead.
+    """
+
+    def __init__(self, user_id, last_event_id=None):
+        self.user_id = user_id
+        self.last_id = last_event_id or 0
+        # Resuming clients are first sent what they missed
+        self.stale = last_event_id is not None
+        self._delivered = deque(maxlen=_setting('EVENT_QUEUE_SIZE', 100) * 2)
+
+    @abc.abstractmethod
+    def put(self, message):
+        """
+        Queues a message for the client without blocking the broker thread.
+        """
+
+    def accept(self, message):
+        """
+        Returns the message formatted as an SSE event, or None if this feed
+        has already sent it.
+        """
+        if message['id'] in self._delivered:
+            return None
+        self._delivered.append(message['id'])
+        self.last_id = max(self.last_id, message['id'])
+        return (
+            f"id: {message['id']}\nevent: {message['event']}\n"
+            f"data: {json.dumps(message['data'], cls=DjangoJSONEncoder)}\n\n"
+        )
+
+    def missed(self):
+        """
+        Returns the logged events after the last one sent, formatted as SSE events.
+        """
+        self.stale = False
+        events = SecurityEvent.objects.filter(user_id=self.user_id, id__gt=self.last_id).order_by('id')
+        return [chunk for chunk in (self.accept(_message(event)) for event in events) if chunk]
+
+class SyncFeed(Feed):
+    def __init__(self, user_id, last_event_id=None):
+        super().__init__(user_id, last_event_id)
+        self.queue = queue.Queue(maxsize=_setting('EVENT_QUEUE_SIZE', 100))
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.stale = True
+
+class AsyncFeed(Feed):
+    def __init__(self, user_id, last_event_id=None):
+        super().__init__(user_id, last_event_id)
+        self.queue = asyncio.Queue(maxsize=_setting('EVENT_QUEUE_SIZE', 100))
+        self._loop = asyncio.get_running_loop()
+
+    def put(self, message):
+        # Called from the broker thread
+        self._loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stale = True
+
+class Broker:
+    """
+    Receives the events published by every process and hands them to the
+    open feeds in this one. The bridge is started with the first feed.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._feeds = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, feed):
+        with self._lock:
+            self._feeds.setdefault(feed.user_id, set()).add(feed)
+            if self._thread is None:
+                target = self._listen_postgres if bridge_type() == 'postgres' else self._listen_socket
+                self._thread = threading.Thread(target=target, name='security-events', daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, feed):
+        with self._lock:
+            feeds = self._feeds.get(feed.user_id)
+            if feeds is not None:
+                feeds.discard(feed)
+                if not feeds:
+                    del self._feeds[feed.user_id]
+
+    def dispatch(self, payload):
+        message = json.loads(payload)
+        with self._lock:
+            feeds = list(self._feeds.get(message['user'], ()))
+        if not feeds:
+            return
+        if 'event' not in message:
+            event = SecurityEvent.objects.filter(id=message['id']).first()
+            if event is None:
+                return
+            message = _message(event)
+        for feed in feeds:
+            feed.put(message)
+
+    def _resync(self):
+        # Events published while the bridge was down are read from the log
+        with self._lock:
+            for feeds in self._feeds.values():
+                for feed in feeds:
+                    feed.stale = True
+
+    def _listen_socket(self):
+        directory = _setting('EVENT_SOCKET_DIR')
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'events-{self.pid}.sock')
+        if os.path.exists(path):
+            # Left behind by an earlier process with the same pid
+            os.remove(path)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(path)
+        atexit.register(lambda: os.path.exists(path) and os.remove(path))
+        while True:
+            try:
+                self.dispatch(receiver.recv(MAX_PAYLOAD * 4))
+            except Exception:
+                logger.exception("Failed to dispatch a feed event")
+
+    def _listen_postgres(self):
+        import psycopg2
+
+        while True:
+            try:
+                listener = psycopg2.connect(**connection.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                self._resync()
+                while True:
+                    if select.select([listener], [], [], 60)[0]:
+                        listener.poll()
+                        while listener.notifies:
+                            self.dispatch(listener.notifies.pop(0).payload)
+            except Exception:
+                logger.exception("Security event listener failed, reconnecting")
+                time.sleep(5)
+
+def get_broker():
+    """
+    Returns the broker of the current process; a forked worker gets its own.
+    """
+    global _broker
+    if _broker is None or _broker.pid != os.getpid():
+        with _broker_lock:
+            if _broker is None or _broker.pid != os.getpid():
+                _broker = Broker()
+    return _broker
+
+def stream_events(user_id, last_event_id=None):
+    """
+    Yields a user's events as SSE chunks for EVENT_STREAM_SECONDS. The
+    stream holds a worker thread while it is open, so it is only served
+    under WSGI with EVENT_STREAM_WSGI set (see streams_supported).
+    """
+    feed = SyncFeed(user_id, last_event_id)
+    broker = get_broker()
+    broker.subscribe(feed)
+    deadline = time.monotonic() + _setting('EVENT_STREAM_SECONDS', 300)
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        while time.monotonic() < deadline:
+            if feed.stale:
+                yield from feed.missed()
+            try:
+                message = feed.queue.get(timeout=_setting('EVENT_KEEPALIVE', 15))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            chunk = feed.accept(message)
+            if chunk:
+                yield chunk
+    finally:
+        broker.unsubscribe(feed)
+
+async def astream_events(user_id, last_event_id=None):
+    """
+    Async counterpart of stream_events for ASGI mode, where an open stream
+    costs no thread.
+    """
+    feed = AsyncFeed(user_id, last_event_id)
+    broker = get_broker()
+    broker.subscribe(feed)
+    deadline = time.monotonic() + _setting('EVENT_STREAM_SECONDS', 300)
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n"
+        while time.monotonic() < deadline:
+            if feed.stale:
+                for chunk in await sync_to_async(feed.missed)():
+                    yield chunk
+            try:
+                message = await asyncio.wait_for(feed.queue.get(), _setting('EVENT_KEEPALIVE', 15))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            chunk = feed.accept(message)
+            if chunk:
+                yield chunk
+    finally:
+        broker.unsubscribe(feed)
+
+def prune_events(hours=None):
+    """
+    Deletes events older than EVENT_RETENTION_HOURS.
+
+    Returns:
+        Number of events deleted
+    """
+    if hours is None:
+        hours = _setting('EVENT_RETENTION_HOURS', 24)
+    cutoff = timezone.now() - timedelta(hours=hours)
+    deleted, _ = SecurityEvent.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
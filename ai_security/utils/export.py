@@ -0,0 +1,223 @@
+"""
+Streaming columnar export of transactions, security alerts and key usage logs.
+
+Rows are read with QuerySet.iterator(), which uses a server-side cursor on
+PostgreSQL, converted chunk by chunk into typed Arrow record batches and
+written as Parquet, an Arrow IPC stream or gzip CSV. Only one chunk is
+held in memory at a time, whatever the size of the table.
+"""
+
+import gzip
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import models
+
+from ai_security.models import SecurityAlert
+from blockchain.models import Transaction
+from quantum_crypto.models import KeyUsageLog
+
+# Exported columns per table; the bulky signature and description texts are left out
+EXPORTS = {
+    'transactions': (Transaction, (
+        'id', 'tx_hash', 'from_wallet', 'from_address', 'to_address', 'amount', 'gas_fee',
+        'transaction_type', 'status', 'block_number', 'timestamp', 'signature_algorithm',
+    )),
+    'security_alerts': (SecurityAlert, (
+        'id', 'user', 'transaction', 'alert_type', 'severity', 'timestamp',
+        'is_resolved', 'resolved_at', 'resolved_by',
+    )),
+    'key_usage': (KeyUsageLog, (
+        'id', 'quantum_key', 'wallet', 'operation', 'timestamp', 'ip_address', 'user_agent', 'success',
+    )),
+}
+
+# Content type and file extension per output format
+FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', '.arrows'),
+    'csv': ('application/gzip', '.csv.gz'),
+}
+
+def arrow_type(field):
+    """
+    Maps a model field to the Arrow type it is exported as. Decimals keep
+    their exact precision and foreign keys export the related id.
+    """
+    if field.is_relation:
+        field = field.target_field
+    if isinstance(field, models.DecimalField):
+        return pa.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.IntegerField):
+        return pa.int64()
+    if isinstance(field, models.FloatField):
+        return pa.float64()
+    return pa.string()
+
+def export_schema(table):
+    """
+    Returns the Arrow schema of an export table.
+
+    Raises:
+        KeyError: If the table is not in EXPORTS
+    """
+    model, names = EXPORTS[table]
+    fields = [model._meta.get_field(name) for name in names]
+    return pa.schema([pa.field(field.attname, arrow_type(field), nullable=field.null) for field in fields])
+
+def iter_batches(table, since=None, until=None, chunk_size=None):
+    """
+    Yields the rows of an export table as Arrow record batches.
+
+    Args:
+        table: Key of EXPORTS
+        since: Optional lower bound on timestamp (inclusive)
+        until: Optional upper bound on timestamp (exclusive)
+        chunk_size: Rows per batch, defaults to EXPORT_CHUNK_SIZE
+
+    Yields:
+        pyarrow.RecordBatch objects
+    """
+    model, _ = EXPORTS[table]
+    schema = export_schema(table)
+    chunk_size = chunk_size or settings.AI_SECURITY_SETTINGS.get('EXPORT_CHUNK_SIZE', 50000)
+
+    queryset = model.objects.order_by('pk')
+    if since is not None:
+        queryset = queryset.filter(timestamp__gte=since)
+    if until is not None:
+        queryset = queryset.filter(timestamp__lt=until)
+
+    chunk = []
+    for row in queryset.values_list(*schema.names).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield _to_batch(chunk, schema)
+            chunk = []
+    if chunk:
+        yield _to_batch(chunk, schema)
+
+def _to_batch(rows, schema):
+    columns = zip(*rows)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+def _encode(table, output_format, sink, **options):
+    # Writes each batch to sink and yields its row count, closing the writer
+    # (which writes the Parquet footer / end of stream) once batches run out
+    schema = export_schema(table)
+    compressed = None
+    if output_format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    elif output_format == 'arrow':
+        writer = pa.ipc.new_stream(sink, schema)
+    elif output_format == 'csv':
+        compressed = gzip.GzipFile(fileobj=sink, mode='wb')
+        writer = pa_csv.CSVWriter(compressed, schema)
+    else:
+        raise ValueError(f"Unsupported export format: {output_format}")
+
+    try:
+        for batch in iter_batches(table, **options):
+            writer.write_batch(batch)
+            yield batch.num_rows
+    finally:
+        writer.close()
+        if compressed is not None:
+            compressed.close()
+
+class _StreamSink:
+    """
+    Write-only file object that collects output until it is drained.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def write_export(table, output_format, path, **options):
+    """
+    Exports a table to a file.
+
+    Args:
+        table: Key of EXPORTS
+        output_format: Key of FORMATS
+        path: Output file path
+        **options: since, until and chunk_size, as for iter_batches
+
+    Returns:
+        Number of rows exported
+    """
+    with open(path, 'wb') as output:
+        return sum(_encode(table, output_format, output, **options))
+
+def stream_export(table, output_format, **options):
+    """
+    Exports a table as a generator of bytes, for StreamingHttpResponse.
+
+    Args:
+        table: Key of EXPORTS
+        output_format: Key of FORMATS
+        **options: since, until and chunk_size, as for iter_batches
+
+    Yields:
+        Encoded output, roughly one chunk of rows at a time
+    """
+    sink = _StreamSink()
+    for _ in _encode(table, output_format, sink, **options):
+        data = sink.drain()
+        if data:
+            yield data
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+async def astream_export(table, output_format, **options):
+    """
+    Async counterpart of stream_export for ASGI mode. Django reads a sync
+    iterator there by collecting it into a list first, so each chunk is
+    pulled from stream_export in the sync thread and passed on as it comes.
+    """
+    chunks = stream_export(table, output_format, **options)
+    try:
+        while True:
+            # The generator keeps its database cursor, so it always runs in the same thread
+            chunk = await sync_to_async(next)(chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
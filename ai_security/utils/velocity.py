@@ -0,0 +1,246 @@
+"""
+Rolling per-wallet velocity features for transaction scoring.
+
+Each wallet's WalletVelocity row holds exponentially decayed send counts
+and amounts with time constants of one minute, one hour and one day, and
+HyperLogLog sketches of the addresses it sent to. A decayed count with a
+one-hour time constant is about the number of sends in the last hour,
+and it can be brought up to date from its last value alone. Recording a
+send therefore updates one row, and reading the features reads one row,
+however long the wallet's history is.
+
+The recipient sketches cover fixed epochs of VELOCITY_RECIPIENT_WINDOW
+seconds. The current and previous epochs are kept and merged on read, so
+the distinct count spans between one and two windows.
+
+Sends are recorded from the Transaction signal and by the batch
+pipeline. Rows built by imports, which bypass both, are rebuilt with the
+rebuild_wallet_velocity command.
+"""
+
+import hashlib
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from ai_security.models import WalletVelocity
+
+# Feature suffix and decay time constant in seconds
+WINDOWS = (('1m', 60), ('1h', 3600), ('24h', 86400))
+
+# HyperLogLog with 2**8 one-byte registers, about 6.5% standard error
+HLL_BITS = 8
+HLL_REGISTERS = 1 << HLL_BITS
+HLL_ALPHA = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+
+FEATURES = tuple(
+    f'{name}_{suffix}' for name in ('tx_count', 'amount') for suffix, _ in WINDOWS
+) + ('distinct_recipients',)
+
+def _setting(name, default=None):
+    return settings.AI_SECURITY_SETTINGS.get(name, default)
+
+def _recipient_epoch(seconds):
+    return int(seconds // _setting('VELOCITY_RECIPIENT_WINDOW', 3600))
+
+def hll_add(registers, value):
+    """
+    Adds a value to a HyperLogLog sketch held in a bytearray.
+    """
+    hashed = int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+    index = hashed >> (64 - HLL_BITS)
+    rest = hashed & ((1 << (64 - HLL_BITS)) - 1)
+    rank = (64 - HLL_BITS) - rest.bit_length() + 1
+    if rank > registers[index]:
+        registers[index] = rank
+
+def hll_count(*sketches):
+    """
+    Estimates the number of distinct values added to the union of sketches.
+    """
+    registers = [max(values) for values in zip(*sketches)] if sketches else [0] * HLL_REGISTERS
+    estimate = HLL_ALPHA * HLL_REGISTERS ** 2 / sum(2.0 ** -register for register in registers)
+    zeros = registers.count(0)
+    if estimate <= 2.5 * HLL_REGISTERS and zeros:
+        # Linear counting is more accurate for small sets
+        estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / zeros)
+    return estimate
+
+def _empty_sketch():
+    return bytearray(HLL_REGISTERS)
+
+def apply_send(row, seconds, amount, to_address):
+    """
+    Adds one send to a wallet's row in memory.
+
+    Args:
+        row: WalletVelocity object
+        seconds: Send time as a Unix timestamp
+        amount: Amount sent, as a float
+        to_address: Recipient address
+    """
+    updated = row.updated_at.timestamp() if row.updated_at else seconds
+    for suffix, tau in WINDOWS:
+        count, total = getattr(row, f'tx_count_{suffix}'), getattr(row, f'amount_{suffix}')
+        if seconds >= updated:
+            decay = math.exp((updated - seconds) / tau)
+            count, total = count * decay + 1, total * decay + amount
+        else:
+            # A send older than the row's last update is decayed to that time instead
+            weight = math.exp((seconds - updated) / tau)
+            count, total = count + weight, total + amount * weight
+        setattr(row, f'tx_count_{suffix}', count)
+        setattr(row, f'amount_{suffix}', total)
+    if seconds > updated or row.updated_at is None:
+        row.updated_at = datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+    epoch = _recipient_epoch(seconds)
+    current = bytearray(row.recipients or _empty_sketch())
+    previous = bytearray(row.recipients_previous or _empty_sketch())
+    if row.recipients_epoch is None or epoch > row.recipients_epoch:
+        previous = current if row.recipients_epoch == epoch - 1 else _empty_sketch()
+        current = _empty_sketch()
+        row.recipients_epoch = epoch
+    if epoch == row.recipients_epoch:
+        hll_add(current, to_address.lower())
+    elif epoch == row.recipients_epoch - 1:
+        hll_add(previous, to_address.lower())
+    row.recipients, row.recipients_previous = bytes(current), bytes(previous)
+
+def record_transactions(transactions):
+    """
+    Adds newly stored sends to their wallets' velocity rows. The rows are
+    locked in wallet order, so concurrent writers cannot deadlock.
+
+    Args:
+        transactions: Saved Transaction objects; RECEIVE rows are skipped
+    """
+    sends = [tx for tx in transactions if tx.transaction_type != 'RECEIVE']
+    if not sends:
+        return
+    wallet_ids = sorted({tx.from_wallet_id for tx in sends})
+
+    with db_transaction.atomic():
+        locked = WalletVelocity.objects.select_for_update().order_by('wallet_id')
+        rows = {row.wallet_id: row for row in locked.filter(wallet_id__in=wallet_ids)}
+        missing = [wallet_id for wallet_id in wallet_ids if wallet_id not in rows]
+        if missing:
+            WalletVelocity.objects.bulk_create([WalletVelocity(wallet_id=wallet_id) for wallet_id in missing], ignore_conflicts=True)
+            rows.update({row.wallet_id: row for row in locked.filter(wallet_id__in=missing)})
+
+        for tx in sorted(sends, key=lambda tx: tx.timestamp):
+            apply_send(rows[tx.from_wallet_id], tx.timestamp.timestamp(), float(tx.amount), tx.to_address)
+        WalletVelocity.objects.bulk_update(
+            list(rows.values()),
+            [f'{name}_{suffix}' for name in ('tx_count', 'amount') for suffix, _ in WINDOWS]
+            + ['updated_at', 'recipients', 'recipients_previous', 'recipients_epoch'],
+        )
+
+def _features(row, now):
+    if row is None:
+        return dict.fromkeys(FEATURES, 0.0)
+    elapsed = max(now - row.updated_at.timestamp(), 0.0) if row.updated_at else 0.0
+    features = {}
+    for suffix, tau in WINDOWS:
+        decay = math.exp(-elapsed / tau)
+        features[f'tx_count_{suffix}'] = getattr(row, f'tx_count_{suffix}') * decay
+        features[f'amount_{suffix}'] = getattr(row, f'amount_{suffix}') * decay
+
+    epoch = _recipient_epoch(now)
+    if row.recipients_epoch == epoch:
+        features['distinct_recipients'] = hll_count(row.recipients, row.recipients_previous)
+    elif row.recipients_epoch == epoch - 1:
+        features['distinct_recipients'] = hll_count(row.recipients)
+    else:
+        features['distinct_recipients'] = 0.0
+    return features
+
+def get_velocity_features(wallet_ids):
+    """
+    Returns the velocity features of wallets, decayed to now, from one query.
+
+    Args:
+        wallet_ids: Iterable of wallet ids
+
+    Returns:
+        Dictionary of wallet id to a dictionary keyed by FEATURES; wallets
+        that never sent have all features at zero
+    """
+    wallet_ids = set(wallet_ids)
+    rows = {row.wallet_id: row for row in WalletVelocity.objects.filter(wallet_id__in=wallet_ids)}
+    now = timezone.now().timestamp()
+    return {wallet_id: _features(rows.get(wallet_id), now) for wallet_id in wallet_ids}
+
+def sending_wallet_id(transaction_data):
+    """
+    Returns the sending wallet's id from a transaction dictionary or
+    Transaction object, or None if it has none.
+    """
+    if isinstance(transaction_data, dict):
+        wallet = transaction_data.get('from_wallet')
+        return wallet.id if wallet is not None else transaction_data.get('from_wallet_id')
+    return getattr(transaction_data, 'from_wallet_id', None)
+
+def velocity_score(features):
+    """
+    Returns how far a wallet's recent activity is over the configured
+    limits: the largest ratio of a feature to its limit.
+    """
+    return max(
+        features['tx_count_1m'] / _setting('VELOCITY_MAX_PER_MINUTE', 5),
+        features['tx_count_1h'] / _setting('VELOCITY_MAX_PER_HOUR', 60),
+        features['distinct_recipients'] / _setting('VELOCITY_MAX_RECIPIENTS', 20),
+    )
+
+def apply_velocity(is_anomaly, confidence, features):
+    """
+    Combines a model's verdict with the wallet's velocity. Activity over a
+    limit makes the transaction anomalous, with a confidence that grows
+    with the excess: 0.5 at the limit and 0.8 at four times the limit.
+    Velocity alone never reaches the 0.8 at which transactions are
+    rejected: without the model's agreement its confidence is capped at
+    VELOCITY_MAX_CONFIDENCE, so a busy wallet, e.g. after a payroll batch,
+    is flagged but can still send.
+
+    Returns:
+        Tuple of (is_anomaly, confidence)
+    """
+    if features is None:
+        return is_anomaly, confidence
+    score = velocity_score(features)
+    if score >= 1:
+        velocity_confidence = score / (1 + score)
+        if not is_anomaly:
+            return True, min(velocity_confidence, _setting('VELOCITY_MAX_CONFIDENCE', 0.75))
+        return True, max(float(confidence), velocity_confidence)
+    return is_anomaly, confidence
+
+def rebuild_all():
+    """
+    Rebuilds every wallet's row from the sends of the last day, the
+    longest window.
+
+    Returns:
+        Number of rows written
+    """
+    from blockchain.models import Transaction
+
+    since = timezone.now() - timedelta(seconds=WINDOWS[-1][1])
+    rows = {}
+    sends = (
+        Transaction.objects.filter(timestamp__gte=since).exclude(transaction_type='RECEIVE')
+        .order_by('timestamp', 'id').only('from_wallet_id', 'timestamp', 'amount', 'to_address')
+    )
+    for tx in sends.iterator(chunk_size=_setting('EXPORT_CHUNK_SIZE', 50000)):
+        row = rows.get(tx.from_wallet_id)
+        if row is None:
+            row = rows[tx.from_wallet_id] = WalletVelocity(wallet_id=tx.from_wallet_id)
+        apply_send(row, tx.timestamp.timestamp(), float(tx.amount), tx.to_address)
+
+    with db_transaction.atomic():
+        WalletVelocity.objects.all().delete()
+        WalletVelocity.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
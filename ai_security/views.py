@@ -1,16 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from django.utils import timezone
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 
 from .models import SecurityAlert, AnomalyDetectionModel, SecurityScan
 from .serializers import SecurityAlertSerializer, AnomalyDetectionModelSerializer, SecurityScanSerializer
-from .ml_models.anomaly_detection import check_transaction_anomaly, train_anomaly_detection_model
+from .inference_pool import InferenceSaturated, score_transaction
+from .ml import check_transaction_anomaly, train_anomaly_detection_model
+from .utils.alert_counters import get_alert_counts
+from .utils.events import astream_events, stream_events, streams_supported
 from blockchain.models import Transaction
+from quantum_defi.admission import AdmissionThrottle, admit
+from quantum_defi.async_api import jwt_required, service_unavailable
+from quantum_defi.instrumentation import timed
+from quantum_defi.pagination import paginate_keyset_for_request
+from quantum_defi.response_cache import cached_context, cached_page
 
 class SecurityAlertViewSet(viewsets.ModelViewSet):
     """
@@ -18,9 +28,12 @@ class SecurityAlertViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SecurityAlertSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-timestamp', '-id')
+    query_budget = {'list': 2, 'retrieve': 2, 'resolve': 3}
     
     def get_queryset(self):
-        return SecurityAlert.objects.filter(user=self.request.user).order_by('-timestamp')
+        # transaction is read by the serializer for transaction_hash
+        return SecurityAlert.objects.filter(user=self.request.user).select_related('transaction').order_by(*self.keyset_ordering)
     
     @action(detail=True, methods=['post'])
     def resolve(self, request, pk=None):
@@ -38,9 +51,14 @@ class SecurityScanViewSet(viewsets.ModelViewSet):
     """
     serializer_class = SecurityScanSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [AdmissionThrottle]
+    admission_scopes = {'start_scan': 'start_scan'}
+    keyset_ordering = ('-started_at', '-id')
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
-        return SecurityScan.objects.filter(initiated_by=self.request.user).order_by('-started_at')
+        # initiated_by is read by the serializer for initiated_by_email
+        return SecurityScan.objects.filter(initiated_by=self.request.user).select_related('initiated_by').order_by(*self.keyset_ordering)
     
     def perform_create(self, serializer):
         serializer.save(initiated_by=self.request.user)
@@ -67,31 +85,120 @@ class SecurityScanViewSet(viewsets.ModelViewSet):
         
         return Response(self.get_serializer(scan).data, status=status.HTTP_201_CREATED)
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def export_view(request, table):
+    """
+    Streams a table export for analytics. Query parameters: output_format
+    (parquet, arrow or csv), since and until (ISO datetimes).
+    """
+    # Imported here so pyarrow is only loaded by workers that serve an export
+    from .utils.export import EXPORTS, FORMATS, astream_export, stream_export
+
+    output_format = request.query_params.get('output_format', 'parquet')
+    if table not in EXPORTS or output_format not in FORMATS:
+        return Response({'error': 'Unknown table or output format'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    bounds = {}
+    for name in ('since', 'until'):
+        value = request.query_params.get(name)
+        if value is not None:
+            bounds[name] = parse_datetime(value)
+            if bounds[name] is None:
+                return Response({'error': f'{name} must be an ISO datetime'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    content_type, extension = FORMATS[output_format]
+    # Under ASGI a sync iterator would be read completely before the first byte is sent
+    stream = astream_export if isinstance(request._request, ASGIRequest) else stream_export
+    response = StreamingHttpResponse(stream(table, output_format, **bounds), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{table}{extension}"'
+    return response
+
+@jwt_required
+@admit('analyze_transaction')
+async def analyze_transaction_async_view(request, tx_id):
+    """
+    Async API counterpart of analyze_transaction_view. Scoring runs in the
+    inference pool; answers 503 with Retry-After when the pool is saturated.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    transaction = await Transaction.objects.for_user(request.user).filter(id=tx_id).afirst()
+    if transaction is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        with timed('anomaly'):
+            is_anomaly, confidence = await score_transaction(transaction)
+    except InferenceSaturated as saturated:
+        return service_unavailable(saturated.retry_after, 'Transaction scoring is at capacity')
+    
+    alert = None
+    if is_anomaly:
+        alert = await SecurityAlert.objects.acreate(
+            user=request.user,
+            transaction=transaction,
+            alert_type='ANOMALY',
+            severity='HIGH' if confidence > 0.8 else 'MEDIUM',
+            description=f"Transaction {transaction.tx_hash} has been flagged as anomalous with {confidence:.2f} confidence."
+        )
+    
+    return JsonResponse({
+        'transaction_hash': transaction.tx_hash,
+        'is_anomaly': is_anomaly,
+        'confidence': confidence,
+        'alert': alert.id if alert else None,
+    })
+
 # Web views
+SECURITY_DASHBOARD_SCOPES = ('security_alerts', 'security_scans')
+
 @login_required
+@cached_page('security_dashboard', SECURITY_DASHBOARD_SCOPES)
 def security_dashboard_view(request):
-    alerts = SecurityAlert.objects.filter(user=request.user).order_by('-timestamp')[:10]
-    scans = SecurityScan.objects.filter(initiated_by=request.user).order_by('-started_at')[:5]
-    
-    # Get statistics
-    total_alerts = SecurityAlert.objects.filter(user=request.user).count()
-    unresolved_alerts = SecurityAlert.objects.filter(user=request.user, is_resolved=False).count()
-    critical_alerts = SecurityAlert.objects.filter(user=request.user, severity='CRITICAL', is_resolved=False).count()
-    
-    context = {
-        'alerts': alerts,
-        'scans': scans,
-        'total_alerts': total_alerts,
-        'unresolved_alerts': unresolved_alerts,
-        'critical_alerts': critical_alerts,
-    }
+    def build_context():
+        # Get statistics from the incrementally maintained counters
+        counts = get_alert_counts(request.user)
+        return {
+            'alerts': list(SecurityAlert.objects.filter(user=request.user).order_by('-timestamp')[:10]),
+            'scans': list(SecurityScan.objects.filter(initiated_by=request.user).order_by('-started_at')[:5]),
+            'total_alerts': counts['total_alerts'],
+            'unresolved_alerts': counts['unresolved_alerts'],
+            'critical_alerts': counts['critical_alerts'],
+        }
     
+    context = cached_context(request, 'security_dashboard', SECURITY_DASHBOARD_SCOPES, build_context)
     return render(request, 'ai_security/dashboard.html', context)
 
 @login_required
 def alert_list_view(request):
-    alerts = SecurityAlert.objects.filter(user=request.user).order_by('-timestamp')
-    return render(request, 'ai_security/alert_list.html', {'alerts': alerts})
+    alerts, next_cursor = paginate_keyset_for_request(request, SecurityAlert.objects.filter(user=request.user))
+    return render(request, 'ai_security/alert_list.html', {'alerts': alerts, 'next_cursor': next_cursor})
+
+@login_required
+def alert_stream_view(request):
+    """
+    Streams the user's new alerts and scan status changes as server-sent
+    events, for EventSource clients such as the dashboard. A reconnecting
+    client is first sent what it missed after its Last-Event-ID. Under WSGI
+    the stream is refused with 501 unless EVENT_STREAM_WSGI is set, and
+    EventSource does not retry it.
+    """
+    if not streams_supported(request):
+        return HttpResponse('Live updates need the ASGI server', status=501, content_type='text/plain')
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    # Under ASGI the stream is an async iterator and holds no thread while idle
+    stream = astream_events if isinstance(request, ASGIRequest) else stream_events
+    response = StreamingHttpResponse(stream(request.user.id, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stops nginx from buffering the stream
+    return response
 
 @login_required
 def alert_detail_view(request, alert_id):
@@ -112,10 +219,13 @@ def alert_detail_view(request, alert_id):
 
 @login_required
 def scan_list_view(request):
-    scans = SecurityScan.objects.filter(initiated_by=request.user).order_by('-started_at')
-    return render(request, 'ai_security/scan_list.html', {'scans': scans})
+    scans, next_cursor = paginate_keyset_for_request(
+        request, SecurityScan.objects.filter(initiated_by=request.user), ordering=('-started_at', '-id')
+    )
+    return render(request, 'ai_security/scan_list.html', {'scans': scans, 'next_cursor': next_cursor})
 
 @login_required
+@admit('start_scan')
 def start_scan_view(request):
     if request.method == 'POST':
         scan_type = request.POST.get('scan_type', 'FULL')
@@ -142,6 +252,7 @@ def start_scan_view(request):
     return render(request, 'ai_security/start_scan.html')
 
 @login_required
+@admit('analyze_transaction', methods=('GET',))
 def analyze_transaction_view(request, tx_id=None):
     if tx_id:
         transaction = get_object_or_404(Transaction, id=tx_id)
@@ -166,8 +277,7 @@ def analyze_transaction_view(request, tx_id=None):
         return redirect('transaction_detail', tx_hash=transaction.tx_hash)
     
     # If no transaction ID provided, show a form to select a transaction
-    user_wallets = request.user.wallets.all()
-    transactions = Transaction.objects.filter(from_wallet__in=user_wallets).order_by('-timestamp')[:20]
+    transactions = Transaction.objects.for_user(request.user).order_by('-timestamp', '-id')[:20]
     
     return render(request, 'ai_security/analyze_transaction.html', {'transactions': transactions})
 
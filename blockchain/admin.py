@@ -1,29 +1,81 @@
 from django.contrib import admin
-from .models import Transaction, SmartContract, Token, TokenBalance
+from .models import Transaction, LedgerEntry, SmartContract, Token, TokenBalance, IndexerCheckpoint, ImportCheckpoint
+from .utils.ledger import delete_transactions
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ('tx_hash', 'from_wallet', 'to_address', 'amount', 'transaction_type', 'status', 'timestamp')
+    list_display = ('tx_hash', 'from_wallet', 'from_address', 'to_address', 'amount', 'transaction_type', 'status', 'timestamp')
+    list_select_related = ('from_wallet',)
     search_fields = ('tx_hash', 'from_wallet__address', 'to_address')
     list_filter = ('status', 'transaction_type', 'signature_algorithm')
-    readonly_fields = ('tx_hash', 'signature', 'timestamp')
+    # The ledger entries are posted from these fields when the transaction is stored
+    readonly_fields = ('tx_hash', 'signature', 'timestamp', 'from_wallet', 'amount', 'gas_fee',
+                       'transaction_type', 'status', 'token')
+    
+    # Transactions are stored by the send views, the indexer and the importer
+    def has_add_permission(self, request):
+        return False
+    
+    def get_deleted_objects(self, objs, request):
+        deleted_objects, model_count, perms_needed, protected = super().get_deleted_objects(objs, request)
+        # The entries go with their transaction in delete_transactions, which moves the balances back
+        perms_needed.discard(LedgerEntry._meta.verbose_name)
+        return deleted_objects, model_count, perms_needed, protected
+    
+    def delete_model(self, request, obj):
+        delete_transactions(Transaction.objects.filter(pk=obj.pk))
+    
+    def delete_queryset(self, request, queryset):
+        delete_transactions(queryset)
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('transaction', 'account', 'wallet', 'amount', 'created_at')
+    list_select_related = ('transaction', 'wallet')
+    search_fields = ('transaction__tx_hash', 'wallet__address')
+    list_filter = ('account',)
+    
+    # Entries are only written by postings, which also move the wallet balances
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 @admin.register(SmartContract)
 class SmartContractAdmin(admin.ModelAdmin):
-    list_display = ('name', 'address', 'owner', 'created_at', 'is_quantum_resistant')
+    list_display = ('name', 'address', 'owner', 'status', 'created_at', 'is_quantum_resistant')
+    list_select_related = ('owner',)
     search_fields = ('name', 'address', 'owner__email')
-    list_filter = ('is_quantum_resistant', 'created_at')
-    readonly_fields = ('address', 'creation_tx_hash', 'created_at')
+    list_filter = ('status', 'is_quantum_resistant', 'created_at')
+    readonly_fields = ('address', 'code_hash', 'creation_tx_hash', 'status', 'created_at')
 
 @admin.register(Token)
 class TokenAdmin(admin.ModelAdmin):
     list_display = ('name', 'symbol', 'contract', 'token_type', 'total_supply')
+    list_select_related = ('contract',)
     search_fields = ('name', 'symbol', 'contract__address')
     list_filter = ('token_type',)
 
 @admin.register(TokenBalance)
 class TokenBalanceAdmin(admin.ModelAdmin):
     list_display = ('wallet', 'token', 'balance', 'last_updated')
+    # TokenBalance.__str__ also reads wallet.user
+    list_select_related = ('wallet__user', 'token')
     search_fields = ('wallet__address', 'token__name', 'token__symbol')
     list_filter = ('token__token_type', 'last_updated')
 
+
+@admin.register(IndexerCheckpoint)
+class IndexerCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'block_number', 'block_hash', 'updated_at')
+    readonly_fields = ('updated_at',)
+
+@admin.register(ImportCheckpoint)
+class ImportCheckpointAdmin(admin.ModelAdmin):
+    list_display = ('source', 'rows_processed', 'rows_imported', 'rows_rejected', 'completed', 'updated_at')
+    list_filter = ('completed',)
+    readonly_fields = ('updated_at',)
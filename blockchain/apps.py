@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class BlockchainConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blockchain'
-
+    
+    def ready(self):
+        # Register signal handlers that post ledger entries and invalidate cached responses
+        from . import signals
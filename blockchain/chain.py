@@ -0,0 +1,22 @@
+"""
+Facade for the chain client code, which imports web3 and eth-account.
+Each function imports its implementation in blockchain.utils on its first
+call.
+"""
+
+from quantum_defi.lazy import lazy_function, load_modules
+
+ETHEREUM = 'blockchain.utils.ethereum'
+DEPLOYMENTS = 'blockchain.utils.deployments'
+BATCH = 'blockchain.utils.batch'
+
+MODULES = (ETHEREUM, DEPLOYMENTS, BATCH)
+
+get_web3_instance = lazy_function(ETHEREUM, 'get_web3_instance')
+send_transaction = lazy_function(ETHEREUM, 'send_transaction')
+send_transaction_async = lazy_function(ETHEREUM, 'send_transaction_async')
+submit_deployment = lazy_function(DEPLOYMENTS, 'submit_deployment')
+process_transaction_batch = lazy_function(BATCH, 'process_transaction_batch')
+
+def load():
+    load_modules(MODULES)
@@ -15,6 +15,23 @@ class TransactionForm(forms.ModelForm):
         super(TransactionForm, self).__init__(*args, **kwargs)
         if user:
             self.fields['from_wallet'].queryset = user.wallets.filter(is_active=True)
+        self.fields['transaction_type'].choices = [
+            choice for choice in Transaction.TRANSACTION_TYPES if choice[0] in Transaction.SUBMITTABLE_TYPES
+        ]
+    
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount <= 0:
+            raise forms.ValidationError('Amount must be positive.')
+        if amount >= Transaction.MAX_POSTED_AMOUNT:
+            raise forms.ValidationError(f'Amount must be less than {Transaction.MAX_POSTED_AMOUNT:,}.')
+        return amount
+    
+    def clean_gas_fee(self):
+        gas_fee = self.cleaned_data['gas_fee']
+        if gas_fee < 0:
+            raise forms.ValidationError('Gas fee cannot be negative.')
+        return gas_fee
 
 class SmartContractForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,49 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain.models import ImportCheckpoint
+from blockchain.utils.importer import READERS, import_transactions
+
+class Command(BaseCommand):
+    help = 'Bulk-imports historical transactions from a CSV, Parquet or JSONL file, resuming interrupted imports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='file_format', choices=sorted(READERS), default=None,
+                            help='Source format, detected from the file name by default')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows validated and committed per chunk')
+        parser.add_argument('--rejects', default=None, help='CSV file for rejected rows, defaults to <path>.rejects.csv')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the first row')
+
+    def handle(self, *args, **options):
+        previous = ImportCheckpoint.objects.filter(source=os.path.abspath(options['path'])).first()
+        # Rate over this run only, so a resumed import is not flattered by earlier rows
+        baseline = previous.rows_processed if previous and not options['restart'] else 0
+        started = time.monotonic()
+
+        def report(checkpoint):
+            rate = (checkpoint.rows_processed - baseline) / max(time.monotonic() - started, 1e-9)
+            self.stdout.write(
+                f"{checkpoint.rows_processed} rows processed, {checkpoint.rows_imported} imported, "
+                f"{checkpoint.rows_rejected} rejected ({rate:.0f} rows/s)"
+            )
+
+        try:
+            checkpoint = import_transactions(
+                options['path'],
+                file_format=options['file_format'],
+                chunk_size=options['chunk_size'],
+                rejects_path=options['rejects'],
+                restart=options['restart'],
+                progress=report
+            )
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Import of {checkpoint.source} complete: {checkpoint.rows_imported} imported, "
+            f"{checkpoint.rows_rejected} rejected ({elapsed:.1f}s)"
+        ))
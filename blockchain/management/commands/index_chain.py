@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain.utils.indexer import UnstorableTransfer, follow_chain, backfill_blocks
+
+class Command(BaseCommand):
+    help = 'Indexes incoming transfers to platform wallets from the configured Ethereum node.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backfill', nargs=2, type=int, metavar=('FROM_BLOCK', 'TO_BLOCK'),
+                            help='Index a historical block range and exit instead of following the head')
+        parser.add_argument('--workers', type=int, default=4,
+                            help='Worker processes used for --backfill')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds to wait for new blocks when caught up with the head')
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            start_block, end_block = options['backfill']
+            if start_block > end_block:
+                raise CommandError('FROM_BLOCK must not be greater than TO_BLOCK')
+            try:
+                stored = backfill_blocks(start_block, end_block, workers=options['workers'])
+            except UnstorableTransfer as error:
+                raise CommandError(str(error))
+            self.stdout.write(self.style.SUCCESS(f"Backfilled blocks {start_block}-{end_block}: {stored} transfers"))
+            return
+
+        self.stdout.write('Following chain head, press Ctrl+C to stop')
+        try:
+            follow_chain(poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Indexer stopped')
+        except UnstorableTransfer as error:
+            # The checkpoint stays before the transfer's block, so it is read again on restart
+            raise CommandError(str(error))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchain.utils.ledger import verify_ledger
+
+class Command(BaseCommand):
+    help = 'Checks wallet running balances and postings against the balance ledger. Meant to run periodically.'
+
+    def handle(self, *args, **options):
+        result = verify_ledger()
+        for wallet_id, balance, ledger_balance in result['wallets']:
+            self.stdout.write(f"Wallet {wallet_id}: balance {balance}, ledger {ledger_balance}")
+        for transaction_id, total in result['postings']:
+            self.stdout.write(f"Transaction {transaction_id}: entries sum to {total}")
+
+        if result['wallets'] or result['postings']:
+            raise CommandError(
+                f"{len(result['wallets'])} wallet balances and {len(result['postings'])} postings are inconsistent"
+            )
+        self.stdout.write(self.style.SUCCESS('Ledger is consistent'))
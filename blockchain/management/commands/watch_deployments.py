@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blockchain.utils.deployments import watch_pending_deployments
+
+class Command(BaseCommand):
+    help = 'Fills in the address of pending smart contract deployments once their receipts are mined.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=5,
+                            help='Seconds between checks')
+        parser.add_argument('--once', action='store_true',
+                            help='Check pending deployments once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            resolved = watch_pending_deployments()
+            if resolved:
+                self.stdout.write(f"Resolved {resolved} deployments")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
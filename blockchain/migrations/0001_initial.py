@@ -0,0 +1,227 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IndexerCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(default="default", max_length=50, unique=True),
+                ),
+                ("block_number", models.IntegerField()),
+                ("block_hash", models.CharField(max_length=66)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SmartContract",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                (
+                    "address",
+                    models.CharField(
+                        blank=True, max_length=255, null=True, unique=True
+                    ),
+                ),
+                ("abi", models.JSONField()),
+                ("bytecode", models.TextField()),
+                (
+                    "code_hash",
+                    models.CharField(blank=True, db_index=True, max_length=64),
+                ),
+                ("creation_tx_hash", models.CharField(blank=True, max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("DEPLOYED", "Deployed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("is_quantum_resistant", models.BooleanField(default=True)),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="contracts",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Token",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("symbol", models.CharField(max_length=10)),
+                (
+                    "token_type",
+                    models.CharField(
+                        choices=[
+                            ("ERC20", "ERC20"),
+                            ("ERC721", "ERC721"),
+                            ("ERC1155", "ERC1155"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("decimals", models.IntegerField(default=18)),
+                ("total_supply", models.DecimalField(decimal_places=18, max_digits=36)),
+                (
+                    "contract",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tokens",
+                        to="blockchain.smartcontract",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Transaction",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tx_hash", models.CharField(max_length=255, unique=True)),
+                ("to_address", models.CharField(max_length=255)),
+                ("from_address", models.CharField(blank=True, max_length=255)),
+                ("amount", models.DecimalField(decimal_places=18, max_digits=24)),
+                ("gas_fee", models.DecimalField(decimal_places=18, max_digits=24)),
+                (
+                    "transaction_type",
+                    models.CharField(
+                        choices=[
+                            ("SEND", "Send"),
+                            ("RECEIVE", "Receive"),
+                            ("SWAP", "Swap"),
+                            ("STAKE", "Stake"),
+                            ("UNSTAKE", "Unstake"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("CONFIRMED", "Confirmed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=10,
+                    ),
+                ),
+                ("timestamp", models.DateTimeField(auto_now_add=True)),
+                ("block_number", models.IntegerField(blank=True, null=True)),
+                (
+                    "idempotency_key",
+                    models.CharField(blank=True, max_length=64, null=True, unique=True),
+                ),
+                ("signature", models.TextField()),
+                (
+                    "signature_algorithm",
+                    models.CharField(default="Dilithium", max_length=50),
+                ),
+                (
+                    "from_wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sent_transactions",
+                        to="accounts.wallet",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="TokenBalance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(decimal_places=18, default=0, max_digits=36),
+                ),
+                ("last_updated", models.DateTimeField(auto_now=True)),
+                (
+                    "token",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balances",
+                        to="blockchain.token",
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="token_balances",
+                        to="accounts.wallet",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("wallet", "token")},
+            },
+        ),
+    ]
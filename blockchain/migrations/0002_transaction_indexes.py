@@ -0,0 +1,46 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("blockchain", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["from_wallet", "-timestamp", "-id"],
+                name="tx_wallet_timestamp_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                condition=models.Q(("status", "PENDING")),
+                fields=["status"],
+                name="tx_pending_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(fields=["to_address"], name="tx_to_address_idx"),
+        ),
+        # The composite index above covers from_wallet lookups, so the
+        # single-column FK index is dropped only after it exists
+        migrations.AlterField(
+            model_name="transaction",
+            name="from_wallet",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sent_transactions",
+                to="accounts.wallet",
+            ),
+        ),
+    ]
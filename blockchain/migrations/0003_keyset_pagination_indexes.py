@@ -0,0 +1,20 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blockchain", "0002_transaction_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="smartcontract",
+            index=models.Index(
+                fields=["owner", "-created_at", "-id"],
+                name="contract_owner_created_idx",
+            ),
+        ),
+    ]
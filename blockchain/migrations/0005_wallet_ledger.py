@@ -0,0 +1,109 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def post_opening_balances(apps, schema_editor):
+    """
+    Carries the current wallet balances into the ledger as OPENING entries.
+    Transactions stored so far are taken as already reflected in them.
+    """
+    Wallet = apps.get_model("accounts", "Wallet")
+    LedgerEntry = apps.get_model("blockchain", "LedgerEntry")
+    entries = []
+    for wallet_id, balance in (
+        Wallet.objects.exclude(balance=0).values_list("id", "balance").iterator()
+    ):
+        entries.append(
+            LedgerEntry(account="WALLET", wallet_id=wallet_id, amount=balance)
+        )
+        entries.append(LedgerEntry(account="OPENING", amount=-balance))
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0001_initial"),
+        ("blockchain", "0004_import_checkpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "account",
+                    models.CharField(
+                        choices=[
+                            ("WALLET", "Wallet"),
+                            ("EXTERNAL", "External"),
+                            ("FEES", "Network fees"),
+                            ("OPENING", "Opening balances"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=18, max_digits=24)),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, editable=False
+                    ),
+                ),
+                (
+                    "transaction",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="blockchain.transaction",
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="accounts.wallet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "ledger entries",
+                "indexes": [
+                    models.Index(fields=["wallet", "id"], name="wallet_ledger_idx")
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="ledgerentry",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(("account", "WALLET"), ("wallet__isnull", False)),
+                    models.Q(
+                        models.Q(("account", "WALLET"), _negated=True),
+                        ("wallet__isnull", True),
+                    ),
+                    _connector="OR",
+                ),
+                name="ledger_wallet_account",
+            ),
+        ),
+        migrations.RunPython(post_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.10 on 2026-10-19 18:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+def copy_wallet_owners(apps, schema_editor):
+    """
+    Sets owner on existing transactions from their sending wallet, in one UPDATE.
+    """
+    Transaction = apps.get_model("blockchain", "Transaction")
+    Wallet = apps.get_model("accounts", "Wallet")
+    Transaction.objects.update(
+        owner_id=Subquery(
+            Wallet.objects.filter(id=OuterRef("from_wallet_id")).values("user_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("accounts", "0001_initial"),
+        ("blockchain", "0006_transaction_token"),
+    ]
+
+    operations = [
+        # Added nullable so existing rows can be filled in before the constraint applies
+        migrations.AddField(
+            model_name="transaction",
+            name="owner",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transactions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(copy_wallet_owners, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="transaction",
+            name="owner",
+            field=models.ForeignKey(
+                db_index=False,
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transactions",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=["owner", "-timestamp", "-id"], name="tx_owner_timestamp_idx"
+            ),
+        ),
+    ]
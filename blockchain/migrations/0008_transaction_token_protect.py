@@ -0,0 +1,25 @@
+# Generated by Django 4.2.10 on 2026-10-19 20:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blockchain", "0007_transaction_owner"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="token",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="transfers",
+                to="blockchain.token",
+            ),
+        ),
+    ]
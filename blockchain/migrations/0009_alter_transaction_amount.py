@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-19 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blockchain", "0008_transaction_token_protect"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="transaction",
+            name="amount",
+            field=models.DecimalField(decimal_places=18, max_digits=36),
+        ),
+    ]
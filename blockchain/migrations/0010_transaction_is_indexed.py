@@ -0,0 +1,28 @@
+# Generated by Django 4.2.10 on 2026-10-19 20:55
+
+from django.db import migrations, models
+
+
+def mark_indexed_rows(apps, schema_editor):
+    """
+    Marks the rows the indexer stored so far. It is the only writer that
+    leaves signature_algorithm empty; imported rows default to Dilithium.
+    """
+    Transaction = apps.get_model("blockchain", "Transaction")
+    Transaction.objects.filter(transaction_type="RECEIVE", signature_algorithm="").update(is_indexed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blockchain", "0009_alter_transaction_amount"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="is_indexed",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_indexed_rows, migrations.RunPython.noop),
+    ]
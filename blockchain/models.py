@@ -1,6 +1,18 @@
+from decimal import Decimal
+
 from django.db import models
+from django.utils import timezone
 from accounts.models import User, Wallet
 
+class TransactionQuerySet(models.QuerySet):
+    def for_user(self, user):
+        """
+        Transactions of any of the user's wallets. Filtering on the stored
+        owner lets tx_owner_timestamp_idx return them newest first, without
+        sorting all of the user's rows.
+        """
+        return self.filter(owner=user)
+
 class Transaction(models.Model):
     """
     Represents a blockchain transaction with quantum-resistant signatures.
@@ -13,6 +25,14 @@ class Transaction(models.Model):
         ('UNSTAKE', 'Unstake'),
     )
     
+    # Types a client may submit. RECEIVE and UNSTAKE credit the wallet, so
+    # they are only stored by the chain indexer from confirmed transfers
+    SUBMITTABLE_TYPES = ('SEND', 'SWAP', 'STAKE')
+    
+    # Submitted transactions are posted to the ledger, whose amounts have six
+    # integer digits; only indexed token transfers use the full width of amount
+    MAX_POSTED_AMOUNT = Decimal(10) ** 6
+    
     STATUS_CHOICES = (
         ('PENDING', 'Pending'),
         ('CONFIRMED', 'Confirmed'),
@@ -20,35 +40,138 @@ class Transaction(models.Model):
     )
     
     tx_hash = models.CharField(max_length=255, unique=True)
-    from_wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='sent_transactions')
+    # Indexed through the leading column of tx_wallet_timestamp_idx
+    from_wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='sent_transactions', db_index=False)
+    # Copy of from_wallet.user, set on save and by assign_owners; indexed through tx_owner_timestamp_idx
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions', db_index=False, editable=False)
     to_address = models.CharField(max_length=255)
-    amount = models.DecimalField(max_digits=24, decimal_places=18)
+    from_address = models.CharField(max_length=255, blank=True)  # On-chain sender, set for indexed RECEIVE rows
+    # As wide as TokenBalance.balance, for token transfers
+    amount = models.DecimalField(max_digits=36, decimal_places=18)
     gas_fee = models.DecimalField(max_digits=24, decimal_places=18)
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add so bulk imports can keep historical timestamps
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     block_number = models.IntegerField(null=True, blank=True)
+    # Hash of the canonical transaction encoding and the client's Idempotency-Key
+    idempotency_key = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Set for rows stored by the chain indexer, the only rows a reorg rewinds
+    is_indexed = models.BooleanField(default=False, editable=False)
+    # Set for indexed ERC20 transfers, which move a TokenBalance instead of Wallet.balance.
+    # Protected, as a cascade would drop the transfers without moving the balances back
+    token = models.ForeignKey('Token', on_delete=models.PROTECT, related_name='transfers', null=True, blank=True)
     
     # Quantum-resistant signature fields
     signature = models.TextField()
     signature_algorithm = models.CharField(max_length=50, default="Dilithium")
     
+    objects = TransactionQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # Per-wallet listings ordered newest first, with id as tie-breaker
+            models.Index(fields=['from_wallet', '-timestamp', '-id'], name='tx_wallet_timestamp_idx'),
+            # Per-user listings across all of the user's wallets
+            models.Index(fields=['owner', '-timestamp', '-id'], name='tx_owner_timestamp_idx'),
+            # Only the small set of in-flight transactions is looked up by status
+            models.Index(fields=['status'], name='tx_pending_status_idx', condition=models.Q(status='PENDING')),
+            models.Index(fields=['to_address'], name='tx_to_address_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.tx_hash} - {self.amount} - {self.status}"
+    
+    @classmethod
+    def assign_owners(cls, transactions):
+        """
+        Sets owner from the sending wallet on unsaved transactions, with at
+        most one query. Bulk inserts call this, as they bypass save().
+        """
+        missing = {
+            transaction.from_wallet_id for transaction in transactions
+            if transaction.owner_id is None and not cls._meta.get_field('from_wallet').is_cached(transaction)
+        }
+        owners = dict(Wallet.objects.filter(id__in=missing).values_list('id', 'user_id')) if missing else {}
+        for transaction in transactions:
+            if transaction.owner_id is None:
+                transaction.owner_id = owners.get(transaction.from_wallet_id) or transaction.from_wallet.user_id
+    
+    def save(self, *args, **kwargs):
+        if self.owner_id is None:
+            Transaction.assign_owners([self])
+        super().save(*args, **kwargs)
+    
+    def delete(self, using=None, keep_parents=False):
+        # Goes through the ledger so the balances the transaction moved are moved back
+        from .utils.ledger import delete_transactions
+        deleted = delete_transactions(Transaction.objects.using(using).filter(pk=self.pk))
+        return deleted, {self._meta.label: deleted}
+
+class LedgerEntry(models.Model):
+    """
+    One side of a double-entry posting. The entries of a transaction sum to
+    zero, and Wallet.balance is the running total of the wallet's entries.
+    """
+    ACCOUNTS = (
+        ('WALLET', 'Wallet'),
+        ('EXTERNAL', 'External'),  # Counterparties on chain, outside the ledger
+        ('FEES', 'Network fees'),
+        ('OPENING', 'Opening balances'),
+    )
+
+    # Null for opening balance entries
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='ledger_entries', null=True, blank=True)
+    account = models.CharField(max_length=10, choices=ACCOUNTS)
+    # Set for WALLET entries only; indexed through wallet_ledger_idx
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='ledger_entries', null=True, blank=True, db_index=False)
+    # Positive amounts credit the account, negative amounts debit it
+    amount = models.DecimalField(max_digits=24, decimal_places=18)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        verbose_name_plural = 'ledger entries'
+        indexes = [
+            models.Index(fields=['wallet', 'id'], name='wallet_ledger_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(account='WALLET', wallet__isnull=False) | models.Q(~models.Q(account='WALLET'), wallet__isnull=True),
+                name='ledger_wallet_account'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.account} {self.wallet_id or ''} {self.amount}"
 
 class SmartContract(models.Model):
     """
     Represents a deployed smart contract with quantum-resistant security.
     """
+    STATUS_CHOICES = (
+        ('PENDING', 'Pending'),
+        ('DEPLOYED', 'Deployed'),
+        ('FAILED', 'Failed'),
+    )
+    
     name = models.CharField(max_length=100)
-    address = models.CharField(max_length=255, unique=True)
+    # Filled in by the receipt watcher once the deployment is mined
+    address = models.CharField(max_length=255, unique=True, null=True, blank=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contracts')
     abi = models.JSONField()
     bytecode = models.TextField()
-    creation_tx_hash = models.CharField(max_length=255)
+    # SHA-256 of the ABI and bytecode, used as the key of the parsed contract cache
+    code_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    creation_tx_hash = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     created_at = models.DateTimeField(auto_now_add=True)
     is_quantum_resistant = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-id'], name='contract_owner_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} ({self.address})"
 
@@ -87,3 +210,32 @@ class TokenBalance(models.Model):
     def __str__(self):
         return f"{self.wallet.user.username} - {self.token.symbol}: {self.balance}"
 
+
+class IndexerCheckpoint(models.Model):
+    """
+    Records the last block ingested by the chain indexer.
+    The block hash is kept so a chain reorganization can be detected on restart.
+    """
+    name = models.CharField(max_length=50, unique=True, default='default')
+    block_number = models.IntegerField()
+    block_hash = models.CharField(max_length=66)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} @ {self.block_number}"
+
+class ImportCheckpoint(models.Model):
+    """
+    Records how far a bulk transaction import has got through its source file,
+    so an interrupted import resumes after the last committed chunk.
+    """
+    source = models.CharField(max_length=500, unique=True)
+    fingerprint = models.CharField(max_length=64)  # Size and modification time of the file when the import started
+    rows_processed = models.BigIntegerField(default=0)
+    rows_imported = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.source} @ {self.rows_processed}"
@@ -4,17 +4,42 @@ from .models import Transaction, SmartContract, Token, TokenBalance
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = ['id', 'tx_hash', 'from_wallet', 'to_address', 'amount', 'gas_fee', 
+        fields = ['id', 'tx_hash', 'from_wallet', 'from_address', 'to_address', 'amount', 'gas_fee', 
                   'transaction_type', 'status', 'timestamp', 'block_number', 
-                  'signature_algorithm']
-        read_only_fields = ['tx_hash', 'status', 'timestamp', 'block_number', 'signature']
+                  'signature_algorithm', 'token']
+        read_only_fields = ['tx_hash', 'from_address', 'status', 'timestamp', 'block_number', 'signature', 'token']
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        # Like TransactionForm, only the submitting user's wallets can send
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            fields['from_wallet'].queryset = request.user.wallets.filter(is_active=True)
+        return fields
+    
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Amount must be positive.')
+        if value >= Transaction.MAX_POSTED_AMOUNT:
+            raise serializers.ValidationError(f'Amount must be less than {Transaction.MAX_POSTED_AMOUNT:,}.')
+        return value
+    
+    def validate_gas_fee(self, value):
+        if value < 0:
+            raise serializers.ValidationError('Gas fee cannot be negative.')
+        return value
+    
+    def validate_transaction_type(self, value):
+        if value not in Transaction.SUBMITTABLE_TYPES:
+            raise serializers.ValidationError(f'"{value}" transactions cannot be submitted.')
+        return value
 
 class SmartContractSerializer(serializers.ModelSerializer):
     class Meta:
         model = SmartContract
-        fields = ['id', 'name', 'address', 'abi', 'bytecode', 'creation_tx_hash', 
-                  'created_at', 'is_quantum_resistant']
-        read_only_fields = ['address', 'creation_tx_hash', 'created_at']
+        fields = ['id', 'name', 'address', 'abi', 'bytecode', 'code_hash', 'creation_tx_hash', 
+                  'status', 'created_at', 'is_quantum_resistant']
+        read_only_fields = ['address', 'code_hash', 'creation_tx_hash', 'status', 'created_at']
 
 class TokenSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Token, Transaction
+from .utils.ledger import post_opening_balance, post_transactions
+from accounts.models import Wallet
+from quantum_defi.response_cache import invalidate
+
+def invalidate_wallet_transactions(wallet_ids):
+    """
+    Invalidates cached transaction listings of the owners of the given wallets.
+    Used by bulk inserts, which do not send post_save.
+    """
+    owners = Wallet.objects.filter(id__in=set(wallet_ids)).values_list('user_id', flat=True).distinct()
+    for user_id in owners:
+        invalidate('transactions', user_id)
+
+@receiver([post_save, post_delete], sender=Transaction)
+def invalidate_transaction_responses(sender, instance, **kwargs):
+    invalidate('transactions', instance.owner_id)
+
+@receiver([post_save, post_delete], sender=Token)
+def invalidate_token_responses(sender, instance, **kwargs):
+    invalidate('tokens')
+
+@receiver(post_save, sender=Transaction)
+def post_transaction_entries(sender, instance, created, raw=False, **kwargs):
+    # Bulk inserts do not send post_save and post through the ledger themselves
+    if created and not raw:
+        post_transactions([instance])
+
+@receiver(post_save, sender=Wallet)
+def post_wallet_opening_balance(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        post_opening_balance(instance)
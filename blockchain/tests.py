@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User, Wallet
+from blockchain.models import Transaction, SmartContract, Token, TokenBalance
+from blockchain.utils import contracts
+from blockchain.utils.deployments import watch_pending_deployments
+from blockchain.views import TransactionViewSet, SmartContractViewSet, TokenViewSet, TokenBalanceViewSet
+from quantum_defi.query_budget import assert_view_within_budget
+
+try:
+    from eth_tester import EthereumTester
+    from web3 import Web3, EthereumTesterProvider
+except ImportError:
+    EthereumTester = None
+
+# Init code that deploys a one-byte runtime (STOP)
+STOP_CONTRACT_BYTECODE = '0x6001600c60003960016000f300'
+
+def create_wallet(user, address, balance=Decimal('100')):
+    return Wallet.objects.create(user=user, address=address, public_key_hash=address[2:], balance=balance)
+
+def create_transaction(wallet, tx_hash, amount=Decimal('1')):
+    return Transaction.objects.create(
+        tx_hash=tx_hash, from_wallet=wallet, to_address='0x' + 'cc' * 20,
+        amount=amount, gas_fee=Decimal('0.01'), transaction_type='SEND', signature='signature',
+    )
+
+class TransactionListingPlanTests(TestCase):
+    """
+    The per-user listing must read tx_owner_timestamp_idx in order rather
+    than sort the user's transactions.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', email='alice@example.com', password='password')
+        other = User.objects.create_user(username='bob', email='bob@example.com', password='password')
+        wallets = [
+            create_wallet(cls.user, '0x' + '11' * 20),
+            create_wallet(cls.user, '0x' + '12' * 20),
+            create_wallet(other, '0x' + '21' * 20),
+        ]
+        for index in range(30):
+            create_transaction(wallets[index % 3], f'0xplan{index}')
+
+    def test_user_listing_reads_owner_index_in_order(self):
+        if connection.vendor == 'postgresql':
+            # The test table is small enough for a sequential scan to look cheaper
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            sort_marker = 'Sort'
+        elif connection.vendor == 'sqlite':
+            sort_marker = 'TEMP B-TREE'
+        else:
+            self.skipTest(f'No expected plan for {connection.vendor}')
+
+        plan = Transaction.objects.for_user(self.user).order_by('-timestamp', '-id')[:20].explain()
+        self.assertIn('tx_owner_timestamp_idx', plan)
+        self.assertNotIn(sort_marker, plan)
+
+    def test_user_listing_returns_only_own_transactions(self):
+        listed = list(Transaction.objects.for_user(self.user).order_by('-timestamp', '-id'))
+        self.assertEqual(len(listed), 20)
+        self.assertTrue(all(transaction.owner_id == self.user.id for transaction in listed))
+
+class ViewSetQueryBudgetTests(TestCase):
+    """
+    List and retrieve must stay within each ViewSet's query_budget however
+    many rows they return.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', email='alice@example.com', password='password')
+        wallet = create_wallet(cls.user, '0x' + '11' * 20)
+        cls.transactions = [create_transaction(wallet, f'0xbudget{index}') for index in range(5)]
+        cls.contracts = [
+            SmartContract.objects.create(
+                name=f'Contract {index}', owner=cls.user, abi=[], bytecode='0x00',
+                address='0x' + f'{index:02x}' * 20, status='DEPLOYED',
+            )
+            for index in range(5)
+        ]
+        cls.tokens = [
+            Token.objects.create(
+                name=f'Token {index}', symbol=f'TK{index}', contract=contract,
+                token_type='ERC20', decimals=18, total_supply=Decimal('1000000'),
+            )
+            for index, contract in enumerate(cls.contracts)
+        ]
+        cls.balances = [TokenBalance.objects.create(wallet=wallet, token=token, balance=Decimal('5')) for token in cls.tokens]
+
+    def setUp(self):
+        # Cached list pages would run no queries at all
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def assert_list_and_retrieve(self, viewset_class, obj):
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        response = assert_view_within_budget(viewset_class, request, 'list')
+        self.assertEqual(response.status_code, 200)
+
+        request = self.factory.get('/')
+        force_authenticate(request, user=self.user)
+        response = assert_view_within_budget(viewset_class, request, 'retrieve', pk=obj.pk)
+        self.assertEqual(response.status_code, 200)
+
+    def test_transactions(self):
+        self.assert_list_and_retrieve(TransactionViewSet, self.transactions[0])
+
+    def test_smart_contracts(self):
+        self.assert_list_and_retrieve(SmartContractViewSet, self.contracts[0])
+
+    def test_tokens(self):
+        self.assert_list_and_retrieve(TokenViewSet, self.tokens[0])
+
+    def test_token_balances(self):
+        self.assert_list_and_retrieve(TokenBalanceViewSet, self.balances[0])
+
+@skipIf(EthereumTester is None, 'eth-tester is not installed')
+class DevChainDeploymentTests(TestCase):
+    """
+    Deployments and the contract factory cache against an in-process
+    eth-tester chain, which mines every transaction as it is sent.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='alice', email='alice@example.com', password='password')
+
+    def setUp(self):
+        web3 = Web3(EthereumTesterProvider(EthereumTester()))
+        for name, value in (('_web3', web3), ('_contract_cache', OrderedDict())):
+            patcher = mock.patch.object(contracts, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_contract(self, name, abi=None):
+        return SmartContract.objects.create(name=name, owner=self.user, abi=abi or [], bytecode=STOP_CONTRACT_BYTECODE)
+
+    def test_unsent_deployment_is_submitted_again(self):
+        contract = self.create_contract('Lost')
+        # Older than DEPLOY_REQUEUE_AFTER, as if its worker exited before sending it
+        SmartContract.objects.filter(id=contract.id).update(created_at=timezone.now() - timedelta(hours=1))
+        recent = self.create_contract('Queued')
+
+        # The dev chain mines on send, so the same pass finds the receipt
+        with self.assertLogs('blockchain.utils.deployments', 'WARNING'):
+            self.assertEqual(watch_pending_deployments(), 1)
+        contract.refresh_from_db()
+        self.assertEqual(contract.status, 'DEPLOYED')
+        self.assertTrue(contracts.get_shared_web3().eth.get_code(contract.address))
+
+        # Its worker may still be sending it
+        recent.refresh_from_db()
+        self.assertEqual((recent.status, recent.creation_tx_hash), ('PENDING', ''))
+
+    def test_contract_cache_keeps_most_recently_used(self):
+        blockchain_settings = {**settings.BLOCKCHAIN_SETTINGS, 'CONTRACT_CACHE_SIZE': 2}
+        abis = [[{'type': 'event', 'name': f'Event{index}', 'inputs': [], 'anonymous': False}] for index in range(3)]
+        with override_settings(BLOCKCHAIN_SETTINGS=blockchain_settings):
+            first = contracts.get_contract_factory(abis[0], STOP_CONTRACT_BYTECODE)
+            contracts.get_contract_factory(abis[1], STOP_CONTRACT_BYTECODE)
+            self.assertIs(contracts.get_contract_factory(abis[0], STOP_CONTRACT_BYTECODE), first)
+            contracts.get_contract_factory(abis[2], STOP_CONTRACT_BYTECODE)
+
+        self.assertEqual(len(contracts._contract_cache), 2)
+        self.assertIn(contracts.contract_code_hash(abis[0], STOP_CONTRACT_BYTECODE), contracts._contract_cache)
+        self.assertNotIn(contracts.contract_code_hash(abis[1], STOP_CONTRACT_BYTECODE), contracts._contract_cache)
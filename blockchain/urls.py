@@ -7,5 +7,6 @@ urlpatterns = [
     path('transactions/create/', views.create_transaction_view, name='create_transaction'),
     path('smart-contracts/', views.smart_contract_list_view, name='smart_contract_list'),
     path('smart-contracts/deploy/', views.deploy_smart_contract_view, name='deploy_smart_contract'),
+    path('async/transactions/submit/', views.submit_transaction_async_view, name='submit_transaction_async'),
 ]
 
@@ -0,0 +1,208 @@
+"""
+Pipelined processing for multi-transaction submissions.
+
+A batch is scored with one model call, signed in parallel, sent with nonces
+allocated locally per wallet, and persisted with a single bulk insert that
+is posted to the wallet balance ledger in the same database transaction.
+An item that fails to sign or send is reported on its own; the items the
+node accepted are still stored.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+
+from blockchain.models import Transaction
+from .ethereum import get_web3_instance, send_transaction
+from .ledger import post_transactions
+from quantum_crypto.utils.key_management import sign_transaction_quantum
+from ai_security.ml_models.anomaly_detection import check_transactions_anomaly
+from ai_security.utils.velocity import record_transactions
+from quantum_defi.response_cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+ANOMALY_REJECT_CONFIDENCE = 0.8
+
+def allocate_nonces(web3, items):
+    """
+    Allocates consecutive nonces per sending wallet, starting at the
+    node's pending transaction count.
+
+    Args:
+        web3: Web3 instance
+        items: List of validated transaction dictionaries
+
+    Returns:
+        List of nonces in input order
+    """
+    next_nonce = {}
+    nonces = []
+    for item in items:
+        address = item['from_wallet'].address
+        if address not in next_nonce:
+            next_nonce[address] = web3.eth.get_transaction_count(address, 'pending')
+        nonces.append(next_nonce[address])
+        next_nonce[address] += 1
+    return nonces
+
+def process_transaction_batch(items, idempotency_keys=None):
+    """
+    Scores, signs, sends and stores a batch of validated transactions.
+
+    Args:
+        items: List of validated transaction dictionaries whose from_wallet
+            has already been checked against the requesting user
+        idempotency_keys: Optional list of idempotency keys, one per item
+
+    Returns:
+        List in input order holding either a saved Transaction or a
+        dictionary describing why the item was rejected. An item stored
+        first, by a concurrent retry with the same idempotency key or under
+        the same transaction hash, is a dictionary holding that Transaction
+        under 'duplicate'.
+    """
+    results = [None] * len(items)
+    idempotency_keys = idempotency_keys or [None] * len(items)
+
+    # Anomaly scoring for the whole batch in one model call
+    scores = check_transactions_anomaly(items)
+    accepted = []
+    for index, (is_anomaly, confidence) in enumerate(scores):
+        if is_anomaly and confidence > ANOMALY_REJECT_CONFIDENCE:
+            results[index] = {
+                'error': 'Potential security risk detected',
+                'details': 'This transaction has been flagged as anomalous',
+                'confidence': confidence
+            }
+        else:
+            accepted.append(index)
+
+    if not accepted:
+        return results
+
+    workers = settings.BLOCKCHAIN_SETTINGS.get('BATCH_WORKERS', 8)
+    web3 = get_web3_instance()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        signing = {
+            index: executor.submit(sign_transaction_quantum, items[index], items[index]['from_wallet'])
+            for index in accepted
+        }
+        signatures = {}
+        for index, future in signing.items():
+            try:
+                signatures[index] = future.result()
+            except Exception:
+                logger.exception("Signing batch item %s failed", index)
+                results[index] = {'error': 'Signing failed', 'details': 'The transaction could not be signed'}
+        signed = [index for index in accepted if index in signatures]
+
+        # Nonces are assigned up front so sends do not wait on each other
+        nonces = allocate_nonces(web3, [items[index] for index in signed])
+        sending = {
+            index: executor.submit(send_transaction, items[index], signatures[index], nonce, web3=web3)
+            for index, nonce in zip(signed, nonces)
+        }
+        tx_hashes = {}
+        for index, future in sending.items():
+            try:
+                tx_hashes[index] = future.result()
+            except Exception:
+                logger.exception("Sending batch item %s failed", index)
+                results[index] = {'error': 'Sending failed', 'details': 'The node did not accept the transaction'}
+
+    # Everything the node accepted is stored, whatever happened to the other items
+    sent = {
+        index: Transaction(**{
+            **items[index],
+            'tx_hash': tx_hashes[index],
+            'signature': signatures[index]['signature'],
+            'signature_algorithm': signatures[index]['algorithm'],
+            'idempotency_key': idempotency_keys[index],
+        })
+        for index in signed if index in tx_hashes
+    }
+    stored, conflicts, failed = _store_sent(sent)
+    for index, transaction in stored.items():
+        results[index] = transaction
+    for index, existing in conflicts.items():
+        results[index] = {'duplicate': existing}
+    for index in failed:
+        results[index] = {'error': 'Storing failed', 'details': 'The transaction was sent but could not be recorded'}
+
+    return results
+
+def _stored_conflicts(sent):
+    # Rows already stored with an item's idempotency key or transaction hash
+    keys = [transaction.idempotency_key for transaction in sent.values() if transaction.idempotency_key]
+    by_key = Transaction.objects.in_bulk(keys, field_name='idempotency_key') if keys else {}
+    by_hash = Transaction.objects.in_bulk([transaction.tx_hash for transaction in sent.values()], field_name='tx_hash')
+    conflicts = {}
+    for index, transaction in sent.items():
+        existing = by_key.get(transaction.idempotency_key) or by_hash.get(transaction.tx_hash)
+        # Another wallet's row is never returned; its item fails to store instead
+        if existing is not None and existing.from_wallet_id == transaction.from_wallet_id:
+            conflicts[index] = existing
+    return conflicts
+
+def _insert(transactions):
+    try:
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(transactions)
+            post_transactions(transactions)
+            record_transactions(transactions)
+    except IntegrityError:
+        for transaction in transactions:
+            transaction.pk = None
+            transaction._state.adding = True
+        raise
+
+def _store_sent(sent, attempts=3):
+    """
+    Inserts sent transactions, posts them to the ledger and records their
+    velocity in one database transaction. An item whose idempotency key or
+    transaction hash is already stored, e.g. by a concurrent retry, is not
+    inserted; like create_transaction, it is answered with the stored row.
+    If inserts keep conflicting, the items are stored one by one, so the
+    others are still recorded.
+
+    Args:
+        sent: Dictionary of batch index to unsaved Transaction
+
+    Returns:
+        Tuple of (dictionary of index to inserted Transaction, dictionary
+        of index to the Transaction already stored, set of indexes that
+        could not be stored)
+    """
+    conflicts = {}
+    failed = set()
+    for attempt in range(attempts):
+        for index, existing in _stored_conflicts(sent).items():
+            conflicts[index] = existing
+            del sent[index]
+        transactions = list(sent.values())
+        Transaction.assign_owners(transactions)
+        try:
+            _insert(transactions)
+            break
+        except IntegrityError:
+            if attempt < attempts - 1:
+                continue
+            for index, transaction in list(sent.items()):
+                try:
+                    _insert([transaction])
+                except IntegrityError:
+                    del sent[index]
+                    existing = _stored_conflicts({index: transaction}).get(index)
+                    if existing is not None:
+                        conflicts[index] = existing
+                    else:
+                        logger.exception("Storing sent batch item %s failed", index)
+                        failed.add(index)
+
+    for user_id in {transaction.owner_id for transaction in sent.values()}:
+        invalidate('transactions', user_id)
+    return sent, conflicts, failed
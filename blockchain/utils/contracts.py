@@ -0,0 +1,83 @@
+"""
+Process-wide cache of parsed contract ABIs and Web3 contract factories.
+
+Building a contract factory parses the ABI and prepares every function
+and event wrapper, so factories are kept by the content hash of their ABI
+and bytecode and shared between interactions with the same contract. At
+most CONTRACT_CACHE_SIZE factories are kept, least recently used dropped
+first.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+_web3 = None
+_contract_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def parse_abi(abi):
+    """
+    Returns the ABI as a list, decoding it if it was given as a JSON string.
+    """
+    if isinstance(abi, str):
+        return json.loads(abi)
+    return abi
+
+def contract_code_hash(abi, bytecode):
+    """
+    Computes the content hash used as the contract cache key.
+
+    Args:
+        abi: Contract ABI as a list or JSON string
+        bytecode: Contract bytecode as a hex string
+
+    Returns:
+        SHA-256 hex digest
+    """
+    canonical_abi = json.dumps(parse_abi(abi), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f"{canonical_abi}:{bytecode or ''}".encode()).hexdigest()
+
+def get_shared_web3():
+    """
+    Returns the Web3 instance the cached contract factories are bound to.
+    """
+    global _web3
+    if _web3 is None:
+        from .ethereum import get_web3_instance
+        _web3 = get_web3_instance()
+    return _web3
+
+def get_contract_factory(abi, bytecode=None, code_hash=None):
+    """
+    Returns a cached Web3 contract factory for the given ABI and bytecode.
+
+    Args:
+        abi: Contract ABI as a list or JSON string
+        bytecode: Contract bytecode, needed for deployment only
+        code_hash: Precomputed contract_code_hash, skips hashing when given
+
+    Returns:
+        Web3 contract factory
+    """
+    code_hash = code_hash or contract_code_hash(abi, bytecode)
+    with _cache_lock:
+        factory = _contract_cache.get(code_hash)
+        if factory is not None:
+            _contract_cache.move_to_end(code_hash)
+            return factory
+
+    kwargs = {'abi': parse_abi(abi)}
+    if bytecode:
+        kwargs['bytecode'] = bytecode
+    factory = get_shared_web3().eth.contract(**kwargs)
+    with _cache_lock:
+        # A factory built concurrently for the same hash is equivalent
+        _contract_cache[code_hash] = factory
+        _contract_cache.move_to_end(code_hash)
+        while len(_contract_cache) > settings.BLOCKCHAIN_SETTINGS.get('CONTRACT_CACHE_SIZE', 256):
+            _contract_cache.popitem(last=False)
+    return factory
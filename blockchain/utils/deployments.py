@@ -0,0 +1,145 @@
+"""
+Asynchronous smart contract deployment.
+
+A deployment is recorded as a PENDING SmartContract and handed to a small
+thread pool, which submits the transaction and waits for its receipt, so
+the request that created it returns immediately. Deployments whose
+receipt did not arrive in time (or whose worker process exited) are
+picked up by watch_pending_deployments. It also submits deployments left
+without a transaction hash for DEPLOY_REQUEUE_AFTER seconds, whose worker
+exited before sending them.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from blockchain.models import SmartContract
+from .contracts import contract_code_hash, get_shared_web3
+from .ethereum import deploy_contract
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.BLOCKCHAIN_SETTINGS.get('DEPLOY_WORKERS', 4),
+                    thread_name_prefix='contract-deploy'
+                )
+    return _executor
+
+def submit_deployment(contract):
+    """
+    Queues a saved, PENDING SmartContract for deployment and returns immediately.
+
+    Args:
+        contract: SmartContract object
+    """
+    if not contract.code_hash:
+        contract.code_hash = contract_code_hash(contract.abi, contract.bytecode)
+        contract.save(update_fields=['code_hash'])
+    _get_executor().submit(_deploy_and_wait, contract.id)
+
+def apply_receipt(contract, receipt):
+    """
+    Records the outcome of a mined deployment transaction.
+
+    Args:
+        contract: SmartContract object
+        receipt: Transaction receipt returned by the node
+    """
+    if receipt['status'] == 1 and receipt.get('contractAddress'):
+        contract.address = receipt['contractAddress']
+        contract.status = 'DEPLOYED'
+    else:
+        contract.status = 'FAILED'
+    contract.save(update_fields=['address', 'status'])
+
+def _send_deployment(contract):
+    """
+    Submits a deployment and records its transaction hash.
+
+    Returns:
+        Transaction hash, or None if the deployment failed
+    """
+    try:
+        result = deploy_contract({
+            'abi': contract.abi,
+            'bytecode': contract.bytecode,
+            'code_hash': contract.code_hash
+        })
+    except Exception:
+        logger.exception("Deployment of contract %s failed", contract.id)
+        contract.status = 'FAILED'
+        contract.save(update_fields=['status'])
+        return None
+
+    contract.creation_tx_hash = result['tx_hash']
+    contract.save(update_fields=['creation_tx_hash'])
+    return result['tx_hash']
+
+def _deploy_and_wait(contract_id):
+    close_old_connections()
+    try:
+        contract = SmartContract.objects.get(id=contract_id)
+        tx_hash = _send_deployment(contract)
+        if tx_hash is None:
+            return
+
+        try:
+            receipt = get_shared_web3().eth.wait_for_transaction_receipt(
+                tx_hash,
+                timeout=settings.BLOCKCHAIN_SETTINGS.get('DEPLOY_RECEIPT_TIMEOUT', 120),
+                poll_latency=1
+            )
+        except TimeExhausted:
+            # Left PENDING for watch_pending_deployments
+            logger.warning("No receipt yet for deployment %s", tx_hash)
+            return
+        apply_receipt(contract, receipt)
+    finally:
+        close_old_connections()
+
+def watch_pending_deployments():
+    """
+    Submits pending deployments that were never sent, then checks every
+    submitted, still pending deployment for a receipt.
+
+    Returns:
+        Number of deployments resolved
+    """
+    web3 = get_shared_web3()
+    resolved = 0
+    pending = SmartContract.objects.filter(status='PENDING')
+
+    # Deploy threads record the hash right after sending, so an old row
+    # without one was lost with its worker process
+    cutoff = timezone.now() - timedelta(seconds=settings.BLOCKCHAIN_SETTINGS.get('DEPLOY_REQUEUE_AFTER', 300))
+    for contract in pending.filter(creation_tx_hash='', created_at__lt=cutoff):
+        logger.warning("Submitting deployment %s again, it has no transaction hash", contract.id)
+        if not contract.code_hash:
+            contract.code_hash = contract_code_hash(contract.abi, contract.bytecode)
+            contract.save(update_fields=['code_hash'])
+        if _send_deployment(contract) is None:
+            resolved += 1
+
+    for contract in pending.exclude(creation_tx_hash='').only('id', 'creation_tx_hash', 'address', 'status'):
+        try:
+            receipt = web3.eth.get_transaction_receipt(contract.creation_tx_hash)
+        except TransactionNotFound:
+            continue
+        apply_receipt(contract, receipt)
+        resolved += 1
+    return resolved
@@ -1,7 +1,16 @@
 import json
-from web3 import Web3
+from web3 import AsyncWeb3, Web3
 from django.conf import settings
 
+from .contracts import get_contract_factory
+from .gas_oracle import get_gas_oracle, intrinsic_gas
+from quantum_defi.instrumentation import timed
+
+_async_web3 = None
+
+# Standard ERC20 ABI for balanceOf function
+ERC20_BALANCE_ABI = json.loads('[{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"}]')
+
 def get_web3_instance():
     """
     Returns a Web3 instance connected to the Ethereum node.
@@ -9,67 +18,114 @@ def get_web3_instance():
     provider_url = settings.BLOCKCHAIN_SETTINGS['ETHEREUM_NODE_URL']
     return Web3(Web3.HTTPProvider(provider_url))
 
-def send_transaction(transaction_data, signature):
+def get_async_web3_instance():
+    """
+    Returns the process's AsyncWeb3 instance, whose provider keeps an aiohttp
+    session per event loop.
+    """
+    global _async_web3
+    if _async_web3 is None:
+        provider_url = settings.BLOCKCHAIN_SETTINGS['ETHEREUM_NODE_URL']
+        _async_web3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(provider_url))
+    return _async_web3
+
+@timed('send')
+def send_transaction(transaction_data, signature, nonce=None, web3=None):
     """
     Sends a transaction to the Ethereum blockchain with quantum-resistant signature.
     
     Args:
         transaction_data: Dictionary containing transaction details
         signature: Dictionary containing quantum signature details
+        nonce: Pre-allocated nonce; fetched from the node when omitted
+        web3: Web3 instance to reuse; a new one is created when omitted
     
     Returns:
         tx_hash: Transaction hash
     """
-    web3 = get_web3_instance()
+    web3 = web3 or get_web3_instance()
+    if nonce is None:
+        nonce = web3.eth.get_transaction_count(transaction_data['from_wallet'].address)
+    
+    return _submit(transaction_data, signature, nonce, web3)
+
+async def send_transaction_async(transaction_data, signature):
+    """
+    Sends a transaction like send_transaction, awaiting the node instead of
+    blocking the event loop.
+    
+    Args:
+        transaction_data: Dictionary containing transaction details
+        signature: Dictionary containing quantum signature details
+    
+    Returns:
+        tx_hash: Transaction hash
+    """
+    web3 = get_async_web3_instance()
+    with timed('send'):
+        nonce = await web3.eth.get_transaction_count(transaction_data['from_wallet'].address)
+        return _submit(transaction_data, signature, nonce, web3)
+
+def _submit(transaction_data, signature, nonce, web3):
+    # Only web3's conversion helpers are used here, so web3 may be a Web3 or an AsyncWeb3
+    
+    # Include quantum signature in the data field
+    data = f"QR-SIG:{signature['algorithm']}:{signature['signature'][:64]}...".encode()
     
     # Prepare transaction
     tx = {
         'from': transaction_data['from_wallet'].address,
         'to': transaction_data['to_address'],
         'value': web3.to_wei(float(transaction_data['amount']), 'ether'),
-        'gas': 21000,  # Standard gas limit for ETH transfers
-        'gasPrice': web3.to_wei(float(transaction_data['gas_fee']), 'gwei'),
-        'nonce': web3.eth.get_transaction_count(transaction_data['from_wallet'].address),
+        'gas': intrinsic_gas(data),  # Transfer base cost plus the calldata carrying the signature
+        'nonce': nonce,
         'chainId': settings.BLOCKCHAIN_SETTINGS['CHAIN_ID'],
-        # Include quantum signature in the data field
-        'data': web3.to_hex(text=f"QR-SIG:{signature['algorithm']}:{signature['signature'][:64]}...")
+        'data': web3.to_hex(data)
     }
     
+    # EIP-1559 fees come from the oracle's cache; the user-entered fee is only
+    # used as a legacy gas price until the first fee history sample arrives
+    fee_suggestion = get_gas_oracle().suggest()
+    if fee_suggestion:
+        tx.update(fee_suggestion)
+    else:
+        tx['gasPrice'] = web3.to_wei(float(transaction_data['gas_fee']), 'gwei')
+    
     # In a real implementation, you would use the quantum signature
     # Here we're simulating with a standard Ethereum transaction
     # This is a placeholder for demonstration purposes
     
     # For demo purposes, we're returning a simulated tx_hash
     # In production, you would actually send the transaction and get a real tx_hash
-    simulated_tx_hash = web3.keccak(text=f"{transaction_data['from_wallet'].address}:{transaction_data['to_address']}:{transaction_data['amount']}:{transaction_data['gas_fee']}:{signature['signature'][:10]}").hex()
+    simulated_tx_hash = web3.keccak(text=f"{transaction_data['from_wallet'].address}:{nonce}:{transaction_data['to_address']}:{transaction_data['amount']}:{transaction_data['gas_fee']}:{signature['signature'][:10]}").hex()
     
     return simulated_tx_hash
 
 def deploy_contract(contract_data):
     """
-    Deploys a smart contract to the Ethereum blockchain.
+    Submits a smart contract deployment to the Ethereum blockchain.
+    Returns as soon as the node accepts the transaction; the contract
+    address is read from the receipt later (see utils.deployments).
     
     Args:
         contract_data: Dictionary containing contract details
     
     Returns:
-        Dictionary with contract address and transaction hash
+        Dictionary with the deployment transaction hash
     """
-    web3 = get_web3_instance()
-    
-    # In a real implementation, you would:
-    # 1. Compile the contract or use the provided bytecode
-    # 2. Create a contract instance
-    # 3. Deploy it to the blockchain
-    # 4. Return the contract address and transaction hash
+    factory = get_contract_factory(
+        contract_data['abi'],
+        contract_data['bytecode'],
+        contract_data.get('code_hash') or None
+    )
+    web3 = factory.w3
     
-    # For demo purposes, we're simulating deployment
-    simulated_address = f"0x{web3.keccak(text=contract_data['name']).hex()[-40:]}"
-    simulated_tx_hash = web3.keccak(text=f"deploy:{contract_data['name']}:{simulated_address}").hex()
+    # Local dev chains (Ganache, Hardhat, Anvil) expose unlocked accounts to deploy from
+    deployer = settings.BLOCKCHAIN_SETTINGS.get('DEPLOYER_ADDRESS') or web3.eth.accounts[0]
+    tx_hash = factory.constructor(*contract_data.get('constructor_args', [])).transact({'from': deployer})
     
     return {
-        'address': simulated_address,
-        'tx_hash': simulated_tx_hash
+        'tx_hash': tx_hash.hex()
     }
 
 def get_token_balance(wallet_address, token_contract_address):
@@ -83,13 +139,9 @@ def get_token_balance(wallet_address, token_contract_address):
     Returns:
         Token balance
     """
-    web3 = get_web3_instance()
-    
-    # Standard ERC20 ABI for balanceOf function
-    abi = json.loads('[{"constant":true,"inputs":[{"name":"_owner","type":"address"}],"name":"balanceOf","outputs":[{"name":"balance","type":"uint256"}],"payable":false,"stateMutability":"view","type":"function"}]')
-    
-    # Create contract instance
-    contract = web3.eth.contract(address=token_contract_address, abi=abi)
+    # Built once per process and shared by every token
+    factory = get_contract_factory(ERC20_BALANCE_ABI)
+    contract = factory(address=factory.w3.to_checksum_address(token_contract_address))
     
     # Call balanceOf function
     balance = contract.functions.balanceOf(wallet_address).call()
@@ -0,0 +1,133 @@
+"""
+Gas price oracle backed by a rolling window of eth_feeHistory samples.
+
+A background thread samples the node on a schedule and precomputes
+EIP-1559 fee suggestions, so sending a transaction reads the suggestion
+from memory instead of making an RPC call.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+TX_BASE_GAS = 21000
+TX_DATA_ZERO_GAS = 4
+TX_DATA_NONZERO_GAS = 16
+
+_oracle = None
+_oracle_lock = threading.Lock()
+
+def intrinsic_gas(data=b''):
+    """
+    Computes the gas used by a plain transfer carrying the given calldata.
+
+    Args:
+        data: Calldata as bytes
+
+    Returns:
+        Gas limit
+    """
+    zero_bytes = data.count(0)
+    return TX_BASE_GAS + zero_bytes * TX_DATA_ZERO_GAS + (len(data) - zero_bytes) * TX_DATA_NONZERO_GAS
+
+class GasOracle:
+    """
+    Serves percentile-based EIP-1559 fee suggestions from cached fee history.
+    """
+
+    def __init__(self, web3, window=None, percentiles=None, interval=None):
+        blockchain_settings = settings.BLOCKCHAIN_SETTINGS
+        self.web3 = web3
+        self.window = window or blockchain_settings.get('GAS_ORACLE_WINDOW', 20)
+        self.percentiles = percentiles or blockchain_settings.get(
+            'GAS_ORACLE_PERCENTILES', {'slow': 10, 'standard': 50, 'fast': 90}
+        )
+        self.interval = interval or blockchain_settings.get('GAS_ORACLE_INTERVAL', 12)
+
+        # Each sample is (block_number, base_fee, rewards in self.percentiles order)
+        self._samples = deque(maxlen=self.window)
+        self._last_block = None
+        self._suggestions = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Fetches fee history for blocks mined since the last refresh and
+        recomputes the suggestions.
+        """
+        head = self.web3.eth.block_number
+        if self._last_block is not None and head <= self._last_block:
+            return
+
+        block_count = self.window if self._last_block is None else min(head - self._last_block, self.window)
+        history = self.web3.eth.fee_history(block_count, head, list(self.percentiles.values()))
+
+        oldest_block = history['oldestBlock']
+        for offset, rewards in enumerate(history['reward']):
+            self._samples.append((oldest_block + offset, history['baseFeePerGas'][offset], tuple(rewards)))
+        self._last_block = head
+
+        # baseFeePerGas has one extra entry: the base fee of the next block
+        next_base_fee = history['baseFeePerGas'][-1]
+        suggestions = {}
+        for column, speed in enumerate(self.percentiles):
+            rewards = sorted(sample[2][column] for sample in self._samples)
+            priority_fee = rewards[len(rewards) // 2]
+            suggestions[speed] = {
+                # Doubling the base fee keeps the transaction valid through several full blocks
+                'maxFeePerGas': 2 * next_base_fee + priority_fee,
+                'maxPriorityFeePerGas': priority_fee,
+            }
+
+        # Swapped in one assignment so readers never see a partial update
+        self._suggestions = suggestions
+
+    def suggest(self, speed='standard'):
+        """
+        Returns the cached fee suggestion without contacting the node.
+
+        Args:
+            speed: One of the configured percentile names
+
+        Returns:
+            Dictionary with maxFeePerGas and maxPriorityFeePerGas in wei,
+            or None if no fee history has been sampled yet
+        """
+        return self._suggestions.get(speed)
+
+    def start(self):
+        """
+        Starts the sampling thread if it is not already running in this process.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='gas-oracle', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Gas oracle refresh failed")
+            time.sleep(self.interval)
+
+def get_gas_oracle():
+    """
+    Returns the process-wide gas oracle, starting its sampler on first use.
+    """
+    global _oracle
+    if _oracle is None:
+        with _oracle_lock:
+            if _oracle is None:
+                from .ethereum import get_web3_instance
+                _oracle = GasOracle(get_web3_instance())
+    _oracle.start()
+    return _oracle
@@ -0,0 +1,318 @@
+"""
+Bulk import of historical transactions from CSV, Parquet or JSONL files.
+
+The source is read in chunks and each chunk is validated with vectorized
+pandas checks (address format, decimal precision, choices and types).
+Rows are bound to wallets through an address -> id dictionary built once
+per import, inserted with COPY on PostgreSQL or bulk_create elsewhere, and
+posted to the wallet balance ledger in the same database transaction.
+After each chunk commits, an ImportCheckpoint records how many source rows
+are done. An interrupted import then resumes at the next chunk, and
+tx_hash conflicts make re-inserted rows harmless.
+
+Source columns: tx_hash, from_wallet_address (or from_wallet_id, as written
+by the export), to_address, amount, gas_fee, transaction_type and,
+optionally, from_address, status, timestamp, block_number, signature and
+signature_algorithm. Rows that fail validation are written with the
+reason to a rejects CSV file.
+"""
+
+import io
+import json
+import os
+from decimal import Decimal
+from itertools import islice
+
+import pandas as pd
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.db import connection, transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import Wallet
+from blockchain.models import ImportCheckpoint, LedgerEntry, Transaction
+from blockchain.signals import invalidate_wallet_transactions
+from .ledger import bulk_create_posted, post_rows
+
+# Ethereum addresses, or the 32-byte key-hash addresses of platform wallets
+ADDRESS_PATTERN = r'0x(?:[0-9a-fA-F]{40}|[0-9a-fA-F]{64})'
+
+IMPORT_COLUMNS = (
+    'tx_hash', 'from_wallet_id', 'from_address', 'to_address', 'amount', 'gas_fee',
+    'transaction_type', 'status', 'timestamp', 'block_number', 'signature', 'signature_algorithm',
+)
+REQUIRED_COLUMNS = ('tx_hash', 'to_address', 'amount', 'gas_fee', 'transaction_type')
+MAX_BLOCK_NUMBER = 2 ** 31 - 1
+
+STAGE_TABLE = 'transaction_import_stage'
+
+def detect_format(path):
+    """
+    Returns 'csv', 'parquet' or 'jsonl' from a file name.
+
+    Raises:
+        ValueError: If the extension is not recognised
+    """
+    name = path.lower()
+    for extension, file_format in (('.csv', 'csv'), ('.csv.gz', 'csv'), ('.parquet', 'parquet'),
+                                   ('.jsonl', 'jsonl'), ('.ndjson', 'jsonl')):
+        if name.endswith(extension):
+            return file_format
+    raise ValueError(f"Cannot tell the format of {path}; pass it explicitly")
+
+def _read_csv(path, chunk_size, skip):
+    # Everything is read as text and validated column-wise below
+    for frame in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                             skiprows=range(1, skip + 1)):
+        yield frame, len(frame)
+
+def _read_jsonl(path, chunk_size, skip):
+    with open(path) as source:
+        lines = islice(source, skip, None)
+        while True:
+            block = list(islice(lines, chunk_size))
+            if not block:
+                return
+            # Numbers keep their source text, so amounts are not rounded through float
+            records = [json.loads(line, parse_float=str, parse_int=str) for line in block if line.strip()]
+            yield pd.DataFrame.from_records(records), len(block)
+
+def _read_parquet(path, chunk_size, skip):
+    parquet = pq.ParquetFile(path)
+    # Start from the row group holding the first unprocessed row
+    first_group = 0
+    while first_group < parquet.num_row_groups and skip >= parquet.metadata.row_group(first_group).num_rows:
+        skip -= parquet.metadata.row_group(first_group).num_rows
+        first_group += 1
+    if first_group == parquet.num_row_groups:
+        return
+
+    for batch in parquet.iter_batches(batch_size=chunk_size, row_groups=range(first_group, parquet.num_row_groups)):
+        if skip >= batch.num_rows:
+            skip -= batch.num_rows
+            continue
+        batch, skip = batch.slice(skip), 0
+        yield batch.to_pandas(), batch.num_rows
+
+READERS = {'csv': _read_csv, 'jsonl': _read_jsonl, 'parquet': _read_parquet}
+
+def _text(frame, column, default=''):
+    if column not in frame:
+        return pd.Series(default, index=frame.index, dtype=object)
+    values = frame[column]
+    return values.where(values.notna(), default).astype(str).str.strip()
+
+def _decimal_pattern(field):
+    integer_digits = field.max_digits - field.decimal_places
+    return rf'\d{{1,{integer_digits}}}(?:\.\d{{1,{field.decimal_places}}})?'
+
+def validate_chunk(frame, wallet_addresses, wallet_ids):
+    """
+    Validates a chunk of source rows and converts it to Transaction columns.
+
+    Args:
+        frame: DataFrame of source rows
+        wallet_addresses: Dictionary of lower-cased wallet address to wallet id
+        wallet_ids: Set of existing wallet ids
+
+    Returns:
+        Tuple of (DataFrame of valid rows with IMPORT_COLUMNS, DataFrame of
+        rejected source rows with an 'error' column)
+    """
+    errors = pd.Series('', index=frame.index, dtype=object)
+
+    def reject(mask, reason):
+        errors[mask & errors.eq('')] = reason
+
+    missing = [column for column in REQUIRED_COLUMNS if column not in frame]
+    if 'from_wallet_address' not in frame and 'from_wallet_id' not in frame:
+        missing.append('from_wallet_address')
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    tx_hash = _text(frame, 'tx_hash')
+    reject(tx_hash.eq('') | tx_hash.str.len().gt(255), 'invalid tx_hash')
+    reject(tx_hash.duplicated(), 'duplicate tx_hash')
+
+    if 'from_wallet_address' in frame:
+        wallet = _text(frame, 'from_wallet_address').str.lower().map(wallet_addresses)
+    else:
+        wallet = pd.to_numeric(frame['from_wallet_id'], errors='coerce')
+        wallet = wallet.where(wallet.isin(wallet_ids))
+    reject(wallet.isna(), 'unknown wallet')
+
+    to_address = _text(frame, 'to_address')
+    reject(~to_address.str.fullmatch(ADDRESS_PATTERN), 'invalid to_address')
+    from_address = _text(frame, 'from_address')
+    reject(from_address.ne('') & ~from_address.str.fullmatch(ADDRESS_PATTERN), 'invalid from_address')
+
+    amounts = {}
+    for name in ('amount', 'gas_fee'):
+        amounts[name] = _text(frame, name)
+        # Imported rows are posted to the ledger, so they must also fit its entries
+        reject(~amounts[name].str.fullmatch(_decimal_pattern(LedgerEntry._meta.get_field('amount'))), f'invalid {name}')
+
+    transaction_type = _text(frame, 'transaction_type').str.upper()
+    reject(~transaction_type.isin([choice for choice, _ in Transaction.TRANSACTION_TYPES]), 'invalid transaction_type')
+    status = _text(frame, 'status', Transaction._meta.get_field('status').default).str.upper()
+    status = status.where(status.ne(''), Transaction._meta.get_field('status').default)
+    reject(~status.isin([choice for choice, _ in Transaction.STATUS_CHOICES]), 'invalid status')
+
+    raw_block = _text(frame, 'block_number')
+    block_number = pd.to_numeric(raw_block.where(raw_block.ne('')), errors='coerce')
+    reject(
+        raw_block.ne('') & (block_number.isna() | block_number.lt(0) | block_number.gt(MAX_BLOCK_NUMBER)
+                            | block_number.mod(1).ne(0)),
+        'invalid block_number'
+    )
+
+    if 'timestamp' in frame:
+        raw_timestamp = frame['timestamp']
+        timestamp = pd.to_datetime(raw_timestamp.where(_text(frame, 'timestamp').ne('')), utc=True,
+                                   errors='coerce', format='ISO8601')
+        reject(_text(frame, 'timestamp').ne('') & timestamp.isna(), 'invalid timestamp')
+        timestamp = timestamp.fillna(pd.Timestamp(timezone.now()))
+    else:
+        timestamp = pd.Series(pd.Timestamp(timezone.now()), index=frame.index)
+
+    signature_algorithm = _text(frame, 'signature_algorithm')
+    signature_algorithm = signature_algorithm.where(
+        signature_algorithm.ne(''), Transaction._meta.get_field('signature_algorithm').default
+    )
+    reject(signature_algorithm.str.len().gt(50), 'invalid signature_algorithm')
+
+    valid = errors.eq('')
+    rows = pd.DataFrame({
+        'tx_hash': tx_hash,
+        'from_wallet_id': wallet,
+        'from_address': from_address,
+        'to_address': to_address,
+        'amount': amounts['amount'],
+        'gas_fee': amounts['gas_fee'],
+        'transaction_type': transaction_type,
+        'status': status,
+        'timestamp': timestamp,
+        'block_number': block_number,
+        'signature': _text(frame, 'signature'),
+        'signature_algorithm': signature_algorithm,
+    })[valid]
+    rows['from_wallet_id'] = rows['from_wallet_id'].astype('int64')
+    rows['block_number'] = rows['block_number'].astype('Int64')
+    return rows, frame[~valid].assign(error=errors[~valid])
+
+def _copy_insert(rows):
+    # COPY into a session-local staging table, then move the rows over with
+    # ON CONFLICT DO NOTHING so rows already imported are skipped
+    columns = ', '.join(IMPORT_COLUMNS)
+    data = io.StringIO()
+    rows.to_csv(data, columns=IMPORT_COLUMNS, header=False, index=False, na_rep='\\N')
+    data.seek(0)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} AS "
+            f"SELECT {columns} FROM {Transaction._meta.db_table} WITH NO DATA"
+        )
+        cursor.execute(f"TRUNCATE {STAGE_TABLE}")
+        cursor.copy_expert(f"COPY {STAGE_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", data)
+        # RETURNING lists exactly the rows inserted, which are posted to the
+        # ledger. The owner is copied from the sending wallet
+        cursor.execute(
+            f"INSERT INTO {Transaction._meta.db_table} ({columns}, owner_id, is_indexed) "
+            f"SELECT {', '.join(f'stage.{column}' for column in IMPORT_COLUMNS)}, wallet.user_id, FALSE "
+            f"FROM {STAGE_TABLE} AS stage JOIN {Wallet._meta.db_table} AS wallet ON wallet.id = stage.from_wallet_id "
+            f"ON CONFLICT DO NOTHING "
+            f"RETURNING id, from_wallet_id, amount, gas_fee, transaction_type, status"
+        )
+        inserted = cursor.fetchall()
+    post_rows(inserted)
+    return len(inserted)
+
+def insert_rows(rows):
+    """
+    Inserts validated rows, skipping tx_hashes that already exist, and posts
+    the inserted rows to the wallet balance ledger.
+
+    Returns:
+        Number of rows inserted
+    """
+    if rows.empty:
+        return 0
+    if connection.vendor == 'postgresql':
+        return _copy_insert(rows)
+
+    records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+    for record in records:
+        record['amount'] = Decimal(record['amount'])
+        record['gas_fee'] = Decimal(record['gas_fee'])
+        record['timestamp'] = record['timestamp'].to_pydatetime()
+    return len(bulk_create_posted([Transaction(**record) for record in records]))
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def import_transactions(path, file_format=None, chunk_size=None, rejects_path=None, restart=False, progress=None):
+    """
+    Imports transactions from a file, resuming a previous interrupted run.
+
+    Args:
+        path: Source file
+        file_format: 'csv', 'parquet' or 'jsonl', detected from the name if omitted
+        chunk_size: Rows per chunk, defaults to IMPORT_CHUNK_SIZE
+        rejects_path: CSV file receiving rejected rows, defaults to <path>.rejects.csv
+        restart: Start from the beginning even if a checkpoint exists
+        progress: Optional callable receiving the checkpoint after each chunk
+
+    Returns:
+        ImportCheckpoint object
+
+    Raises:
+        ValueError: If the file changed since the checkpoint was taken, or is malformed
+    """
+    file_format = file_format or detect_format(path)
+    reader = READERS[file_format]
+    chunk_size = chunk_size or settings.BLOCKCHAIN_SETTINGS.get('IMPORT_CHUNK_SIZE', 50000)
+    rejects_path = rejects_path or f"{path}.rejects.csv"
+    fingerprint = _fingerprint(path)
+
+    checkpoint, created = ImportCheckpoint.objects.get_or_create(
+        source=os.path.abspath(path), defaults={'fingerprint': fingerprint}
+    )
+    if restart:
+        checkpoint.fingerprint = fingerprint
+        checkpoint.rows_processed = checkpoint.rows_imported = checkpoint.rows_rejected = 0
+        checkpoint.completed = False
+        checkpoint.save()
+        if os.path.exists(rejects_path):
+            os.remove(rejects_path)
+    elif checkpoint.fingerprint != fingerprint:
+        raise ValueError(f"{path} changed since its import was checkpointed; restart the import")
+    if checkpoint.completed:
+        return checkpoint
+
+    wallet_addresses = {address.lower(): wallet_id for wallet_id, address in Wallet.objects.values_list('id', 'address')}
+    wallet_ids = set(wallet_addresses.values())
+    touched_wallets = set()
+
+    for frame, consumed in reader(path, chunk_size, checkpoint.rows_processed):
+        rows, rejects = validate_chunk(frame, wallet_addresses, wallet_ids)
+        with db_transaction.atomic():
+            imported = insert_rows(rows)
+            ImportCheckpoint.objects.filter(id=checkpoint.id).update(
+                rows_processed=F('rows_processed') + consumed,
+                rows_imported=F('rows_imported') + imported,
+                rows_rejected=F('rows_rejected') + len(rejects),
+            )
+        if len(rejects):
+            rejects.to_csv(rejects_path, mode='a', header=not os.path.exists(rejects_path), index=False)
+        touched_wallets.update(rows['from_wallet_id'].unique().tolist())
+
+        checkpoint.refresh_from_db()
+        if progress is not None:
+            progress(checkpoint)
+
+    checkpoint.completed = True
+    checkpoint.save(update_fields=['completed', 'updated_at'])
+    invalidate_wallet_transactions(touched_wallets)
+    return checkpoint
@@ -0,0 +1,322 @@
+"""
+Chain indexer that records incoming transfers to platform wallets.
+
+Native ETH transfers and ERC20 ``Transfer`` logs whose recipient is one of
+our wallets are stored as RECEIVE ``Transaction`` rows. Only logs emitted by
+contracts registered as a ``Token`` are read; they are stored with the token
+and credit its TokenBalance rather than the ETH balance. The indexer only
+ingests blocks that are ``INDEXER_CONFIRMATIONS`` deep, and keeps the hash of
+the last ingested block so a deeper reorganization is detected and rewound.
+A transfer too large to store stops the indexer before its block is
+checkpointed, rather than being dropped.
+"""
+
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction as db_transaction
+from web3 import Web3
+
+from accounts.models import Wallet
+from blockchain.models import Transaction, Token, IndexerCheckpoint
+from blockchain.signals import invalidate_wallet_transactions
+from .ledger import bulk_create_posted, delete_transactions
+
+logger = logging.getLogger(__name__)
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+
+# Exclusive upper bound of Transaction.amount, for token transfers
+MAX_TOKEN_AMOUNT = Decimal(10) ** 18
+
+# Per-process state for backfill workers, set by _init_worker
+_worker_state = {}
+
+class UnstorableTransfer(Exception):
+    """
+    Raised for a confirmed transfer whose amount does not fit the database.
+    """
+
+def _indexer_setting(name, default):
+    return settings.BLOCKCHAIN_SETTINGS.get(name, default)
+
+def load_wallet_addresses():
+    """
+    Builds the in-memory lookup of watched addresses.
+
+    Returns:
+        Dictionary mapping lower-cased wallet address to wallet id
+    """
+    return {
+        address.lower(): wallet_id
+        for wallet_id, address in Wallet.objects.values_list('id', 'address')
+    }
+
+def load_tokens():
+    """
+    Builds the lookup of ERC20 token contracts whose transfers are indexed.
+
+    Returns:
+        Dictionary mapping lower-cased token contract address to
+        (token id, decimals)
+    """
+    return {
+        address.lower(): (token_id, decimals)
+        for token_id, address, decimals in (
+            Token.objects.filter(token_type='ERC20').exclude(contract__address=None)
+            .values_list('id', 'contract__address', 'decimals')
+        )
+    }
+
+def _topic_to_address(topic):
+    # Indexed address topics are left-padded to 32 bytes
+    return '0x' + bytes(topic[-20:]).hex()
+
+def extract_transfers(web3, start_block, end_block, addresses, tokens):
+    """
+    Scans a block range for transfers to watched addresses.
+
+    Args:
+        web3: Web3 instance
+        start_block: First block to scan (inclusive)
+        end_block: Last block to scan (inclusive)
+        addresses: Dictionary of watched address to wallet id
+        tokens: Dictionary of token contract address to (token id, decimals)
+
+    Returns:
+        Tuple of (list of row dictionaries, hash of end_block)
+    """
+    rows = []
+    end_hash = None
+
+    for number in range(start_block, end_block + 1):
+        block = web3.eth.get_block(number, full_transactions=True)
+        end_hash = block['hash'].hex()
+        for tx in block['transactions']:
+            to_address = tx.get('to')
+            if not to_address or tx['value'] == 0:
+                continue
+            wallet_id = addresses.get(to_address.lower())
+            if wallet_id is None:
+                continue
+            rows.append({
+                'tx_hash': tx['hash'].hex(),
+                'wallet_id': wallet_id,
+                'from_address': tx['from'],
+                'to_address': to_address,
+                'amount': Decimal(tx['value']).scaleb(-18),
+                'block_number': number,
+                'token_id': None,
+            })
+
+    if not tokens:
+        return rows, end_hash
+
+    # One eth_getLogs call covers the whole range; the recipient filter runs locally.
+    # Any contract can emit a Transfer event, so only registered tokens are asked for
+    logs = web3.eth.get_logs({
+        'fromBlock': start_block,
+        'toBlock': end_block,
+        'address': [Web3.to_checksum_address(address) for address in tokens],
+        'topics': [TRANSFER_TOPIC],
+    })
+    for log in logs:
+        # ERC721 Transfer has the same signature but indexes the token id as a fourth topic
+        if len(log['topics']) != 3:
+            continue
+        to_address = _topic_to_address(log['topics'][2])
+        wallet_id = addresses.get(to_address)
+        if wallet_id is None:
+            continue
+        token = tokens.get(log['address'].lower())
+        if token is None:
+            continue
+        token_id, decimals = token
+        value = int.from_bytes(bytes(log['data']), 'big')
+        rows.append({
+            # A single transaction can emit several transfers, so the log index keeps the hash unique
+            'tx_hash': f"{log['transactionHash'].hex()}:{log['logIndex']}",
+            'wallet_id': wallet_id,
+            'from_address': _topic_to_address(log['topics'][1]),
+            'to_address': to_address,
+            'amount': Decimal(value).scaleb(-decimals),
+            'block_number': log['blockNumber'],
+            'token_id': token_id,
+        })
+
+    return rows, end_hash
+
+def store_transfers(rows):
+    """
+    Bulk-inserts extracted transfers as confirmed RECEIVE transactions and
+    credits the receiving wallets, or their token balances for token
+    transfers. Rows that were already indexed are skipped.
+
+    Returns:
+        Number of rows inserted
+
+    Raises:
+        UnstorableTransfer: If an amount is too large to store; nothing is inserted
+    """
+    for row in rows:
+        # ETH transfers are posted to the ledger, which is narrower than Transaction.amount
+        limit = Transaction.MAX_POSTED_AMOUNT if row['token_id'] is None else MAX_TOKEN_AMOUNT
+        if row['amount'] >= limit:
+            raise UnstorableTransfer(f"Transfer {row['tx_hash']} of {row['amount']} in block {row['block_number']} is too large to store")
+
+    transactions = [
+        Transaction(
+            tx_hash=row['tx_hash'],
+            from_wallet_id=row['wallet_id'],
+            from_address=row['from_address'],
+            to_address=row['to_address'],
+            amount=row['amount'],
+            gas_fee=Decimal(0),
+            transaction_type='RECEIVE',
+            status='CONFIRMED',
+            block_number=row['block_number'],
+            token_id=row['token_id'],
+            is_indexed=True,
+            signature='',
+            signature_algorithm='',
+        )
+        for row in rows
+    ]
+    inserted = bulk_create_posted(transactions, batch_size=_indexer_setting('INDEXER_INSERT_BATCH_SIZE', 1000))
+    invalidate_wallet_transactions(transaction.from_wallet_id for transaction in inserted)
+    return len(inserted)
+
+def _rewind_if_reorged(web3, checkpoint):
+    """
+    Compares the checkpoint with the canonical chain and rewinds past a reorg.
+    """
+    block = web3.eth.get_block(checkpoint.block_number)
+    if block['hash'].hex() == checkpoint.block_hash:
+        return checkpoint
+
+    depth = _indexer_setting('INDEXER_CONFIRMATIONS', 12)
+    fork_block = max(checkpoint.block_number - depth, 0)
+    logger.warning("Reorg detected at block %s, rewinding to %s", checkpoint.block_number, fork_block)
+
+    with db_transaction.atomic():
+        # Imported rows are not re-indexed, so only the indexer's own rows are rewound
+        delete_transactions(Transaction.objects.filter(is_indexed=True, block_number__gt=fork_block))
+        checkpoint.block_number = fork_block
+        checkpoint.block_hash = web3.eth.get_block(fork_block)['hash'].hex()
+        checkpoint.save()
+    return checkpoint
+
+def index_new_blocks(web3, addresses, tokens, name='default'):
+    """
+    Ingests every confirmed block after the checkpoint.
+
+    Returns:
+        Number of blocks ingested
+    """
+    confirmations = _indexer_setting('INDEXER_CONFIRMATIONS', 12)
+    batch_blocks = _indexer_setting('INDEXER_BATCH_BLOCKS', 100)
+    safe_head = web3.eth.block_number - confirmations
+    if safe_head < 0:
+        return 0
+
+    checkpoint = IndexerCheckpoint.objects.filter(name=name).first()
+    if checkpoint is None:
+        # Start at the head; history is loaded with backfill_blocks
+        start = _indexer_setting('INDEXER_START_BLOCK', safe_head)
+        checkpoint = IndexerCheckpoint.objects.create(
+            name=name,
+            block_number=start,
+            block_hash=web3.eth.get_block(start)['hash'].hex()
+        )
+    else:
+        checkpoint = _rewind_if_reorged(web3, checkpoint)
+
+    ingested = 0
+    while checkpoint.block_number < safe_head:
+        start = checkpoint.block_number + 1
+        end = min(start + batch_blocks - 1, safe_head)
+        rows, end_hash = extract_transfers(web3, start, end, addresses, tokens)
+
+        # Rows and checkpoint move together so a crash never skips or double-counts a block
+        with db_transaction.atomic():
+            store_transfers(rows)
+            checkpoint.block_number = end
+            checkpoint.block_hash = end_hash
+            checkpoint.save()
+        ingested += end - start + 1
+
+    return ingested
+
+def follow_chain(poll_interval=None, name='default'):
+    """
+    Keeps the Transaction table in step with the chain head. Runs until interrupted.
+    """
+    from .ethereum import get_web3_instance
+
+    web3 = get_web3_instance()
+    poll_interval = poll_interval or _indexer_setting('INDEXER_POLL_INTERVAL', 2)
+
+    while True:
+        # Reloaded every round so newly created wallets are picked up
+        addresses = load_wallet_addresses()
+        tokens = load_tokens()
+        ingested = index_new_blocks(web3, addresses, tokens, name=name)
+        if ingested:
+            logger.info("Indexed %s blocks", ingested)
+        else:
+            time.sleep(poll_interval)
+
+def _init_worker(provider_url, addresses, tokens):
+    _worker_state['web3'] = Web3(Web3.HTTPProvider(provider_url))
+    _worker_state['addresses'] = addresses
+    _worker_state['tokens'] = tokens
+
+def _scan_range(block_range):
+    start, end = block_range
+    rows, _ = extract_transfers(
+        _worker_state['web3'], start, end,
+        _worker_state['addresses'], _worker_state['tokens']
+    )
+    return rows
+
+def backfill_blocks(start_block, end_block, workers=4, chunk_blocks=None):
+    """
+    Indexes a historical block range, scanning chunks in a process pool.
+    Workers only talk to the node; all inserts happen in this process.
+    The live checkpoint is not moved.
+
+    Args:
+        start_block: First block to index (inclusive)
+        end_block: Last block to index (inclusive)
+        workers: Number of worker processes
+        chunk_blocks: Blocks per work item
+
+    Returns:
+        Number of transfers inserted
+    """
+    chunk_blocks = chunk_blocks or _indexer_setting('INDEXER_BATCH_BLOCKS', 100)
+    ranges = [
+        (start, min(start + chunk_blocks - 1, end_block))
+        for start in range(start_block, end_block + 1, chunk_blocks)
+    ]
+
+    addresses = load_wallet_addresses()
+    tokens = load_tokens()
+
+    # Forked workers must not inherit open database sockets
+    connections.close_all()
+
+    stored = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(settings.BLOCKCHAIN_SETTINGS['ETHEREUM_NODE_URL'], addresses, tokens)
+    ) as executor:
+        for rows in executor.map(_scan_range, ranges):
+            stored += store_transfers(rows)
+
+    return stored
@@ -0,0 +1,286 @@
+"""
+Double-entry balance ledger for platform wallets.
+
+Every stored transaction posts entries that sum to zero: the wallet side,
+the counterparty outside the ledger (EXTERNAL) and the network fee (FEES).
+Wallet.balance is kept as the running total of the wallet's entries and is
+moved with F() updates in the same database transaction as the posting, so
+balance reads are a single column and concurrent sends cannot lose an
+update. verify_ledger checks the running balances against the entries.
+
+Transfers between platform wallets are not credited to the recipient when
+they are sent. The recipient is credited by the RECEIVE row the chain
+indexer stores once the transfer is confirmed, so each side is posted once.
+
+Transactions stored before the ledger existed are not posted; the balances
+at that time were carried over as OPENING entries by migration 0005.
+
+Token transfers (rows with a token) are not posted either: they move the
+wallet's TokenBalance for that token, never its ETH balance.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction as db_transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Abs, Coalesce
+
+from accounts.models import Wallet
+from blockchain.models import LedgerEntry, TokenBalance, Transaction
+from quantum_defi.response_cache import invalidate
+
+logger = logging.getLogger(__name__)
+
+# Types that move value out of the wallet; RECEIVE and UNSTAKE move it in
+OUTGOING_TYPES = {'SEND', 'SWAP', 'STAKE'}
+
+# SQLite stores decimals as REAL, so balances and sums there carry rounding
+# error that grows with their size: differences up to SQLITE_TOLERANCE plus
+# SQLITE_RELATIVE_TOLERANCE times the magnitudes compared are treated as zero
+SQLITE_TOLERANCE = Decimal('1e-9')
+SQLITE_RELATIVE_TOLERANCE = Decimal('1e-9')
+
+AMOUNT_FIELD = DecimalField(max_digits=24, decimal_places=18)
+
+def posting_lines(amount, gas_fee, transaction_type, status):
+    """
+    Returns the entries a transaction posts.
+
+    Args:
+        amount: Transferred amount
+        gas_fee: Network fee paid by the wallet
+        transaction_type: One of Transaction.TRANSACTION_TYPES
+        status: One of Transaction.STATUS_CHOICES; a FAILED transaction
+            moves no value but still pays its fee
+
+    Returns:
+        List of (account, amount) pairs summing to zero, where account
+        'WALLET' is the transaction's wallet
+    """
+    lines = []
+    if status != 'FAILED' and amount:
+        sign = -1 if transaction_type in OUTGOING_TYPES else 1
+        lines += [('WALLET', sign * amount), ('EXTERNAL', -sign * amount)]
+    # The sender pays the fee of an incoming transfer
+    if transaction_type != 'RECEIVE' and gas_fee:
+        lines += [('WALLET', -gas_fee), ('FEES', gas_fee)]
+    return lines
+
+def _apply_deltas(deltas):
+    # Wallets are updated in id order so concurrent postings lock them in the same order
+    for wallet_id in sorted(deltas):
+        if deltas[wallet_id]:
+            Wallet.objects.filter(id=wallet_id).update(balance=F('balance') + deltas[wallet_id])
+
+    wallet_ids = list(deltas)
+
+    def invalidate_balances():
+        for user_id in Wallet.objects.filter(id__in=wallet_ids).values_list('user_id', flat=True).distinct():
+            invalidate('wallets', user_id)
+
+    db_transaction.on_commit(invalidate_balances)
+
+def post_rows(rows):
+    """
+    Posts transactions to the ledger and moves the wallets' running balances.
+    Callers insert the transactions in the same database transaction.
+
+    Args:
+        rows: Iterable of (transaction_id, wallet_id, amount, gas_fee,
+            transaction_type, status) tuples
+
+    Returns:
+        Number of entries posted
+    """
+    entries = []
+    deltas = defaultdict(Decimal)
+    for transaction_id, wallet_id, amount, gas_fee, transaction_type, status in rows:
+        for account, line_amount in posting_lines(Decimal(amount), Decimal(gas_fee), transaction_type, status):
+            is_wallet = account == 'WALLET'
+            entries.append(LedgerEntry(
+                transaction_id=transaction_id,
+                account=account,
+                wallet_id=wallet_id if is_wallet else None,
+                amount=line_amount,
+            ))
+            if is_wallet:
+                deltas[wallet_id] += line_amount
+
+    if not entries:
+        return 0
+    with db_transaction.atomic():
+        LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+        _apply_deltas(deltas)
+    return len(entries)
+
+def post_transactions(transactions):
+    """
+    Posts saved Transaction objects to the ledger. Token transfers move
+    token balances instead.
+
+    Returns:
+        Number of entries posted
+    """
+    transactions = list(transactions)
+    move_token_balances(transactions)
+    return post_rows(
+        (transaction.id, transaction.from_wallet_id, transaction.amount, transaction.gas_fee,
+         transaction.transaction_type, transaction.status)
+        for transaction in transactions if transaction.token_id is None
+    )
+
+def move_token_balances(transactions, sign=1):
+    """
+    Credits the TokenBalance rows of incoming token transfers, or debits
+    them again with sign -1. Rows without a token are ignored.
+    """
+    deltas = defaultdict(Decimal)
+    for transaction in transactions:
+        if transaction.token_id is not None and transaction.status != 'FAILED':
+            direction = -1 if transaction.transaction_type in OUTGOING_TYPES else 1
+            deltas[transaction.from_wallet_id, transaction.token_id] += sign * direction * Decimal(transaction.amount)
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    with db_transaction.atomic():
+        TokenBalance.objects.bulk_create(
+            [TokenBalance(wallet_id=wallet_id, token_id=token_id) for wallet_id, token_id in deltas],
+            ignore_conflicts=True,
+        )
+        # Sorted like _apply_deltas so concurrent writers lock rows in the same order
+        for (wallet_id, token_id), delta in sorted(deltas.items()):
+            TokenBalance.objects.filter(wallet_id=wallet_id, token_id=token_id).update(balance=F('balance') + delta)
+
+def post_opening_balance(wallet):
+    """
+    Records a wallet's existing balance as an OPENING entry, without moving it.
+    """
+    if not wallet.balance:
+        return
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(account='WALLET', wallet_id=wallet.id, amount=wallet.balance),
+        LedgerEntry(account='OPENING', amount=-wallet.balance),
+    ])
+
+def bulk_create_posted(transactions, batch_size=1000, attempts=3):
+    """
+    Inserts Transaction objects whose tx_hash is not stored yet and posts
+    them to the ledger, in one database transaction. Unlike bulk_create with
+    ignore_conflicts, the inserted rows are known, so none is posted twice.
+
+    Args:
+        transactions: Unsaved Transaction objects with distinct tx_hashes
+        batch_size: Rows per INSERT
+        attempts: Tries when a concurrent writer stores one of the hashes first
+
+    Returns:
+        List of the Transaction objects inserted
+    """
+    hashes = [transaction.tx_hash for transaction in transactions]
+    for attempt in range(attempts):
+        existing = set()
+        for start in range(0, len(hashes), batch_size):
+            existing.update(
+                Transaction.objects.filter(tx_hash__in=hashes[start:start + batch_size]).values_list('tx_hash', flat=True)
+            )
+        new = [transaction for transaction in transactions if transaction.tx_hash not in existing]
+        Transaction.assign_owners(new)
+        try:
+            with db_transaction.atomic():
+                Transaction.objects.bulk_create(new, batch_size=batch_size)
+                post_transactions(new)
+            return new
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+            for transaction in new:
+                transaction.pk = None
+                transaction._state.adding = True
+    return []
+
+def delete_transactions(queryset):
+    """
+    Deletes transactions together with their entries, moving the wallets'
+    running balances and token balances back by what the transactions posted.
+
+    Returns:
+        Number of transactions deleted
+    """
+    with db_transaction.atomic():
+        move_token_balances(
+            queryset.filter(token__isnull=False).only('from_wallet_id', 'token_id', 'amount', 'transaction_type', 'status'),
+            sign=-1,
+        )
+        posted = (
+            LedgerEntry.objects.filter(transaction__in=queryset.values('id'), account='WALLET')
+            .values_list('wallet_id')
+            .annotate(total=Sum('amount'))
+        )
+        _apply_deltas({wallet_id: -total for wallet_id, total in posted})
+        deleted, per_model = queryset.delete()
+    return per_model.get(Transaction._meta.label, 0)
+
+def _tolerance(magnitude):
+    # Exact on databases with a real decimal type
+    if connection.vendor != 'sqlite':
+        return Value(Decimal(0), output_field=AMOUNT_FIELD)
+    return ExpressionWrapper(
+        Value(SQLITE_TOLERANCE) + Value(SQLITE_RELATIVE_TOLERANCE) * magnitude,
+        output_field=AMOUNT_FIELD,
+    )
+
+def _outside(field, tolerance_field):
+    return Q(**{f'{field}__gt': F(tolerance_field)}) | Q(**{f'{field}__lt': -F(tolerance_field)})
+
+def balance_mismatches():
+    """
+    Compares every wallet's running balance with the sum of its entries, in
+    one statement so both are read from the same snapshot.
+
+    Returns:
+        List of (wallet_id, balance, ledger_balance) tuples that differ
+    """
+    zero = Value(Decimal(0), output_field=AMOUNT_FIELD)
+    return list(
+        Wallet.objects.annotate(ledger_balance=Coalesce(Sum('ledger_entries__amount'), zero))
+        .annotate(
+            difference=F('balance') - F('ledger_balance'),
+            tolerance=_tolerance(Abs('balance') + Abs('ledger_balance')),
+        )
+        .filter(_outside('difference', 'tolerance'))
+        .order_by('id')
+        .values_list('id', 'balance', 'ledger_balance')
+    )
+
+def unbalanced_postings():
+    """
+    Finds postings whose entries do not sum to zero.
+
+    Returns:
+        List of (transaction_id, total) tuples, where transaction_id None
+        stands for the opening balance entries
+    """
+    return list(
+        LedgerEntry.objects.values_list('transaction_id')
+        .annotate(total=Sum('amount'))
+        .alias(tolerance=_tolerance(Sum(Abs('amount'))))
+        .filter(_outside('total', 'tolerance'))
+        .order_by('transaction_id')
+    )
+
+def verify_ledger():
+    """
+    Checks the ledger and logs every inconsistency found.
+
+    Returns:
+        Dictionary with the balance_mismatches and unbalanced_postings results
+    """
+    result = {'wallets': balance_mismatches(), 'postings': unbalanced_postings()}
+    for wallet_id, balance, ledger_balance in result['wallets']:
+        logger.error("Wallet %s balance %s does not match its ledger total %s", wallet_id, balance, ledger_balance)
+    for transaction_id, total in result['postings']:
+        logger.error("Ledger entries of transaction %s sum to %s", transaction_id, total)
+    return result
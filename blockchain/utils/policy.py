@@ -0,0 +1,216 @@
+"""
+Pre-submission policy checks from a user's SecurityPreference.
+
+A user's policy is compiled from one query that reads the preferences,
+the user's wallets and each wallet's sends within POLICY_WINDOW. The
+compiled policy is then kept per process, and checking a transaction
+against it only compares numbers already in memory. The rules are:
+
+- Amount cap: no transaction above max_transaction_amount.
+- Algorithm allow-list: with quantum_resistant_only, the sending
+  wallet's key algorithm must be in QUANTUM_RESISTANT_ALGORITHMS.
+- Velocity: with max_window_transactions set, at most that many sends
+  per POLICY_WINDOW, and with a cap set, at most
+  POLICY_WINDOW_AMOUNT_MULTIPLE times the cap in total.
+
+Only the user's own wallets pass, so callers check ownership first and a
+foreign wallet never reaches the counts. A transaction is added to the
+velocity counts by record_transaction_policy once it has been sent and
+stored; a check alone counts nothing. The policy is compiled again after
+POLICY_REFRESH seconds, which also counts the sends stored by other
+workers, or right away when the user's preferences or wallets are saved
+(see quantum_defi.authentication). At most POLICY_MAX_ENTRIES policies
+are kept per worker.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from accounts.models import Wallet
+from blockchain.models import Transaction
+from quantum_defi.authentication import get_generations
+
+_policies = OrderedDict()
+_lock = threading.Lock()
+
+def _setting(name, default=None):
+    return settings.BLOCKCHAIN_SETTINGS.get(name, default)
+
+class Policy:
+    """
+    Compiled transaction rules of one user, with the velocity counts
+    they were compiled with.
+    """
+
+    def __init__(self, generation, wallets, max_amount, max_count, allowed_algorithms, recent_count, recent_amount):
+        self.generation = generation
+        self.compiled_at = time.monotonic()
+        self.wallets = wallets  # {wallet id: key algorithm}
+        self.max_amount = max_amount
+        self.allowed_algorithms = allowed_algorithms
+        self.max_count = max_count
+        self.max_window_amount = (
+            max_amount * _setting('POLICY_WINDOW_AMOUNT_MULTIPLE', 10) if max_amount is not None else None
+        )
+        self.recent_count = recent_count
+        self.recent_amount = recent_amount
+        self._lock = threading.Lock()
+
+    def check(self, wallet_id, amount, pending_count=0, pending_amount=Decimal(0)):
+        """
+        Checks a transaction without counting it.
+
+        Args:
+            wallet_id: Sending wallet
+            amount: Amount sent
+            pending_count: Transactions accepted earlier in the same
+                request that are not recorded yet
+            pending_amount: Total amount of those transactions
+
+        Returns:
+            None if the transaction is allowed, otherwise the reason it is not
+        """
+        if wallet_id not in self.wallets:
+            return 'This wallet does not belong to you'
+        if self.max_amount is not None and amount > self.max_amount:
+            return f'Amount exceeds your maximum of {_amount_text(self.max_amount)} per transaction'
+        algorithm = self.wallets[wallet_id]
+        if self.allowed_algorithms is not None and algorithm not in self.allowed_algorithms:
+            return f'Your preferences only allow quantum-resistant keys, and this wallet uses {algorithm}'
+
+        with self._lock:
+            recent_count = self.recent_count + pending_count
+            recent_amount = self.recent_amount + pending_amount
+        if self.max_count is not None and recent_count >= self.max_count:
+            return f'More than {self.max_count} transactions within {_window_text()}'
+        if self.max_window_amount is not None and recent_amount + amount > self.max_window_amount:
+            return f'Transactions within {_window_text()} would exceed {_amount_text(self.max_window_amount)} in total'
+        return None
+
+    def record(self, count, amount):
+        """
+        Counts sent transactions toward the velocity limits.
+        """
+        with self._lock:
+            self.recent_count += count
+            self.recent_amount += amount
+
+def _amount_text(amount):
+    # Without trailing zeros or an exponent
+    return f"{amount.normalize():f}"
+
+def _window_text():
+    return f"{_setting('POLICY_WINDOW', 3600) // 60} minutes"
+
+def compile_policy(user_id, generation=0):
+    """
+    Compiles a user's policy from a single query.
+
+    Args:
+        user_id: User whose policy is compiled
+        generation: The user's generation, read before the query
+
+    Returns:
+        Policy
+    """
+    since = timezone.now() - timedelta(seconds=_setting('POLICY_WINDOW', 3600))
+    # Covered by tx_wallet_timestamp_idx
+    recent = (
+        Transaction.objects.filter(from_wallet=OuterRef('pk'), timestamp__gte=since)
+        .exclude(transaction_type='RECEIVE').exclude(status='FAILED')
+        .order_by().values('from_wallet')
+    )
+    rows = list(
+        Wallet.objects.filter(user_id=user_id)
+        .annotate(
+            recent_count=Subquery(recent.annotate(count=Count('id')).values('count')),
+            recent_amount=Subquery(recent.annotate(total=Sum('amount')).values('total')),
+        )
+        .values(
+            'id', 'key_algorithm', 'recent_count', 'recent_amount',
+            'user__security_preferences__quantum_resistant_only',
+            'user__security_preferences__max_transaction_amount',
+            'user__security_preferences__max_window_transactions',
+        )
+    )
+
+    # Preferences are the same on every row; a user without wallets has no rows
+    preferences = rows[0] if rows else {}
+    quantum_resistant_only = preferences.get('user__security_preferences__quantum_resistant_only')
+    return Policy(
+        generation,
+        wallets={row['id']: row['key_algorithm'] for row in rows},
+        max_amount=preferences.get('user__security_preferences__max_transaction_amount'),
+        max_count=preferences.get('user__security_preferences__max_window_transactions'),
+        allowed_algorithms=frozenset(_setting('QUANTUM_RESISTANT_ALGORITHMS', ())) if quantum_resistant_only else None,
+        recent_count=sum(row['recent_count'] or 0 for row in rows),
+        recent_amount=sum((row['recent_amount'] or Decimal(0) for row in rows), Decimal(0)),
+    )
+
+def get_policy(user_id):
+    """
+    Returns the compiled policy of a user, compiling it if it is missing,
+    older than POLICY_REFRESH seconds, or out of date.
+    """
+    generation = get_generations().get(user_id)
+    with _lock:
+        policy = _policies.get(user_id)
+    if (
+        policy is None or policy.generation != generation
+        or time.monotonic() - policy.compiled_at > _setting('POLICY_REFRESH', 10)
+    ):
+        policy = compile_policy(user_id, generation)
+        with _lock:
+            _policies[user_id] = policy
+            _policies.move_to_end(user_id)
+            while len(_policies) > _setting('POLICY_MAX_ENTRIES', 10000):
+                _policies.popitem(last=False)
+    else:
+        with _lock:
+            if user_id in _policies:
+                _policies.move_to_end(user_id)
+    return policy
+
+def check_transaction_policy(user, transaction_data, pending_count=0, pending_amount=Decimal(0)):
+    """
+    Checks a pending transaction against its sender's security
+    preferences. Call it after the ownership check and the idempotency
+    lookup, and record_transaction_policy once the transaction is stored.
+
+    Args:
+        user: User submitting the transaction
+        transaction_data: Validated transaction dictionary
+        pending_count: Transactions accepted earlier in the same request,
+            e.g. a batch, that are not recorded yet
+        pending_amount: Total amount of those transactions
+
+    Returns:
+        None if the transaction is allowed, otherwise the reason it is not
+    """
+    return get_policy(user.pk).check(
+        transaction_data['from_wallet'].id, transaction_data['amount'],
+        pending_count=pending_count, pending_amount=pending_amount,
+    )
+
+def record_transaction_policy(user, transactions):
+    """
+    Counts stored transactions toward the velocity limits of the user's
+    compiled policy in this worker. Other workers count them when they
+    compile the policy again.
+
+    Args:
+        user: User who submitted the transactions
+        transactions: Saved Transaction objects
+    """
+    transactions = list(transactions)
+    with _lock:
+        policy = _policies.get(user.pk)
+    if policy is not None and transactions:
+        policy.record(len(transactions), sum((transaction.amount for transaction in transactions), Decimal(0)))
@@ -1,32 +1,88 @@
 import hashlib
-import json
-from datetime import datetime
+import struct
+from decimal import Decimal
 
-def create_transaction_hash(transaction_data):
+# Amounts are encoded as integer base units (wei for ETH)
+AMOUNT_DECIMALS = 18
+
+# Longest idempotency token accepted, in UTF-8 bytes
+MAX_IDEMPOTENCY_TOKEN_BYTES = 255
+
+def _encode_field(value):
+    # Length-prefixed so adjacent fields can never run together
+    if len(value) > 0xFFFF:
+        raise ValueError(f"A field of {len(value)} bytes is too long to encode")
+    return struct.pack('>H', len(value)) + value
+
+def _to_base_units(value):
+    scaled = Decimal(str(value)).scaleb(AMOUNT_DECIMALS)
+    if scaled != scaled.to_integral_value():
+        raise ValueError(f"{value} has more than {AMOUNT_DECIMALS} decimal places")
+    # Encoded as an unsigned 256-bit integer
+    if not 0 <= scaled < 2 ** 256:
+        raise ValueError(f"{value} is outside the encodable range")
+    return int(scaled)
+
+def encode_transaction(transaction_data, idempotency_token=''):
+    """
+    Encodes the fields that identify a transaction into canonical bytes.
+    Addresses are lower-cased and amounts are converted to integer base
+    units, so equal transactions always produce identical bytes.
+    
+    Args:
+        transaction_data: Dictionary containing transaction details
+        idempotency_token: Client-supplied token identifying a logical submission
+    
+    Returns:
+        Canonical encoding as bytes
+    
+    Raises:
+        ValueError: If an amount is negative, too large or too precise, or
+            a field is longer than 65535 bytes
+    """
+    return b''.join((
+        _encode_field(transaction_data['from_wallet'].address.lower().encode()),
+        _encode_field(transaction_data['to_address'].lower().encode()),
+        _to_base_units(transaction_data['amount']).to_bytes(32, 'big'),
+        _to_base_units(transaction_data['gas_fee']).to_bytes(32, 'big'),
+        struct.pack('>Q', transaction_data.get('nonce', 0)),
+        _encode_field(transaction_data.get('transaction_type', '').encode()),
+        _encode_field(idempotency_token.encode()),
+    ))
+
+def create_transaction_hash(transaction_data, idempotency_token=''):
     """
     Creates a deterministic hash for a transaction.
     
     Args:
         transaction_data: Dictionary containing transaction details
+        idempotency_token: Client-supplied token identifying a logical submission
     
     Returns:
         Transaction hash
     """
-    # Create a deterministic representation of the transaction
-    tx_dict = {
-        'from': transaction_data['from_wallet'].address,
-        'to': transaction_data['to_address'],
-        'amount': str(transaction_data['amount']),
-        'gas_fee': str(transaction_data['gas_fee']),
-        'nonce': transaction_data.get('nonce', 0),
-        'timestamp': datetime.now().isoformat()
-    }
-    
-    # Convert to JSON string and hash
-    tx_json = json.dumps(tx_dict, sort_keys=True)
-    tx_hash = hashlib.sha256(tx_json.encode()).hexdigest()
-    
-    return tx_hash
+    return hashlib.sha256(encode_transaction(transaction_data, idempotency_token)).hexdigest()
+
+def get_idempotency_key(transaction_data, idempotency_token):
+    """
+    Derives the stored idempotency key for a submission.
+    
+    Args:
+        transaction_data: Dictionary containing transaction details
+        idempotency_token: Client-supplied token, e.g. the Idempotency-Key header
+    
+    Returns:
+        Idempotency key, or None when the client did not supply a token
+    
+    Raises:
+        ValueError: If the token is longer than MAX_IDEMPOTENCY_TOKEN_BYTES
+            or the transaction cannot be encoded
+    """
+    if not idempotency_token:
+        return None
+    if len(idempotency_token.encode()) > MAX_IDEMPOTENCY_TOKEN_BYTES:
+        raise ValueError(f"Idempotency keys are limited to {MAX_IDEMPOTENCY_TOKEN_BYTES} bytes")
+    return create_transaction_hash(transaction_data, idempotency_token)
 
 def verify_transaction_signature(transaction, signature):
     """
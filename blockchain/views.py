@@ -1,34 +1,83 @@
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.conf import settings
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import ProtectedError
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from quantum_defi.admission import AdmissionThrottle, admit, request_cost
+from quantum_defi.authentication import wallet_ids
+from quantum_defi.async_api import json_body, jwt_required, service_unavailable
+from quantum_defi.instrumentation import timed
+from quantum_defi.pagination import paginate_keyset_for_request
+from quantum_defi.response_cache import cached_api_response
 from .models import Transaction, SmartContract, Token, TokenBalance
 from .serializers import TransactionSerializer, SmartContractSerializer, TokenSerializer, TokenBalanceSerializer
 from .forms import TransactionForm, SmartContractForm
-from .utils.ethereum import send_transaction, deploy_contract
-from quantum_crypto.utils.key_management import sign_transaction_quantum
-from ai_security.ml_models.anomaly_detection import check_transaction_anomaly
+from .chain import send_transaction, send_transaction_async, submit_deployment, process_transaction_batch
+from .utils.policy import check_transaction_policy, record_transaction_policy
+from .utils.transaction import get_idempotency_key
+from quantum_crypto.crypto import sign_transaction_quantum
+from ai_security.inference_pool import InferenceSaturated, score_transaction
+from ai_security.ml import check_transaction_anomaly
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    API endpoint for transactions
+    API endpoint for transactions. Transactions are only stored by the
+    create actions, which post them to the ledger, and are never edited
+    or deleted through the API.
     """
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [AdmissionThrottle]
+    admission_scopes = {'create_transaction': 'create_transaction', 'create_transactions_batch': 'create_transactions_batch'}
+    keyset_ordering = ('-timestamp', '-id')
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
-        user = self.request.user
-        user_wallets = user.wallets.all()
-        return Transaction.objects.filter(from_wallet__in=user_wallets)
+        return Transaction.objects.for_user(self.request.user).order_by(*self.keyset_ordering)
+    
+    def admission_cost(self, request, scope):
+        if self.action == 'create_transactions_batch':
+            # Charged per transaction to the batch scope's buckets, which hold a full batch
+            items = request.data.get('transactions') if isinstance(request.data, dict) else request.data
+            return request_cost(scope) * max(len(items) if isinstance(items, list) else 1, 1)
+        return request_cost(scope)
     
     @action(detail=False, methods=['post'])
     def create_transaction(self, request):
         serializer = self.get_serializer(data=request.data)
-        if serializer.is_valid():
+        with timed('validate'):
+            is_valid = serializer.is_valid()
+        if is_valid:
+            wallet = serializer.validated_data['from_wallet']
+            if wallet.id not in wallet_ids(request.user):
+                raise Http404
+            
+            # Retries carrying the same Idempotency-Key are answered from the stored row
+            try:
+                idempotency_key = get_idempotency_key(serializer.validated_data, request.headers.get('Idempotency-Key', ''))
+            except ValueError as error:
+                return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+            if idempotency_key:
+                existing = Transaction.objects.for_user(request.user).filter(idempotency_key=idempotency_key).first()
+                if existing:
+                    return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
+            
+            violation = check_transaction_policy(request.user, serializer.validated_data)
+            if violation:
+                return Response({
+                    'error': 'Transaction blocked by your security preferences',
+                    'details': violation
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
             # Check for anomalies using AI
             is_anomaly, confidence = check_transaction_anomaly(serializer.validated_data)
             if is_anomaly and confidence > 0.8:
@@ -39,52 +88,160 @@ class TransactionViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Sign transaction with quantum-resistant algorithm
-            wallet = get_object_or_404(request.user.wallets, id=serializer.validated_data['from_wallet'].id)
             signature = sign_transaction_quantum(serializer.validated_data, wallet)
             
             # Send transaction to blockchain
             tx_hash = send_transaction(serializer.validated_data, signature)
             
             # Save transaction with signature
-            transaction = serializer.save(
-                tx_hash=tx_hash,
-                signature=signature['signature'],
-                signature_algorithm=signature['algorithm']
-            )
+            try:
+                with timed('save'), db_transaction.atomic():
+                    transaction = serializer.save(
+                        tx_hash=tx_hash,
+                        signature=signature['signature'],
+                        signature_algorithm=signature['algorithm'],
+                        idempotency_key=idempotency_key
+                    )
+            except IntegrityError:
+                # A concurrent retry of the same submission was stored first
+                existing = (
+                    Transaction.objects.for_user(request.user).filter(idempotency_key=idempotency_key).first()
+                    if idempotency_key else None
+                )
+                if existing is None:
+                    raise
+                return Response(self.get_serializer(existing).data, status=status.HTTP_200_OK)
             
+            record_transaction_policy(request.user, [transaction])
             return Response(self.get_serializer(transaction).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['post'])
+    def create_transactions_batch(self, request):
+        items = request.data.get('transactions') if isinstance(request.data, dict) else request.data
+        max_batch_size = settings.BLOCKCHAIN_SETTINGS.get('MAX_BATCH_SIZE', 500)
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of transactions'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > max_batch_size:
+            return Response({'error': f'A batch may contain at most {max_batch_size} transactions'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        # Validate every item up front; invalid items do not stop the rest of the batch
+        user_wallet_ids = wallet_ids(request.user)
+        results = [None] * len(items)
+        valid_indexes = []
+        valid_items = []
+        valid_keys = []
+        for index, item in enumerate(items):
+            serializer = self.get_serializer(data=item)
+            if not serializer.is_valid():
+                results[index] = {'index': index, 'status': 'invalid', 'errors': serializer.errors}
+            elif serializer.validated_data['from_wallet'].id not in user_wallet_ids:
+                results[index] = {'index': index, 'status': 'invalid', 'errors': {'from_wallet': ['Not found.']}}
+            else:
+                try:
+                    key = get_idempotency_key(serializer.validated_data, str(item.get('idempotency_key') or ''))
+                except ValueError as error:
+                    results[index] = {'index': index, 'status': 'invalid', 'errors': {'non_field_errors': [str(error)]}}
+                    continue
+                valid_indexes.append(index)
+                valid_items.append(serializer.validated_data)
+                valid_keys.append(key)
+        
+        # Items already stored by an earlier submission, or repeated within this batch, are not sent again
+        existing = Transaction.objects.for_user(request.user).in_bulk(
+            [key for key in valid_keys if key], field_name='idempotency_key'
+        )
+        duplicates = {}
+        pending_indexes, pending_items, pending_keys = [], [], []
+        pending_amount = Decimal(0)
+        first_index_for_key = {}
+        for index, item, key in zip(valid_indexes, valid_items, valid_keys):
+            if key in existing:
+                results[index] = {'index': index, 'status': 'duplicate', 'transaction': self.get_serializer(existing[key]).data}
+            elif key and key in first_index_for_key:
+                duplicates[index] = first_index_for_key[key]
+            else:
+                if key:
+                    first_index_for_key[key] = index
+                violation = check_transaction_policy(request.user, item, len(pending_items), pending_amount)
+                if violation:
+                    results[index] = {'index': index, 'status': 'rejected',
+                                      'error': 'Transaction blocked by your security preferences', 'details': violation}
+                    continue
+                pending_indexes.append(index)
+                pending_items.append(item)
+                pending_keys.append(key)
+                pending_amount += item['amount']
+        
+        outcomes = process_transaction_batch(pending_items, pending_keys)
+        record_transaction_policy(request.user, [outcome for outcome in outcomes if isinstance(outcome, Transaction)])
+        for index, outcome in zip(pending_indexes, outcomes):
+            if isinstance(outcome, Transaction):
+                results[index] = {'index': index, 'status': 'created', 'transaction': self.get_serializer(outcome).data}
+            elif 'duplicate' in outcome:
+                results[index] = {'index': index, 'status': 'duplicate', 'transaction': self.get_serializer(outcome['duplicate']).data}
+            else:
+                results[index] = {'index': index, 'status': 'rejected', **outcome}
+        
+        for index, original_index in duplicates.items():
+            original = results[original_index]
+            results[index] = {**original, 'index': index, 'status': 'duplicate' if original['status'] == 'created' else original['status']}
+        
+        created = sum(1 for result in results if result['status'] == 'created')
+        return Response({
+            'created': created,
+            'failed': len(results) - created,
+            'results': results
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
 
-class SmartContractViewSet(viewsets.ModelViewSet):
+class TokenTransfersProtectedMixin:
+    """
+    Answers 409 instead of deleting a token, or the contract of a token,
+    that has indexed transfers. Their token balances are kept by the ledger.
+    """
+    
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response({'error': 'Tokens with indexed transfers cannot be deleted'}, status=status.HTTP_409_CONFLICT)
+
+class SmartContractViewSet(TokenTransfersProtectedMixin, viewsets.ModelViewSet):
     """
     API endpoint for smart contracts
     """
     serializer_class = SmartContractSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('-created_at', '-id')
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
         return SmartContract.objects.filter(owner=self.request.user)
     
     def perform_create(self, serializer):
-        # Deploy contract to blockchain
-        contract_data = serializer.validated_data
-        deployment_result = deploy_contract(contract_data)
-        
-        serializer.save(
-            owner=self.request.user,
-            address=deployment_result['address'],
-            creation_tx_hash=deployment_result['tx_hash']
-        )
+        # Record a pending deployment; the address is filled in once the receipt is mined
+        contract = serializer.save(owner=self.request.user, status='PENDING')
+        submit_deployment(contract)
 
-class TokenViewSet(viewsets.ModelViewSet):
+class TokenViewSet(TokenTransfersProtectedMixin, viewsets.ModelViewSet):
     """
     API endpoint for tokens
     """
     serializer_class = TokenSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('id',)
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
         return Token.objects.all()
+    
+    def list(self, request, *args, **kwargs):
+        # The token list changes rarely, so the serialized pages are cached until a Token is saved
+        return cached_api_response(
+            request, 'token_list', ('tokens',),
+            lambda: super(TokenViewSet, self).list(request, *args, **kwargs).data
+        )
 
 class TokenBalanceViewSet(viewsets.ModelViewSet):
     """
@@ -92,32 +249,135 @@ class TokenBalanceViewSet(viewsets.ModelViewSet):
     """
     serializer_class = TokenBalanceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    keyset_ordering = ('id',)
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
-        user = self.request.user
-        user_wallets = user.wallets.all()
-        return TokenBalance.objects.filter(wallet__in=user_wallets)
+        # token is read by the serializer for token_symbol and token_name
+        return TokenBalance.objects.filter(wallet__user=self.request.user).select_related('token')
+
+# Async API views, served without a thread per request in ASGI mode
+def _validate_submission(request, data):
+    """
+    Validates a submission for submit_transaction_async_view.
+    
+    Returns:
+        Tuple of (serializer, errors, idempotency_key, existing), where
+        existing is the serialized transaction stored by an earlier
+        submission with the same idempotency key
+    """
+    serializer = TransactionSerializer(data=data, context={'request': request})
+    with timed('validate'):
+        is_valid = serializer.is_valid()
+    if not is_valid:
+        return serializer, serializer.errors, None, None
+    if serializer.validated_data['from_wallet'].id not in wallet_ids(request.user):
+        return serializer, {'from_wallet': ['Not found.']}, None, None
+    
+    try:
+        idempotency_key = get_idempotency_key(serializer.validated_data, request.headers.get('Idempotency-Key', ''))
+    except ValueError as error:
+        return serializer, {'error': str(error)}, None, None
+    existing = (
+        Transaction.objects.for_user(request.user).filter(idempotency_key=idempotency_key).first()
+        if idempotency_key else None
+    )
+    if existing:
+        return serializer, None, idempotency_key, TransactionSerializer(existing).data
+    
+    violation = check_transaction_policy(request.user, serializer.validated_data)
+    if violation:
+        return serializer, {'error': 'Transaction blocked by your security preferences', 'details': violation}, None, None
+    return serializer, None, idempotency_key, None
+
+def _save_submission(request, serializer, tx_hash, signature, idempotency_key):
+    try:
+        with timed('save'), db_transaction.atomic():
+            transaction = serializer.save(
+                tx_hash=tx_hash,
+                signature=signature['signature'],
+                signature_algorithm=signature['algorithm'],
+                idempotency_key=idempotency_key
+            )
+    except IntegrityError:
+        # A concurrent retry of the same submission was stored first
+        existing = (
+            Transaction.objects.filter(from_wallet=serializer.validated_data['from_wallet'], idempotency_key=idempotency_key).first()
+            if idempotency_key else None
+        )
+        if existing is None:
+            raise
+        return TransactionSerializer(existing).data, status.HTTP_200_OK
+    record_transaction_policy(request.user, [transaction])
+    return TransactionSerializer(transaction).data, status.HTTP_201_CREATED
+
+@jwt_required
+@admit('create_transaction')
+async def submit_transaction_async_view(request):
+    """
+    Async counterpart of TransactionViewSet.create_transaction. Scoring runs
+    in the inference pool and the node is awaited, so the event loop serves
+    other submissions meanwhile. Answers 503 with Retry-After when the
+    inference pool is saturated.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    data = json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer, errors, idempotency_key, existing = await sync_to_async(_validate_submission)(request, data)
+    if errors is not None:
+        return JsonResponse(errors, status=status.HTTP_400_BAD_REQUEST)
+    if existing is not None:
+        return JsonResponse(existing, status=status.HTTP_200_OK)
+    
+    # Check for anomalies using AI
+    try:
+        with timed('anomaly'):
+            is_anomaly, confidence = await score_transaction(serializer.validated_data)
+    except InferenceSaturated as saturated:
+        return service_unavailable(saturated.retry_after, 'Transaction scoring is at capacity')
+    if is_anomaly and confidence > 0.8:
+        return JsonResponse({
+            'error': 'Potential security risk detected',
+            'details': 'This transaction has been flagged as anomalous',
+            'confidence': confidence
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Sign transaction with quantum-resistant algorithm and send it to the blockchain
+    signature = await sync_to_async(sign_transaction_quantum)(serializer.validated_data, serializer.validated_data['from_wallet'])
+    tx_hash = await send_transaction_async(serializer.validated_data, signature)
+    
+    data, status_code = await sync_to_async(_save_submission)(request, serializer, tx_hash, signature, idempotency_key)
+    return JsonResponse(data, status=status_code)
 
 # Web views
 @login_required
 def transaction_list_view(request):
-    user_wallets = request.user.wallets.all()
-    transactions = Transaction.objects.filter(from_wallet__in=user_wallets).order_by('-timestamp')
-    return render(request, 'blockchain/transaction_list.html', {'transactions': transactions})
+    transactions, next_cursor = paginate_keyset_for_request(request, Transaction.objects.for_user(request.user))
+    return render(request, 'blockchain/transaction_list.html', {'transactions': transactions, 'next_cursor': next_cursor})
 
 @login_required
 def transaction_detail_view(request, tx_hash):
-    user_wallets = request.user.wallets.all()
-    transaction = get_object_or_404(Transaction, tx_hash=tx_hash, from_wallet__in=user_wallets)
+    transaction = get_object_or_404(Transaction.objects.for_user(request.user), tx_hash=tx_hash)
     return render(request, 'blockchain/transaction_detail.html', {'transaction': transaction})
 
 @login_required
+@admit('create_transaction')
 def create_transaction_view(request):
     if request.method == 'POST':
         form = TransactionForm(request.POST, user=request.user)
-        if form.is_valid():
+        with timed('validate'):
+            is_valid = form.is_valid()
+        if is_valid:
             transaction_data = form.cleaned_data
             
+            violation = check_transaction_policy(request.user, transaction_data)
+            if violation:
+                messages.error(request, f'Transaction blocked: {violation}')
+                return redirect('transaction_list')
+            
             # Check for anomalies using AI
             is_anomaly, confidence = check_transaction_anomaly(transaction_data)
             if is_anomaly and confidence > 0.8:
@@ -131,12 +391,14 @@ def create_transaction_view(request):
             # Send transaction to blockchain
             tx_hash = send_transaction(transaction_data, signature)
             
-            # Save transaction
+            # Save transaction; its ledger entries are posted in the same database transaction
             transaction = form.save(commit=False)
             transaction.tx_hash = tx_hash
             transaction.signature = signature['signature']
             transaction.signature_algorithm = signature['algorithm']
-            transaction.save()
+            with timed('save'), db_transaction.atomic():
+                transaction.save()
+            record_transaction_policy(request.user, [transaction])
             
             messages.success(request, 'Transaction submitted successfully')
             return redirect('transaction_detail', tx_hash=tx_hash)
@@ -157,19 +419,13 @@ def deploy_smart_contract_view(request):
         if form.is_valid():
             contract = form.save(commit=False)
             contract.owner = request.user
-            
-            # Deploy contract to blockchain
-            deployment_result = deploy_contract({
-                'name': contract.name,
-                'abi': contract.abi,
-                'bytecode': contract.bytecode
-            })
-            
-            contract.address = deployment_result['address']
-            contract.creation_tx_hash = deployment_result['tx_hash']
+            contract.status = 'PENDING'
             contract.save()
             
-            messages.success(request, 'Smart contract deployed successfully')
+            # Deploy contract to blockchain in the background
+            submit_deployment(contract)
+            
+            messages.success(request, 'Smart contract deployment submitted')
             return redirect('smart_contract_list')
     else:
         form = SmartContractForm()
@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for quantum_defi.
+
+The application is preloaded in the master, which loads and freezes the
+ML models before forking so the workers share them (quantum_defi.prefork).
+Run with: gunicorn -c gunicorn.conf.py
+
+SERVER_MODE=asgi serves quantum_defi.asgi with uvicorn workers instead,
+for the async API views.
+"""
+
+import logging
+import multiprocessing
+import os
+
+if os.environ.get('SERVER_MODE') == 'asgi':
+    wsgi_app = 'quantum_defi.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'quantum_defi.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+logger = logging.getLogger('gunicorn.error')
+
+def on_starting(server):
+    # Latency histograms restart with the server
+    from quantum_defi.instrumentation import clear_metrics
+    clear_metrics()
+
+def when_ready(server):
+    # Runs in the master after the application is loaded and before any worker is forked
+    from quantum_defi.prefork import format_memory, memory_usage, preload
+    preload()
+    usage = memory_usage()
+    if usage:
+        logger.info("Master memory after preload: %s", format_memory(usage))
+
+def post_worker_init(worker):
+    from quantum_defi.prefork import format_memory, memory_usage
+    from quantum_defi.profiler import install_signal_handler
+
+    # Gunicorn resets signal handlers in each worker
+    install_signal_handler()
+    usage = memory_usage()
+    if usage:
+        logger.info("Worker %s memory after start: %s", worker.pid, format_memory(usage))
+
+def worker_exit(server, worker):
+    from quantum_defi.prefork import format_memory, memory_usage
+    usage = memory_usage()
+    if usage:
+        logger.info("Worker %s memory at exit: %s", worker.pid, format_memory(usage))
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class QuantumCryptoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quantum_crypto'
-
+    
+    def ready(self):
+        # Register signal handlers that invalidate cached responses
+        from . import signals
@@ -0,0 +1,20 @@
+"""
+Facade for the quantum-resistant key operations. Each function imports
+its implementation in quantum_crypto.utils.key_management on its first
+call, so a native OQS backend is only loaded by workers that use it.
+"""
+
+from quantum_defi.lazy import lazy_function, load_modules
+
+KEY_MANAGEMENT = 'quantum_crypto.utils.key_management'
+
+MODULES = (KEY_MANAGEMENT,)
+
+generate_quantum_key_pair = lazy_function(KEY_MANAGEMENT, 'generate_quantum_key_pair')
+sign_transaction_quantum = lazy_function(KEY_MANAGEMENT, 'sign_transaction_quantum')
+rotate_quantum_key = lazy_function(KEY_MANAGEMENT, 'rotate_quantum_key')
+encrypt_quantum = lazy_function(KEY_MANAGEMENT, 'encrypt_quantum')
+decrypt_quantum = lazy_function(KEY_MANAGEMENT, 'decrypt_quantum')
+
+def load():
+    load_modules(MODULES)
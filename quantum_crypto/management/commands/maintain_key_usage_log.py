@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from quantum_crypto.utils.partitions import drop_expired, ensure_partitions
+
+class Command(BaseCommand):
+    help = 'Creates upcoming monthly KeyUsageLog partitions and drops those past the retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=None, help='Future months to create partitions for')
+        parser.add_argument('--retention-months', type=int, default=None, help='Months of history to keep')
+
+    def handle(self, *args, **options):
+        created = ensure_partitions(ahead=options['ahead'])
+        for name in created:
+            self.stdout.write(f"Created partition {name}")
+
+        expired = drop_expired(retention_months=options['retention_months'])
+        if isinstance(expired, int):
+            self.stdout.write(self.style.SUCCESS(f"Deleted {expired} expired key usage records"))
+        else:
+            for name in expired:
+                self.stdout.write(f"Dropped partition {name}")
+            self.stdout.write(self.style.SUCCESS(f"Created {len(created)} and dropped {len(expired)} partitions"))
@@ -0,0 +1,114 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QuantumKey",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key_id", models.CharField(max_length=255, unique=True)),
+                (
+                    "key_type",
+                    models.CharField(
+                        choices=[
+                            ("Kyber768", "Kyber-768"),
+                            ("Kyber1024", "Kyber-1024"),
+                            ("Dilithium2", "Dilithium-2"),
+                            ("Dilithium3", "Dilithium-3"),
+                            ("Falcon512", "Falcon-512"),
+                            ("Falcon1024", "Falcon-1024"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("public_key_hash", models.CharField(max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("last_used", models.DateTimeField(blank=True, null=True)),
+                ("is_active", models.BooleanField(default=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="quantum_keys",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="KeyUsageLog",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("operation", models.CharField(max_length=100)),
+                ("timestamp", models.DateTimeField(auto_now_add=True)),
+                ("ip_address", models.GenericIPAddressField(blank=True, null=True)),
+                ("user_agent", models.TextField(blank=True, null=True)),
+                ("success", models.BooleanField(default=True)),
+                (
+                    "quantum_key",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="usage_logs",
+                        to="quantum_crypto.quantumkey",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="KeyShare",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("share_id", models.CharField(max_length=255)),
+                ("holder_identifier", models.CharField(max_length=255)),
+                ("encrypted_share", models.TextField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "quantum_key",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="shares",
+                        to="quantum_crypto.quantumkey",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("quantum_key", "share_id")},
+            },
+        ),
+    ]
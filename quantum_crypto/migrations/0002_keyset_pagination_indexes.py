@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quantum_crypto", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="quantumkey",
+            index=models.Index(
+                fields=["user", "-created_at", "-id"], name="qkey_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 4.2.10 on 2026-10-19 17:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+TABLE = "quantum_crypto_keyusagelog"
+
+
+def _month(year, month):
+    return f"{year + (month - 1) // 12:04d}-{(month - 1) % 12 + 1:02d}-01"
+
+
+def partition_by_month(apps, schema_editor):
+    """
+    Rebuilds KeyUsageLog as a table range-partitioned by month on timestamp,
+    with partitions for every month that has rows plus the next two, and a
+    default partition for anything else. PostgreSQL only.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_old")
+        # Frees the primary key name for the new table
+        cursor.execute(f"ALTER INDEX {TABLE}_pkey RENAME TO {TABLE}_old_pkey")
+        cursor.execute(f"""
+            CREATE TABLE {TABLE} (
+                id bigserial NOT NULL,
+                operation varchar(100) NOT NULL,
+                timestamp timestamp with time zone NOT NULL,
+                ip_address inet NULL,
+                user_agent text NULL,
+                success boolean NOT NULL,
+                quantum_key_id bigint NOT NULL
+                    REFERENCES quantum_crypto_quantumkey (id) DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp)
+        """)
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        # Months with existing rows, plus the current month and two ahead
+        cursor.execute(f"""
+            SELECT DISTINCT EXTRACT(YEAR FROM month)::int, EXTRACT(MONTH FROM month)::int
+            FROM (
+                SELECT date_trunc('month', timestamp AT TIME ZONE 'UTC') AS month FROM {TABLE}_old
+                UNION SELECT date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => n)
+                FROM generate_series(0, 2) AS n
+            ) AS months
+        """)
+        for year, month in cursor.fetchall():
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{year:04d}{month:02d} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{_month(year, month)} 00:00:00+00') TO ('{_month(year, month + 1)} 00:00:00+00')"
+            )
+
+        cursor.execute(f"""
+            INSERT INTO {TABLE} (id, operation, timestamp, ip_address, user_agent, success, quantum_key_id)
+            SELECT id, operation, timestamp, ip_address, user_agent, success, quantum_key_id FROM {TABLE}_old
+        """)
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{TABLE}', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {TABLE}"
+        )
+        cursor.execute(f"DROP TABLE {TABLE}_old")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("quantum_crypto", "0002_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="keyusagelog",
+            name="quantum_key",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="usage_logs",
+                to="quantum_crypto.quantumkey",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="keyusagelog",
+            name="timestamp",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+        migrations.RunPython(partition_by_month, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="keyusagelog",
+            index=models.Index(
+                fields=["quantum_key", "timestamp"], name="keyusage_key_time_idx"
+            ),
+        ),
+    ]
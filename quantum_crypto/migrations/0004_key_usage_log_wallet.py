@@ -0,0 +1,45 @@
+# Generated by Django 4.2.10 on 2026-10-19 18:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_securitypreference_max_window_transactions"),
+        ("quantum_crypto", "0003_key_usage_log_partitioning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="keyusagelog",
+            name="wallet",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="key_usage_logs",
+                to="accounts.wallet",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="keyusagelog",
+            name="quantum_key",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="usage_logs",
+                to="quantum_crypto.quantumkey",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="keyusagelog",
+            index=models.Index(
+                fields=["wallet", "timestamp"], name="keyusage_wallet_time_idx"
+            ),
+        ),
+    ]
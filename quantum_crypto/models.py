@@ -1,5 +1,6 @@
 from django.db import models
-from accounts.models import User
+from django.utils import timezone
+from accounts.models import User, Wallet
 
 class QuantumKey(models.Model):
     """
@@ -25,6 +26,11 @@ class QuantumKey(models.Model):
     # The actual private key is never stored in the database
     # It's stored securely using the dKMS (Decentralized Key Management System)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='qkey_user_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.key_type} - {self.key_id[:10]}..."
 
@@ -48,13 +54,26 @@ class KeyUsageLog(models.Model):
     """
     Logs usage of quantum keys for auditing and security monitoring.
     """
-    quantum_key = models.ForeignKey(QuantumKey, on_delete=models.CASCADE, related_name='usage_logs')
+    # Covered by keyusage_key_time_idx, which leads with quantum_key. Null for
+    # wallet key operations whose public key hash has no QuantumKey row
+    quantum_key = models.ForeignKey(QuantumKey, on_delete=models.CASCADE, related_name='usage_logs', null=True, blank=True, db_index=False)
+    # Set for wallet key operations such as sign_transaction; covered by keyusage_wallet_time_idx
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='key_usage_logs', null=True, blank=True, db_index=False)
     operation = models.CharField(max_length=100)  # e.g., "sign_transaction", "encrypt_message"
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the operation is logged; rows are written later by the buffered audit writer
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(null=True, blank=True)
     success = models.BooleanField(default=True)
     
+    class Meta:
+        # On PostgreSQL the table is partitioned by month on timestamp (migration 0003)
+        indexes = [
+            models.Index(fields=['quantum_key', 'timestamp'], name='keyusage_key_time_idx'),
+            models.Index(fields=['wallet', 'timestamp'], name='keyusage_wallet_time_idx'),
+        ]
+    
     def __str__(self):
-        return f"{self.operation} - {self.quantum_key.key_id[:10]}... - {self.timestamp}"
+        subject = f"{self.quantum_key.key_id[:10]}..." if self.quantum_key_id else self.wallet.address
+        return f"{self.operation} - {subject} - {self.timestamp}"
 
@@ -16,6 +16,6 @@ class KeyShareSerializer(serializers.ModelSerializer):
 class KeyUsageLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = KeyUsageLog
-        fields = ['id', 'quantum_key', 'operation', 'timestamp', 'ip_address', 'user_agent', 'success']
+        fields = ['id', 'quantum_key', 'wallet', 'operation', 'timestamp', 'ip_address', 'user_agent', 'success']
         read_only_fields = ['timestamp']
 
@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import QuantumKey
+from quantum_defi.response_cache import invalidate
+
+@receiver([post_save, post_delete], sender=QuantumKey)
+def invalidate_quantum_key_responses(sender, instance, **kwargs):
+    invalidate('quantum_keys', instance.user_id)
@@ -0,0 +1,191 @@
+"""
+Buffered writer for the KeyUsageLog audit trail.
+
+Key operations append a record to an in-process buffer instead of running
+an INSERT each. A background thread writes the buffer in one statement
+(COPY on PostgreSQL, bulk_create elsewhere) once it holds AUDIT_FLUSH_SIZE
+records or AUDIT_FLUSH_INTERVAL seconds after its oldest record, and the
+remainder is written at interpreter exit. Records keep the time they were
+logged, not the time they were flushed.
+"""
+
+import atexit
+import csv
+import io
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from accounts.models import Wallet
+from quantum_crypto.models import KeyUsageLog, QuantumKey
+
+logger = logging.getLogger(__name__)
+
+COPY_COLUMNS = ('quantum_key_id', 'wallet_id', 'operation', 'timestamp', 'ip_address', 'user_agent', 'success')
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+def _audit_setting(name, default):
+    return settings.QUANTUM_CRYPTO_SETTINGS.get(name, default)
+
+def _resolve_keys(records):
+    """
+    Fills in quantum_key_id for records that identify their key by public
+    key hash, with one query per flush. Wallet keys usually have no
+    QuantumKey row; their records keep a null key and are found through
+    wallet_id instead.
+    """
+    hashes = {record['public_key_hash'] for record in records if record.get('quantum_key_id') is None}
+    key_ids = dict(
+        QuantumKey.objects.filter(public_key_hash__in=hashes).values_list('public_key_hash', 'id')
+    ) if hashes else {}
+
+    rows = []
+    for record in records:
+        record = dict(record)
+        public_key_hash = record.pop('public_key_hash', None)
+        if record.get('quantum_key_id') is None:
+            record['quantum_key_id'] = key_ids.get(public_key_hash)
+        rows.append(record)
+    return rows
+
+def _copy_rows(rows):
+    # QUOTE_NONNUMERIC quotes every string, so an unquoted empty field is NULL
+    # and a quoted one is an empty string
+    data = io.StringIO()
+    writer = csv.writer(data, quoting=csv.QUOTE_NONNUMERIC)
+    for row in rows:
+        writer.writerow([
+            row[column].isoformat() if column == 'timestamp' else row[column]
+            for column in COPY_COLUMNS
+        ])
+    data.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {KeyUsageLog._meta.db_table} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+            data
+        )
+
+def write_records(records):
+    """
+    Writes audit records to KeyUsageLog in one statement.
+
+    Args:
+        records: List of dictionaries with COPY_COLUMNS keys, where
+            quantum_key_id may be replaced by public_key_hash and wallet_id
+            may be None
+
+    Returns:
+        Number of rows written
+    """
+    rows = _resolve_keys(records)
+    if not rows:
+        return 0
+    if connection.vendor == 'postgresql':
+        _copy_rows(rows)
+    else:
+        KeyUsageLog.objects.bulk_create([KeyUsageLog(**row) for row in rows], batch_size=1000)
+    return len(rows)
+
+class KeyUsageBuffer:
+    """
+    Thread-safe buffer of audit records with a background flusher.
+    """
+
+    def __init__(self, flush_size=None, flush_interval=None, max_pending=None):
+        self.flush_size = flush_size or _audit_setting('AUDIT_FLUSH_SIZE', 500)
+        self.flush_interval = flush_interval or _audit_setting('AUDIT_FLUSH_INTERVAL', 2)
+        # Upper bound kept in memory while the database is unavailable
+        self.max_pending = max_pending or self.flush_size * 20
+
+        self._records = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            if len(self._records) >= self.flush_size:
+                self._wakeup.set()
+            if self._thread is None:
+                self._start()
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name='key-usage-audit', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Writes all buffered records. On failure they are put back, up to
+        max_pending records, and retried on the next flush.
+
+        Returns:
+            Number of rows written
+        """
+        with self._flush_lock:
+            with self._lock:
+                records, self._records = self._records, []
+            if not records:
+                return 0
+            try:
+                return write_records(records)
+            except Exception:
+                logger.exception("Failed to write %d key usage records", len(records))
+                with self._lock:
+                    self._records = (records + self._records)[-self.max_pending:]
+                return 0
+
+def get_key_usage_buffer():
+    """
+    Returns the process-wide audit buffer, registering its exit-time flush on first use.
+    """
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = KeyUsageBuffer()
+                atexit.register(_buffer.flush)
+    return _buffer
+
+def log_key_usage(operation, quantum_key=None, public_key_hash=None, wallet=None, request=None, success=True):
+    """
+    Records a key operation in the audit trail without touching the database.
+
+    Args:
+        operation: Operation name, e.g. 'sign_transaction'
+        quantum_key: QuantumKey object or id
+        public_key_hash: Public key hash identifying the key when no QuantumKey is at hand
+        wallet: Wallet object or id whose key was used
+        request: Optional request supplying the client IP address and user agent
+        success: Whether the operation succeeded
+    """
+    if isinstance(quantum_key, QuantumKey):
+        quantum_key = quantum_key.id
+    if isinstance(wallet, Wallet):
+        wallet = wallet.id
+    get_key_usage_buffer().add({
+        'quantum_key_id': quantum_key,
+        'wallet_id': wallet,
+        'public_key_hash': public_key_hash,
+        'operation': operation,
+        'timestamp': timezone.now(),
+        'ip_address': request.META.get('REMOTE_ADDR') if request is not None else None,
+        'user_agent': request.META.get('HTTP_USER_AGENT') if request is not None else None,
+        'success': success,
+    })
@@ -6,6 +6,9 @@ from datetime import datetime
 from django.conf import settings
 import secrets
 
+from .audit import log_key_usage
+from quantum_defi.instrumentation import timed
+
 # In a real implementation, you would use the liboqs library
 # This is a simulated implementation for demonstration purposes
 
@@ -68,6 +71,7 @@ def generate_quantum_key_pair(key_type='Kyber768', num_shares=5, threshold=3):
         'shares': shares
     }
 
+@timed('sign')
 def sign_transaction_quantum(transaction_data, wallet):
     """
     Signs a transaction using a quantum-resistant algorithm.
@@ -88,6 +92,9 @@ def sign_transaction_quantum(transaction_data, wallet):
     tx_string = f"{wallet.address}:{transaction_data['to_address']}:{transaction_data['amount']}:{transaction_data['gas_fee']}"
     simulated_signature = hashlib.sha512(tx_string.encode()).hexdigest()
     
+    # Buffered, so signing does not wait on an audit INSERT
+    log_key_usage('sign_transaction', public_key_hash=wallet.public_key_hash, wallet=wallet)
+    
     return {
         'signature': simulated_signature,
         'algorithm': wallet.key_algorithm
@@ -8,6 +8,8 @@ import hashlib
 import json
 from django.conf import settings
 
+from quantum_defi.instrumentation import timed
+
 # In a real implementation, you would import the pyoqs library
 # import oqs
 
@@ -46,6 +48,7 @@ class OQSWrapper:
         return OQSWrapper.SUPPORTED_SIGS
     
     @staticmethod
+    @timed('oqs_generate_keypair')
     def generate_keypair(algorithm):
         """
         Generates a key pair using the specified algorithm.
@@ -80,6 +83,7 @@ class OQSWrapper:
         }
     
     @staticmethod
+    @timed('oqs_sign')
     def sign(message, private_key, algorithm):
         """
         Signs a message using the specified algorithm and private key.
@@ -108,6 +112,7 @@ class OQSWrapper:
         return signature
     
     @staticmethod
+    @timed('oqs_verify')
     def verify(message, signature, public_key, algorithm):
         """
         Verifies a signature using the specified algorithm and public key.
@@ -134,6 +139,7 @@ class OQSWrapper:
         return True
     
     @staticmethod
+    @timed('oqs_encapsulate')
     def encapsulate(public_key, algorithm):
         """
         Encapsulates a shared secret using the specified algorithm and public key.
@@ -164,6 +170,7 @@ class OQSWrapper:
         }
     
     @staticmethod
+    @timed('oqs_decapsulate')
     def decapsulate(ciphertext, private_key, algorithm):
         """
         Decapsulates a shared secret using the specified algorithm and private key.
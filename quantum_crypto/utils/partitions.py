@@ -0,0 +1,124 @@
+"""
+Monthly partition maintenance for the KeyUsageLog table.
+
+On PostgreSQL the table is range-partitioned on timestamp (see migration
+0003), with one partition per calendar month and a default partition
+catching anything outside them. Partitions are created ahead of time and
+whole months past the retention period are dropped, which removes old
+audit rows without a large DELETE. Other databases fall back to deleting
+expired rows.
+
+Partitions must exist before their month starts: PostgreSQL refuses to
+create one for a range that already has rows in the default partition.
+"""
+
+import logging
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from quantum_crypto.models import KeyUsageLog
+
+logger = logging.getLogger(__name__)
+
+TABLE = KeyUsageLog._meta.db_table
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+def partition_name(start):
+    return f"{TABLE}_p{start:%Y%m}"
+
+def is_partitioned():
+    """
+    Returns True if the KeyUsageLog table is a partitioned PostgreSQL table.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+def list_partitions():
+    """
+    Returns the names of the monthly partitions, oldest first.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = %s::regclass",
+            [TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f"{TABLE}_p"
+    return sorted(name for name in names if name.startswith(prefix) and name[len(prefix):].isdigit())
+
+def ensure_partitions(ahead=None, now=None):
+    """
+    Creates the partitions for the current month and the next few months.
+
+    Args:
+        ahead: Number of future months to create, defaults to AUDIT_PARTITIONS_AHEAD
+        now: Reference time, defaults to the current time
+
+    Returns:
+        List of partitions created
+    """
+    if not is_partitioned():
+        return []
+    ahead = settings.QUANTUM_CRYPTO_SETTINGS.get('AUDIT_PARTITIONS_AHEAD', 2) if ahead is None else ahead
+    current = month_start(now or timezone.now())
+    existing = set(list_partitions())
+
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(ahead + 1):
+            start = add_months(current, offset)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [start, add_months(start, 1)]
+            )
+            created.append(name)
+    return created
+
+def drop_expired(retention_months=None, now=None):
+    """
+    Removes audit rows older than the retention period, by dropping whole
+    monthly partitions on PostgreSQL or deleting rows elsewhere.
+
+    Args:
+        retention_months: Months of history to keep, defaults to AUDIT_RETENTION_MONTHS
+        now: Reference time, defaults to the current time
+
+    Returns:
+        List of partitions dropped, or the number of rows deleted when the
+        table is not partitioned
+    """
+    if retention_months is None:
+        retention_months = settings.QUANTUM_CRYPTO_SETTINGS.get('AUDIT_RETENTION_MONTHS', 12)
+    cutoff = add_months(month_start(now or timezone.now()), -retention_months)
+
+    if not is_partitioned():
+        deleted, _ = KeyUsageLog.objects.filter(timestamp__lt=cutoff).delete()
+        return deleted
+
+    dropped = []
+    with connection.cursor() as cursor:
+        for name in list_partitions():
+            if name >= partition_name(cutoff):
+                break
+            cursor.execute(f'DROP TABLE "{name}"')
+            dropped.append(name)
+    for name in dropped:
+        logger.info("Dropped expired key usage partition %s", name)
+    return dropped
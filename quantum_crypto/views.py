@@ -6,9 +6,13 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from quantum_defi.admission import AdmissionThrottle, admit, request_cost
+from quantum_defi.pagination import paginate_keyset_for_request
+from quantum_defi.response_cache import cached_context, cached_page
 from .models import QuantumKey, KeyShare, KeyUsageLog
 from .serializers import QuantumKeySerializer, KeyShareSerializer, KeyUsageLogSerializer
-from .utils.key_management import generate_quantum_key_pair, rotate_quantum_key
+from .crypto import generate_quantum_key_pair, rotate_quantum_key
+from .utils.audit import log_key_usage
 
 class QuantumKeyViewSet(viewsets.ModelViewSet):
     """
@@ -16,10 +20,19 @@ class QuantumKeyViewSet(viewsets.ModelViewSet):
     """
     serializer_class = QuantumKeySerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [AdmissionThrottle]
+    admission_scopes = {'generate_key': 'generate_key', 'rotate_key': 'rotate_key'}
+    keyset_ordering = ('-created_at', '-id')
+    query_budget = {'list': 2, 'retrieve': 2}
     
     def get_queryset(self):
         return QuantumKey.objects.filter(user=self.request.user)
     
+    def admission_cost(self, request, scope):
+        if scope == 'generate_key':
+            return request_cost(scope, request.data.get('key_type', 'Kyber768'))
+        return request_cost(scope, _key_type(request.user, pk=self.kwargs.get('pk')))
+    
     @action(detail=False, methods=['post'])
     def generate_key(self, request):
         key_type = request.data.get('key_type', 'Kyber768')
@@ -43,6 +56,7 @@ class QuantumKeyViewSet(viewsets.ModelViewSet):
                 holder_identifier=f"node_{i+1}",
                 encrypted_share=share
             )
+        log_key_usage('generate_key', quantum_key, request=request)
         
         return Response(self.get_serializer(quantum_key).data, status=status.HTTP_201_CREATED)
     
@@ -67,16 +81,29 @@ class QuantumKeyViewSet(viewsets.ModelViewSet):
                 holder_identifier=f"node_{i+1}",
                 encrypted_share=share
             )
+        log_key_usage('rotate_key', quantum_key, request=request)
         
         return Response(self.get_serializer(quantum_key).data)
 
+def _key_type(user, **lookup):
+    # Algorithm of the key being rotated, which weights the rotation's admission cost
+    return QuantumKey.objects.filter(user=user, **lookup).values_list('key_type', flat=True).first()
+
 # Web views
 @login_required
+@cached_page('quantum_key_list', ('quantum_keys',))
 def quantum_key_list_view(request):
-    keys = QuantumKey.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'quantum_crypto/key_list.html', {'keys': keys})
+    def build_context():
+        keys, next_cursor = paginate_keyset_for_request(
+            request, QuantumKey.objects.filter(user=request.user), ordering=('-created_at', '-id')
+        )
+        return {'keys': keys, 'next_cursor': next_cursor}
+    
+    context = cached_context(request, 'quantum_key_list', ('quantum_keys',), build_context)
+    return render(request, 'quantum_crypto/key_list.html', context)
 
 @login_required
+@admit('generate_key', cost=lambda request: request_cost('generate_key', request.POST.get('key_type', 'Kyber768')))
 def generate_quantum_key_view(request):
     if request.method == 'POST':
         key_type = request.POST.get('key_type', 'Kyber768')
@@ -100,6 +127,7 @@ def generate_quantum_key_view(request):
                 holder_identifier=f"node_{i+1}",
                 encrypted_share=share
             )
+        log_key_usage('generate_key', quantum_key, request=request)
         
         messages.success(request, f'New {key_type} quantum key generated successfully')
         return redirect('quantum_key_list')
@@ -107,6 +135,7 @@ def generate_quantum_key_view(request):
     return render(request, 'quantum_crypto/generate_key.html')
 
 @login_required
+@admit('rotate_key', cost=lambda request, key_id: request_cost('rotate_key', _key_type(request.user, key_id=key_id)))
 def rotate_quantum_key_view(request, key_id):
     quantum_key = get_object_or_404(QuantumKey, key_id=key_id, user=request.user)
     
@@ -128,6 +157,7 @@ def rotate_quantum_key_view(request, key_id):
                 holder_identifier=f"node_{i+1}",
                 encrypted_share=share
             )
+        log_key_usage('rotate_key', quantum_key, request=request)
         
         messages.success(request, 'Quantum key rotated successfully')
         return redirect('quantum_key_list')
@@ -0,0 +1,320 @@
+"""
+Token-bucket admission control for expensive endpoints.
+
+Each request to a guarded endpoint costs tokens. The cost is the
+endpoint's base cost from ADMISSION['COSTS'], scaled for key generation
+and rotation by the algorithm's weight in ADMISSION['ALGORITHM_COSTS'].
+A FrodoKEM key pair therefore uses up a budget faster than a Kyber one.
+The tokens are taken from two buckets:
+
+- The user's bucket for the endpoint, refilled at USER_RATE tokens a
+  second up to USER_BURST.
+- The endpoint's bucket shared by all users, refilled at ENDPOINT_RATE
+  up to ENDPOINT_BURST. It caps the total CPU an endpoint can take.
+
+ADMISSION['SCOPE_LIMITS'] overrides these four settings for one scope,
+so an endpoint priced per item, such as transaction batches, can hold a
+bucket sized to its largest request.
+
+The user's bucket is charged first, so a client that exceeds its own
+rate is turned away before it touches the shared bucket. One tenant's
+spike therefore cannot exhaust the endpoint for everyone else. Rejected
+requests get 429 with a Retry-After header and are counted in
+ADMISSION_METRIC. A request costing more than a full bucket could never
+be admitted, so it gets 413 instead.
+
+The buckets live in a memory-mapped file under ADMISSION['PATH'], which
+is tmpfs by default, so all workers on a host share them. The table is
+set-associative: a key may only occupy the slots of one group, and
+updates to a group hold an fcntl lock on its byte range. When a group is
+full, the slot updated longest ago is reused; such a bucket would have
+refilled completely by then anyway.
+
+Usage:
+    class SecurityScanViewSet(viewsets.ModelViewSet):
+        throttle_classes = [AdmissionThrottle]
+        admission_scopes = {'start_scan': 'start_scan'}
+
+    @login_required
+    @admit('start_scan')
+    def start_scan_view(request):
+"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from quantum_defi.instrumentation import ADMISSION_METRIC, increment
+
+# Slots per group; a key's bucket is always in its group
+GROUP_SIZE = 8
+
+_table = None
+_table_lock = threading.Lock()
+
+def _setting(name, default=None):
+    return getattr(settings, 'ADMISSION', {}).get(name, default)
+
+class BucketTable:
+    """
+    Token buckets shared by the processes mapping the same file.
+
+    Each slot holds a 16-byte key digest, the tokens left and the time they
+    were counted.
+    """
+    SLOT = struct.Struct('<16sdd')
+
+    def __init__(self, path, slots):
+        self.pid = os.getpid()
+        self.groups = max(slots // GROUP_SIZE, 1)
+        self.group_size = GROUP_SIZE * self.SLOT.size
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = self.groups * self.group_size
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        # fcntl locks exclude other processes only, so threads also take this lock
+        self._lock = threading.Lock()
+
+    def take(self, key, cost, rate, capacity):
+        """
+        Takes cost tokens from the bucket for key if it holds enough.
+
+        Args:
+            key: Bucket name
+            cost: Tokens the request needs
+            rate: Tokens added per second
+            capacity: Largest number of tokens the bucket holds
+
+        Returns:
+            Tuple of (admitted, retry_after), where retry_after is the
+            number of seconds until the bucket holds cost tokens. A cost
+            above capacity is never admitted.
+        """
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        group = int.from_bytes(digest[:8], 'little') % self.groups
+        start = group * self.group_size
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.group_size, start)
+            try:
+                # Read under the lock, so a slower writer never moves the refill time back
+                now = time.time()
+                offset, tokens, updated = self._find(digest, start, capacity)
+                tokens = min(capacity, tokens + max(now - updated, 0.0) * rate)
+                admitted = tokens >= cost
+                if admitted:
+                    tokens -= cost
+                self.SLOT.pack_into(self._map, offset, digest, tokens, now)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.group_size, start)
+
+        return admitted, 0.0 if admitted else (cost - tokens) / rate
+
+    def refund(self, key, cost, capacity):
+        """
+        Returns tokens taken for a request that was turned away later.
+        """
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        group = int.from_bytes(digest[:8], 'little') % self.groups
+        start = group * self.group_size
+
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.group_size, start)
+            try:
+                offset, tokens, updated = self._find(digest, start, capacity)
+                self.SLOT.pack_into(self._map, offset, digest, min(capacity, tokens + cost), updated)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.group_size, start)
+
+    def _find(self, digest, start, capacity):
+        # Returns the key's slot, or a free or the least recently updated one for a new full bucket
+        oldest = None
+        for offset in range(start, start + self.group_size, self.SLOT.size):
+            slot_digest, tokens, updated = self.SLOT.unpack_from(self._map, offset)
+            if slot_digest == digest:
+                return offset, tokens, updated
+            if oldest is None or updated < oldest[1]:
+                oldest = (offset, updated)
+        return oldest[0], capacity, time.time()
+
+def get_table():
+    """
+    Returns the bucket table of the current process, mapping it on first
+    use. A forked worker maps the file again instead of sharing its
+    parent's lock state.
+    """
+    global _table
+    if _table is None or _table.pid != os.getpid():
+        with _table_lock:
+            if _table is None or _table.pid != os.getpid():
+                _table = BucketTable(_setting('PATH'), _setting('SLOTS', 65536))
+    return _table
+
+def request_cost(scope, key_type=None):
+    """
+    Returns the tokens a request to scope costs, weighted by the key
+    algorithm for key generation and rotation.
+    """
+    cost = _setting('COSTS', {}).get(scope, 1)
+    if key_type is not None:
+        cost *= _setting('ALGORITHM_COSTS', {}).get(key_type, 1)
+    return cost
+
+def _limit(scope, name, default):
+    # A scope's own bucket setting, or the shared one
+    return _setting('SCOPE_LIMITS', {}).get(scope, {}).get(name, _setting(name, default))
+
+def max_request_cost(scope):
+    """
+    Returns the largest cost that fits in both of an endpoint's buckets.
+    """
+    return min(_limit(scope, 'USER_BURST', 20), _limit(scope, 'ENDPOINT_BURST', 100))
+
+def _client_id(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f"user:{user.pk}"
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+def admit_request(request, scope, cost):
+    """
+    Charges a request to its user's and its endpoint's buckets.
+
+    Args:
+        request: Django or REST framework request
+        scope: Endpoint name, a key of ADMISSION['COSTS']
+        cost: Tokens the request needs, from request_cost()
+
+    Returns:
+        Tuple of (admitted, retry_after), where retry_after is None for a
+        request that costs more than a full bucket and is never admitted
+    """
+    if not _setting('ENABLED', True):
+        return True, 0.0
+
+    user_burst = _limit(scope, 'USER_BURST', 20)
+    if cost > max_request_cost(scope):
+        increment(ADMISSION_METRIC, (('scope', scope), ('bucket', 'size')))
+        return False, None
+
+    table = get_table()
+    user_key = f"{scope}:{_client_id(request)}"
+    admitted, retry_after = table.take(user_key, cost, _limit(scope, 'USER_RATE', 1.0), user_burst)
+    if not admitted:
+        increment(ADMISSION_METRIC, (('scope', scope), ('bucket', 'user')))
+        return False, retry_after
+
+    admitted, retry_after = table.take(
+        f"{scope}:*", cost, _limit(scope, 'ENDPOINT_RATE', 20.0), _limit(scope, 'ENDPOINT_BURST', 100)
+    )
+    if not admitted:
+        # The request is not served, so it should not count against the user
+        table.refund(user_key, cost, user_burst)
+        increment(ADMISSION_METRIC, (('scope', scope), ('bucket', 'endpoint')))
+    return admitted, retry_after
+
+class RequestTooLarge(APIException):
+    status_code = 413
+    default_detail = 'This request costs more than the endpoint ever admits at once.'
+    default_code = 'request_too_large'
+
+class AdmissionThrottle(BaseThrottle):
+    """
+    REST framework throttle applying admission control to the actions
+    listed in the view's admission_scopes ({action: scope}). A view may
+    define admission_cost(request, scope) to price requests, e.g. by key
+    algorithm; request_cost(scope) is used otherwise.
+    """
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'admission_scopes', {}).get(getattr(view, 'action', None))
+        if scope is None:
+            return True
+        cost_for = getattr(view, 'admission_cost', None)
+        cost = cost_for(request, scope) if cost_for is not None else request_cost(scope)
+        admitted, self.retry_after = admit_request(request, scope, cost)
+        if self.retry_after is None:
+            raise RequestTooLarge(_too_large_message(scope, cost))
+        return admitted
+
+    def wait(self):
+        return self.retry_after
+
+def too_many_requests(retry_after, as_json=False):
+    """
+    Returns a 429 response asking the client to retry after retry_after seconds.
+    """
+    seconds = max(int(retry_after + 0.999), 1)
+    error = f'Too many requests, retry in {seconds} seconds'
+    response = JsonResponse({'error': error}, status=429) if as_json else HttpResponse(error, status=429)
+    response['Retry-After'] = str(seconds)
+    return response
+
+def _too_large_message(scope, cost):
+    return f'This request costs {cost:g} tokens; at most {max_request_cost(scope):g} are admitted at once'
+
+def request_too_large(scope, cost, as_json=False):
+    """
+    Returns a 413 response for a request that costs more than a full bucket.
+    """
+    error = _too_large_message(scope, cost)
+    return JsonResponse({'error': error}, status=413) if as_json else HttpResponse(error, status=413)
+
+def admit(scope, cost=None, methods=('POST',)):
+    """
+    Decorates a Django view, sync or async, with admission control. Place
+    it inside the decorator that authenticates the user.
+
+    Args:
+        scope: Endpoint name, a key of ADMISSION['COSTS']
+        cost: Optional callable (request, *args, **kwargs) returning the
+            request's cost; request_cost(scope) is used otherwise
+        methods: Methods that are charged, so pages holding a form stay free
+    """
+    def check(request, args, kwargs, as_json):
+        # Returns the rejection response, or None to serve the request
+        if request.method not in methods:
+            return None
+        tokens = cost(request, *args, **kwargs) if cost is not None else request_cost(scope)
+        admitted, retry_after = admit_request(request, scope, tokens)
+        if admitted:
+            return None
+        if retry_after is None:
+            return request_too_large(scope, tokens, as_json=as_json)
+        return too_many_requests(retry_after, as_json=as_json)
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                rejection = check(request, args, kwargs, as_json=True)
+                if rejection is not None:
+                    return rejection
+                return await view(request, *args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rejection = check(request, args, kwargs, as_json=False)
+            if rejection is not None:
+                return rejection
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
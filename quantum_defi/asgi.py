@@ -1,5 +1,9 @@
 """
 ASGI config for quantum_defi project.
+
+Served by gunicorn with uvicorn workers when SERVER_MODE=asgi (see
+gunicorn.conf.py). The async API views then share one event loop per
+worker, and model scoring runs in ai_security.inference_pool.
 """
 
 import os
@@ -0,0 +1,61 @@
+"""
+Helpers for the async API views served in ASGI mode.
+
+REST framework views are synchronous, so the async views are plain Django
+views. jwt_required authenticates them with the same JWT access tokens as
+the REST API, and they answer with JsonResponse. ORM calls go through
+sync_to_async.
+"""
+
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from quantum_defi.authentication import CachedJWTAuthentication
+
+def _authenticate(request):
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return authenticated[0] if authenticated is not None else None
+
+def jwt_required(view):
+    """
+    Decorates an async view that requires a JWT access token. The
+    authenticated user is set as request.user. Bearer tokens are not sent
+    by browsers on their own, so the view is exempt from CSRF checks.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await sync_to_async(_authenticate)(request)
+        if user is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    # Set directly, as Django 4.2's csrf_exempt wraps coroutines in a sync function
+    wrapper.csrf_exempt = True
+    return wrapper
+
+def json_body(request):
+    """
+    Returns the request's JSON object body, or None if it is not one.
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def service_unavailable(retry_after, error):
+    """
+    Returns a 503 response asking the client to retry after a number of seconds.
+    """
+    response = JsonResponse({'error': error}, status=503)
+    response['Retry-After'] = str(retry_after)
+    return response
@@ -0,0 +1,177 @@
+"""
+JWT authentication with cached token validation and user lookup.
+
+The stock JWTAuthentication decodes and verifies every access token and
+then loads its user, and the views load the user's wallets once more to
+check ownership. CachedJWTAuthentication keeps both in process memory:
+
+- Validated tokens, keyed by the encoded token and kept until it expires.
+  An access token cannot change, so it is verified only once per process.
+- The user and the ids of the user's wallets, for AUTH_CACHE['TTL']
+  seconds. wallet_ids() reads the set from the authenticated user.
+
+Saving or deleting a User or Wallet bumps the owner's generation in a
+memory-mapped table under AUTH_CACHE['PATH'] (from the signal handlers in
+accounts). All workers on a host share the table, and an entry whose
+generation has moved is loaded again. Workers on other hosts pick up the
+change when the TTL runs out.
+"""
+
+import copy
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction as db_transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+GENERATION = struct.Struct('<Q')
+
+_tokens = OrderedDict()
+_users = OrderedDict()
+_lock = threading.Lock()
+_generations = None
+
+def _setting(name, default=None):
+    return getattr(settings, 'AUTH_CACHE', {}).get(name, default)
+
+class GenerationTable:
+    """
+    Per-user change counters shared by the processes mapping the same
+    file. Users share a counter when their ids collide, which only costs
+    an extra reload.
+    """
+
+    def __init__(self, path, slots):
+        self.pid = os.getpid()
+        self.slots = slots
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            size = slots * GENERATION.size
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def get(self, user_id):
+        return GENERATION.unpack_from(self._map, (user_id % self.slots) * GENERATION.size)[0]
+
+    def bump(self, user_id):
+        # A fresh clock value rather than an increment, which would need a lock
+        GENERATION.pack_into(self._map, (user_id % self.slots) * GENERATION.size, time.time_ns())
+
+def get_generations():
+    """
+    Returns the generation table of the current process, mapping it on first use.
+    """
+    global _generations
+    if _generations is None or _generations.pid != os.getpid():
+        with _lock:
+            if _generations is None or _generations.pid != os.getpid():
+                _generations = GenerationTable(_setting('PATH'), _setting('SLOTS', 65536))
+    return _generations
+
+def _remember(entries, key, value):
+    # Called with _lock held
+    entries[key] = value
+    entries.move_to_end(key)
+    while len(entries) > _setting('MAX_ENTRIES', 10000):
+        entries.popitem(last=False)
+
+def invalidate_user(user_id):
+    """
+    Drops the cached user and wallet set of a user in every worker on this
+    host once the current database transaction commits. Bumping earlier
+    would let another worker cache the rows as they were before the commit.
+    """
+    if user_id is not None:
+        db_transaction.on_commit(lambda: get_generations().bump(user_id))
+
+def _load_user(user_id):
+    """
+    Returns (user, wallet ids) for a user id, from the cache when its
+    entry is fresh, or None if the user does not exist.
+    """
+    generations = get_generations()
+    generation = generations.get(user_id)
+    with _lock:
+        entry = _users.get(user_id)
+    if entry is not None and entry[2] == generation and entry[3] > time.monotonic():
+        return entry[0], entry[1]
+
+    # The generation is read before the rows, so a change committed in
+    # between leaves this entry with an old generation and it is reloaded
+    user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+    if user is None:
+        return None
+    ids = frozenset(user.wallets.values_list('id', flat=True))
+    with _lock:
+        _remember(_users, user_id, (user, ids, generation, time.monotonic() + _setting('TTL', 30)))
+    return user, ids
+
+def wallet_ids(user):
+    """
+    Returns the ids of a user's wallets. The set is cached on the user
+    object, so it is queried at most once per request, and not at all for
+    users authenticated by CachedJWTAuthentication.
+    """
+    ids = getattr(user, '_wallet_ids', None)
+    if ids is None:
+        ids = user._wallet_ids = frozenset(user.wallets.values_list('id', flat=True))
+    return ids
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that verifies each token once per process and serves
+    the user from the cache described above.
+    """
+
+    def get_validated_token(self, raw_token):
+        now = time.time()
+        with _lock:
+            entry = _tokens.get(raw_token)
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        validated_token = super().get_validated_token(raw_token)
+        expires = validated_token.get('exp')
+        if expires is not None:
+            with _lock:
+                _remember(_tokens, raw_token, (validated_token, expires))
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not isinstance(user_id, int):
+            # The generation table is indexed by integer ids
+            return super().get_user(validated_token)
+        loaded = _load_user(user_id)
+        if loaded is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        cached_user, ids = loaded
+
+        if not cached_user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(cached_user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # Each request gets its own copy, as views may set attributes on request.user
+        user = copy.copy(cached_user)
+        user._wallet_ids = ids
+        return user
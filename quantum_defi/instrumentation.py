@@ -0,0 +1,349 @@
+"""
+Always-on latency instrumentation for requests and hot-path stages.
+
+timed() is a context manager and decorator that measures a named stage,
+such as anomaly scoring or signing. InstrumentationMiddleware measures each
+request and reports the stages it ran in a Server-Timing header. It also
+adds both to latency histograms labelled with the endpoint's URL route.
+
+Each worker process keeps its histograms in its own memory-mapped file
+under INSTRUMENTATION['METRICS_DIR'], which is tmpfs by default. Recording
+a value is a dictionary lookup and one write into the map, with no locking
+between processes. metrics_view merges the files of every worker into the
+Prometheus text format. Files of exited workers still count towards the
+totals, so counters never go backwards. clear_metrics() empties the
+directory when the server starts.
+"""
+
+import glob
+import hmac
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+REQUEST_METRIC = 'quantum_defi_request_duration_seconds'
+STAGE_METRIC = 'quantum_defi_stage_duration_seconds'
+ADMISSION_METRIC = 'quantum_defi_admission_rejected_total'
+
+METRIC_HELP = {
+    REQUEST_METRIC: 'Time spent handling requests, by endpoint route.',
+    STAGE_METRIC: 'Time spent in instrumented stages, by endpoint route.',
+    ADMISSION_METRIC: 'Requests turned away by admission control, by scope and exhausted bucket.',
+}
+
+# Counters are stored as histogram series whose count is the total
+COUNTER_METRICS = {ADMISSION_METRIC}
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Stages timed during the current request, or None outside a request
+_request_stages = ContextVar('request_stages', default=None)
+
+_store = None
+_store_lock = threading.Lock()
+
+def _setting(name, default=None):
+    return getattr(settings, 'INSTRUMENTATION', {}).get(name, default)
+
+def _buckets():
+    return tuple(_setting('BUCKETS', DEFAULT_BUCKETS))
+
+class MetricsFile:
+    """
+    Histograms of one process, kept in a memory-mapped file.
+
+    The file starts with the number of slots in use and the number of
+    values per slot. Each slot holds a JSON-encoded series key followed by
+    one count per bucket (the last being +Inf), the sum and the count. A
+    slot is fully written before the slot count is raised, so readers
+    never see a partial key.
+    """
+    HEADER = struct.Struct('<QQ')
+    KEY_SIZE = 192
+    INITIAL_SLOTS = 128
+
+    def __init__(self, directory, buckets):
+        self.buckets = buckets
+        self.values = struct.Struct(f'<{len(buckets) + 3}d')
+        self.slot_size = self.KEY_SIZE + self.values.size
+        self.pid = os.getpid()
+
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'metrics-{self.pid}.db')
+        self._file = open(self.path, 'w+b')
+        self._map = None
+        self._capacity = 0
+        self._series = {}
+        self._lock = threading.Lock()
+        self._resize(self.INITIAL_SLOTS)
+
+    def _resize(self, capacity):
+        self._file.truncate(self.HEADER.size + capacity * self.slot_size)
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._capacity = capacity
+
+    def _add_series(self, name, labels):
+        if len(self._series) == self._capacity:
+            self._resize(self._capacity * 2)
+        key = json.dumps([name, labels]).encode()
+        if len(key) > self.KEY_SIZE:
+            raise ValueError(f"Metric series key is longer than {self.KEY_SIZE} bytes: {key!r}")
+        offset = self.HEADER.size + len(self._series) * self.slot_size
+        self._map[offset:offset + len(key)] = key
+        series = self._series[(name, labels)] = (offset + self.KEY_SIZE, [0.0] * (len(self.buckets) + 3))
+        self.HEADER.pack_into(self._map, 0, len(self._series), len(self.buckets) + 3)
+        return series
+
+    def observe(self, name, labels, seconds):
+        """
+        Adds a duration to a histogram series.
+
+        Args:
+            name: Metric name
+            labels: Tuple of (label, value) pairs
+            seconds: Observed duration
+        """
+        with self._lock:
+            series = self._series.get((name, labels)) or self._add_series(name, labels)
+            offset, values = series
+            values[bisect_left(self.buckets, seconds)] += 1
+            values[-2] += seconds
+            values[-1] += 1
+            self.values.pack_into(self._map, offset, *values)
+
+def get_store():
+    """
+    Returns the metrics file of the current process. A forked worker gets a
+    file of its own instead of writing into its parent's.
+    """
+    global _store
+    if _store is None or _store.pid != os.getpid():
+        with _store_lock:
+            if _store is None or _store.pid != os.getpid():
+                _store = MetricsFile(_setting('METRICS_DIR'), _buckets())
+    return _store
+
+def _record_stage(stage, seconds):
+    stages = _request_stages.get()
+    if stages is not None:
+        # The middleware records the stage once it knows the endpoint
+        stages.append((stage, seconds))
+    else:
+        get_store().observe(STAGE_METRIC, (('endpoint', ''), ('stage', stage)), seconds)
+
+def increment(name, labels):
+    """
+    Adds one to a counter series, e.g. ADMISSION_METRIC.
+
+    Args:
+        name: Metric name, one of COUNTER_METRICS
+        labels: Tuple of (label, value) pairs
+    """
+    get_store().observe(name, labels, 0.0)
+
+class timed:
+    """
+    Measures a stage, as a context manager or a function decorator.
+
+    Usage:
+        with timed('save'):
+            transaction.save()
+
+        @timed('sign')
+        def sign_transaction_quantum(...):
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _record_stage(self.stage, perf_counter() - self._start)
+        return False
+
+    def __call__(self, func):
+        stage = self.stage
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record_stage(stage, perf_counter() - start)
+
+        return wrapper
+
+def _endpoint(request):
+    # The route pattern rather than the path keeps the label set bounded
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+def server_timing(stages, total):
+    """
+    Formats stage durations as a Server-Timing header value, summing
+    repeated stages.
+    """
+    durations = {}
+    for stage, seconds in stages:
+        durations[stage] = durations.get(stage, 0.0) + seconds
+    durations['total'] = total
+    return ', '.join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in durations.items())
+
+class InstrumentationMiddleware:
+    """
+    Records request and stage latencies per endpoint and adds a
+    Server-Timing header. Place it first in MIDDLEWARE so the timing
+    covers the other middleware too. It runs natively under both WSGI
+    and ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = _setting('SERVER_TIMING', True)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stages = []
+        token = _request_stages.set(stages)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stages.reset(token)
+        return self._record(request, response, stages, perf_counter() - start)
+
+    async def __acall__(self, request):
+        stages = []
+        token = _request_stages.set(stages)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_stages.reset(token)
+        return self._record(request, response, stages, perf_counter() - start)
+
+    def _record(self, request, response, stages, elapsed):
+        endpoint = _endpoint(request)
+        store = get_store()
+        store.observe(
+            REQUEST_METRIC,
+            (('endpoint', endpoint), ('method', request.method), ('status', f"{response.status_code // 100}xx")),
+            elapsed
+        )
+        for stage, seconds in stages:
+            store.observe(STAGE_METRIC, (('endpoint', endpoint), ('stage', stage)), seconds)
+
+        if self.server_timing:
+            response['Server-Timing'] = server_timing(stages, elapsed)
+        return response
+
+def read_metrics(directory=None):
+    """
+    Merges the histograms of every process writing to the metrics directory.
+
+    Returns:
+        Tuple of (buckets, series), where series maps (name, labels) to
+        per-bucket counts followed by the sum and the count
+    """
+    buckets = _buckets()
+    width = len(buckets) + 3
+    values = struct.Struct(f'<{width}d')
+    slot_size = MetricsFile.KEY_SIZE + values.size
+    merged = {}
+
+    for path in glob.glob(os.path.join(directory or _setting('METRICS_DIR'), 'metrics-*.db')):
+        try:
+            with open(path, 'rb') as source:
+                data = source.read()
+        except FileNotFoundError:
+            continue
+        if len(data) < MetricsFile.HEADER.size:
+            continue
+        used, file_width = MetricsFile.HEADER.unpack_from(data, 0)
+        # Files written with a different bucket layout cannot be merged
+        if file_width != width:
+            continue
+        for index in range(used):
+            offset = MetricsFile.HEADER.size + index * slot_size
+            name, labels = json.loads(data[offset:offset + MetricsFile.KEY_SIZE].rstrip(b'\0'))
+            key = (name, tuple(tuple(label) for label in labels))
+            counts = values.unpack_from(data, offset + MetricsFile.KEY_SIZE)
+            total = merged.setdefault(key, [0.0] * width)
+            for position, value in enumerate(counts):
+                total[position] += value
+    return buckets, merged
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{name}="{_label_value(value)}"' for name, value in labels) + '}'
+
+def render_metrics(directory=None):
+    """
+    Returns the merged histograms and counters in the Prometheus text
+    exposition format.
+    """
+    buckets, series = read_metrics(directory)
+    lines = []
+    for metric in METRIC_HELP:
+        lines.append(f"# HELP {metric} {METRIC_HELP[metric]}")
+        lines.append(f"# TYPE {metric} {'counter' if metric in COUNTER_METRICS else 'histogram'}")
+        for (name, labels), values in sorted(series.items()):
+            if name != metric:
+                continue
+            if metric in COUNTER_METRICS:
+                lines.append(f"{metric}{_format_labels(labels)} {values[-1]:.0f}")
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), values):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', bound),))} {cumulative:.0f}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {values[-2]!r}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {values[-1]:.0f}")
+    return '\n'.join(lines) + '\n'
+
+def clear_metrics(directory=None):
+    """
+    Removes every process's metrics file. Call before workers start, e.g.
+    from the server's startup hook, to reset the totals.
+    """
+    for path in glob.glob(os.path.join(directory or _setting('METRICS_DIR'), 'metrics-*.db')):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def metrics_view(request):
+    """
+    Serves the merged histograms to staff users, or to a scraper presenting
+    INSTRUMENTATION['METRICS_TOKEN'] as a bearer token.
+    """
+    token = _setting('METRICS_TOKEN')
+    authorization = request.headers.get('Authorization', '')
+    if not (request.user.is_authenticated and request.user.is_staff) and not (
+        token and hmac.compare_digest(authorization, f"Bearer {token}")
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,42 @@
+"""
+Deferred imports for modules that are expensive to load.
+
+numpy, pandas, scikit-learn and web3 take seconds to import between them.
+Views and other modules loaded at startup call into them through facade
+modules (ai_security.ml, blockchain.chain, quantum_crypto.crypto) whose
+functions import the implementation on first call. A worker that only
+serves login pages never loads them, and check_startup guards the budget.
+"""
+
+import importlib
+
+def lazy_function(module, name):
+    """
+    Returns a stand-in for module.name that imports module on its first call.
+
+    Args:
+        module: Dotted path of the implementing module
+        name: Name of the function in that module
+
+    Returns:
+        Callable with the same arguments and return value
+    """
+    target = None
+
+    def call(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = getattr(importlib.import_module(module), name)
+        return target(*args, **kwargs)
+
+    call.__name__ = call.__qualname__ = name
+    call.__doc__ = f"Calls {module}.{name}, importing it on first use."
+    return call
+
+def load_modules(modules):
+    """
+    Imports the implementation modules behind a facade ahead of their first
+    call, e.g. before forking workers.
+    """
+    for module in modules:
+        importlib.import_module(module)
@@ -0,0 +1,145 @@
+"""
+Keyset (cursor) pagination shared by the API ViewSets and the web list views.
+
+Pages are selected with a WHERE clause on the ordering columns of the last
+row seen, e.g. (timestamp, id) < (cursor_timestamp, cursor_id), instead of
+OFFSET, and no COUNT(*) is run. Each page therefore costs the same however
+deep the client has scrolled, provided an index matches the ordering.
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_ORDERING = ('-timestamp', '-id')
+CURSOR_QUERY_PARAM = 'cursor'
+
+def _split(ordering_field):
+    if ordering_field.startswith('-'):
+        return ordering_field[1:], True
+    return ordering_field, False
+
+def encode_cursor(row, ordering):
+    """
+    Encodes the ordering values of a row into an opaque cursor string.
+    """
+    values = [
+        row._meta.get_field(name).value_to_string(row)
+        for name, _ in map(_split, ordering)
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Decodes a cursor into typed ordering values.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(ordering):
+            raise ValueError("Cursor does not match ordering")
+        return [
+            model._meta.get_field(name).to_python(value)
+            for (name, _), value in zip(map(_split, ordering), values)
+        ]
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+
+def _after(ordering, values):
+    # Builds (a, b) > (x, y) as: a > x OR (a = x AND b > y), honouring per-column direction
+    condition = Q()
+    equal_prefix = Q()
+    for (name, descending), value in zip(map(_split, ordering), values):
+        lookup = 'lt' if descending else 'gt'
+        condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+def paginate_keyset(queryset, cursor=None, ordering=DEFAULT_ORDERING, page_size=None):
+    """
+    Returns one page of a queryset using keyset pagination.
+
+    Args:
+        queryset: QuerySet to paginate
+        cursor: Cursor returned with the previous page, or None for the first page
+        ordering: Ordering fields; the last one must be unique (normally id)
+        page_size: Rows per page, defaults to REST_FRAMEWORK['PAGE_SIZE']
+
+    Returns:
+        Tuple of (list of rows, cursor for the next page or None)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    page_size = page_size or settings.REST_FRAMEWORK.get('PAGE_SIZE', 10)
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = queryset.filter(_after(ordering, decode_cursor(cursor, queryset.model, ordering)))
+
+    # One extra row tells whether another page exists without a COUNT
+    rows = list(queryset[:page_size + 1])
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1], ordering)
+    return rows, None
+
+def paginate_keyset_for_request(request, queryset, ordering=DEFAULT_ORDERING, page_size=None):
+    """
+    paginate_keyset for template views, reading the cursor from the query string.
+
+    Raises:
+        Http404: If the cursor is malformed
+    """
+    try:
+        return paginate_keyset(queryset, request.GET.get(CURSOR_QUERY_PARAM), ordering, page_size)
+    except ValueError:
+        raise Http404("Invalid cursor")
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination class using paginate_keyset. Views choose their ordering
+    through a keyset_ordering attribute.
+    """
+    cursor_query_param = CURSOR_QUERY_PARAM
+    ordering = DEFAULT_ORDERING
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        try:
+            rows, self.next_cursor = paginate_keyset(
+                queryset, request.query_params.get(self.cursor_query_param), ordering
+            )
+        except ValueError:
+            raise NotFound("Invalid cursor")
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
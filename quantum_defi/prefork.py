@@ -0,0 +1,112 @@
+"""
+Pre-fork loading and memory reporting for gunicorn (see gunicorn.conf.py).
+
+With preload_app the master imports quantum_defi.wsgi once. preload()
+then does three things before the workers are forked:
+
+- Imports the ML, web3 and crypto stacks behind the lazy facades.
+- Loads the active anomaly model and the threat model.
+- Runs one prediction through each, so state the libraries build lazily
+  already exists.
+
+gc.freeze() then moves every object loaded so far out of the collector's
+reach. A worker's collections never write to those objects, so their
+pages stay shared copy-on-write and each worker only pays for what it
+allocates itself. memory_usage() reports that unique share (USS) next to
+RSS and PSS.
+"""
+
+import gc
+import logging
+import os
+from decimal import Decimal
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Representative input for the warm-up predictions
+WARMUP_TRANSACTION = {
+    'amount': Decimal('1'),
+    'gas_fee': Decimal('0.001'),
+    'transaction_type': 'SEND',
+    'to_address': '0x' + '0' * 40,
+}
+
+def warm_up():
+    """
+    Loads the models into the process-wide cache and runs one prediction through each.
+    """
+    from ai_security import ml
+
+    ml.check_transaction_anomaly(WARMUP_TRANSACTION)
+    ml.detect_threat(WARMUP_TRANSACTION)
+
+def preload():
+    """
+    Loads everything workers share and freezes it. Call in the master after
+    the application is imported and before workers are forked.
+    """
+    from ai_security import ml
+    from ai_security.ml_models.registry import loaded_models
+    from blockchain import chain
+    from quantum_crypto import crypto
+
+    for facade in (ml, chain, crypto):
+        facade.load()
+    warm_up()
+
+    # Forked workers must not inherit open database sockets
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded models %s and froze %d objects", ', '.join(loaded_models()), gc.get_freeze_count())
+
+def memory_usage(pid=None):
+    """
+    Reads a process's memory use from /proc/<pid>/smaps_rollup (Linux).
+
+    Args:
+        pid: Process id, defaults to the current process
+
+    Returns:
+        Dictionary of rss, pss, uss (private) and shared sizes in bytes,
+        or None where smaps_rollup is unavailable
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid or os.getpid()}/smaps_rollup") as rollup:
+            for line in rollup:
+                name, _, value = line.partition(':')
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == 'kB':
+                    fields[name] = int(parts[0]) * 1024
+    except OSError:
+        return None
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'uss': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'shared': fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0),
+    }
+
+def child_pids(parent_pid):
+    """
+    Returns the ids of a process's children, e.g. a gunicorn master's workers.
+    """
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # The command name is in parentheses and may contain spaces
+                fields = stat.read().rpartition(')')[2].split()
+        except OSError:
+            continue
+        if int(fields[1]) == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
+
+def format_memory(usage):
+    return ', '.join(f"{name} {value / 2 ** 20:.1f} MiB" for name, value in usage.items())
@@ -0,0 +1,261 @@
+"""
+Opt-in sampling profiler for live worker processes.
+
+A sampler thread reads the stack of every other thread with
+sys._current_frames() at a fixed interval and counts identical stacks.
+Nothing runs between profiles. While one runs, the cost is one stack walk
+per thread per interval. Results use the collapsed-stack format
+("frame;frame;frame count" per line), which flamegraph.pl and speedscope
+read directly.
+
+A profile is started in one worker in one of three ways:
+
+- Send PROFILER['SIGNAL'] to the worker's pid. The worker profiles
+  itself for DEFAULT_SECONDS.
+- POST to profiler_view. The worker serving the request profiles itself
+  for ?seconds=N.
+- Send the PROFILER['HEADER'] request header as an admin. ProfilingMiddleware
+  then samples only the thread serving that request, at the
+  REQUEST_INTERVAL rate.
+
+Profiles are written to PROFILER['OUTPUT_DIR'] and are listed and fetched
+through profiler_view. Everything is disabled unless PROFILER['ENABLED']
+is set, and none of it depends on DEBUG.
+"""
+
+import logging
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse, Http404
+from rest_framework import permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME = re.compile(r'^profile-\d+-\d+(?:-request)?\.folded$')
+
+_active = None
+_active_lock = threading.Lock()
+_labels = {}
+
+def _setting(name, default=None):
+    return getattr(settings, 'PROFILER', {}).get(name, default)
+
+def is_enabled():
+    return bool(_setting('ENABLED', False))
+
+def _frame_label(code):
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        # Paths below an import root are shortened to their module path
+        for root in sorted(sys.path, key=len, reverse=True):
+            if root and filename.startswith(root + os.sep):
+                filename = filename[len(root) + 1:]
+                break
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+    return label
+
+def collapse(frame, thread_name):
+    """
+    Returns a frame's stack as one collapsed line, outermost frame first.
+    """
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name.replace(';', ':').replace(' ', '_'))
+    return ';'.join(reversed(labels))
+
+class StackSampler:
+    """
+    Samples the stacks of the process's threads from a background thread.
+
+    Args:
+        interval: Seconds between samples
+        thread_id: Only sample this thread, e.g. the one serving a request
+    """
+
+    def __init__(self, interval, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, seconds=None, on_finish=None):
+        deadline = time.monotonic() + seconds if seconds else None
+        self._thread = threading.Thread(
+            target=self._run, args=(deadline, on_finish), name='stack-sampler', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _run(self, deadline, on_finish):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            frames = sys._current_frames()
+            if any(thread_id not in names for thread_id in frames):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id == own_id or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                self.counts[collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+            self.samples += 1
+            del frames
+        if on_finish is not None:
+            on_finish(self)
+
+    def collapsed(self):
+        """
+        Returns the samples in collapsed-stack format, most frequent stack first.
+        """
+        return ''.join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+    def write(self, suffix=''):
+        """
+        Writes the collapsed stacks to OUTPUT_DIR.
+
+        Returns:
+            Name of the profile file
+        """
+        directory = _setting('OUTPUT_DIR')
+        os.makedirs(directory, exist_ok=True)
+        name = f"profile-{os.getpid()}-{time.time_ns()}{suffix}.folded"
+        with open(os.path.join(directory, name), 'w') as output:
+            output.write(self.collapsed())
+        return name
+
+def _finish_profile(sampler):
+    global _active
+    try:
+        name = sampler.write()
+        logger.info("Wrote profile %s (%d samples)", name, sampler.samples)
+    finally:
+        _active = None
+
+def start_profile(seconds=None, blocking=True):
+    """
+    Starts profiling every thread of this process for a number of seconds.
+
+    Args:
+        seconds: Duration, defaults to DEFAULT_SECONDS and is capped at MAX_SECONDS
+        blocking: Wait for the start lock; the signal handler passes False
+
+    Returns:
+        Duration in seconds, or None if a profile is already running
+    """
+    global _active
+    seconds = min(seconds or _setting('DEFAULT_SECONDS', 30), _setting('MAX_SECONDS', 300))
+    if not _active_lock.acquire(blocking=blocking):
+        return None
+    try:
+        if _active is not None:
+            return None
+        _active = StackSampler(_setting('INTERVAL', 0.01)).start(seconds, on_finish=_finish_profile)
+    finally:
+        _active_lock.release()
+    return seconds
+
+def _handle_signal(signum, frame):
+    start_profile(blocking=False)
+
+def install_signal_handler():
+    """
+    Installs the PROFILER['SIGNAL'] handler in the current process. Gunicorn
+    resets signal handlers in each worker after forking, so call this
+    from its post_worker_init hook when the application is preloaded.
+    """
+    if not is_enabled() or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(getattr(signal, _setting('SIGNAL', 'SIGUSR2')), _handle_signal)
+    return True
+
+def _is_admin(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+    # API clients authenticate with JWT, which only DRF views check
+    try:
+        authenticated = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return False
+    return authenticated is not None and authenticated[0].is_staff
+
+class ProfilingMiddleware:
+    """
+    Profiles single requests that carry PROFILER['HEADER'] from an admin.
+    The name of the profile is returned in the same header. Place it after
+    AuthenticationMiddleware. It is synchronous, so under ASGI it moves
+    every request to a thread while the profiler is enabled.
+    """
+
+    def __init__(self, get_response):
+        if not is_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.header = _setting('HEADER', 'X-Profile')
+        install_signal_handler()
+
+    def __call__(self, request):
+        if not request.headers.get(self.header) or not _is_admin(request):
+            return self.get_response(request)
+
+        sampler = StackSampler(_setting('REQUEST_INTERVAL', 0.001), thread_id=threading.get_ident()).start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        response[self.header] = sampler.write(suffix='-request')
+        return response
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAdminUser])
+def profiler_view(request):
+    """
+    GET lists the profiles written on this host, or returns one with
+    ?name=. POST starts profiling the worker serving the request for
+    ?seconds=N.
+    """
+    if not is_enabled():
+        raise Http404
+
+    directory = _setting('OUTPUT_DIR')
+    if request.method == 'POST':
+        try:
+            seconds = int(request.query_params.get('seconds', 0)) or None
+        except ValueError:
+            return Response({'error': 'seconds must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        started = start_profile(seconds)
+        if started is None:
+            return Response({'error': 'A profile is already running in this worker'}, status=status.HTTP_409_CONFLICT)
+        return Response({'pid': os.getpid(), 'seconds': started}, status=status.HTTP_202_ACCEPTED)
+
+    name = request.query_params.get('name')
+    if name is None:
+        names = sorted(os.listdir(directory), reverse=True) if os.path.isdir(directory) else []
+        return Response({'profiles': [name for name in names if PROFILE_NAME.match(name)]})
+    if not PROFILE_NAME.match(name) or not os.path.exists(os.path.join(directory, name)):
+        raise Http404
+    return FileResponse(open(os.path.join(directory, name), 'rb'), content_type='text/plain; charset=utf-8')
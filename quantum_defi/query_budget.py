@@ -0,0 +1,73 @@
+"""
+Query budgets for API endpoints.
+
+Each ViewSet declares the maximum number of SQL queries its actions may
+run in a query_budget dictionary keyed by action name. The helpers below
+run a view under django.test.utils.CaptureQueriesContext and fail when an
+action goes over its budget, which catches N+1 regressions such as a
+serializer reading a relation that the queryset does not select_related.
+"""
+
+from contextlib import contextmanager
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a block of code runs more queries than its budget.
+    """
+
+@contextmanager
+def assert_max_queries(budget, label='block'):
+    """
+    Fails if the wrapped block runs more than budget queries.
+
+    Args:
+        budget: Maximum number of queries allowed
+        label: Name used in the failure message
+
+    Raises:
+        QueryBudgetExceeded: If the budget is exceeded
+    """
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    if len(context) > budget:
+        queries = '\n'.join(f"  {query['sql']}" for query in context.captured_queries)
+        raise QueryBudgetExceeded(f"{label} ran {len(context)} queries, budget is {budget}:\n{queries}")
+
+def get_query_budget(viewset_class, action):
+    """
+    Returns the declared query budget of a ViewSet action.
+
+    Raises:
+        ImproperlyConfigured: If the action has no declared budget
+    """
+    budget = getattr(viewset_class, 'query_budget', {}).get(action)
+    if budget is None:
+        raise ImproperlyConfigured(f"{viewset_class.__name__} declares no query budget for '{action}'")
+    return budget
+
+def assert_view_within_budget(viewset_class, request, action='list', **kwargs):
+    """
+    Calls a ViewSet action and fails if it exceeds its declared query budget.
+    The response is rendered inside the measured block so lazy serializer
+    access is counted too.
+
+    Args:
+        viewset_class: ViewSet class declaring query_budget
+        request: Request built with e.g. APIRequestFactory
+        action: Action name, e.g. 'list' or 'retrieve'
+        **kwargs: URL keyword arguments such as pk
+
+    Returns:
+        Rendered response
+    """
+    budget = get_query_budget(viewset_class, action)
+    view = viewset_class.as_view({request.method.lower(): action})
+    with assert_max_queries(budget, label=f"{viewset_class.__name__}.{action}"):
+        response = view(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    return response
@@ -0,0 +1,166 @@
+"""
+Per-user response caching with targeted invalidation.
+
+Cached entries are keyed by the generation numbers of the data scopes
+they were built from, e.g. a user's wallets or the shared token list.
+Saving or deleting a model bumps the generation of its scope (from the
+signal handlers in each app) when its transaction commits, so every entry built from the old data
+stops being addressed and simply expires; nothing has to be searched for
+or deleted. The same generations produce the ETag, which lets a
+conditional GET be answered with 304 from the cache alone.
+"""
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction as db_transaction
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from rest_framework.response import Response
+
+# Scopes shared by every user; all others are per user
+GLOBAL_SCOPES = frozenset({'tokens'})
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE.get('ALIAS', 'default')]
+
+def _timeout():
+    return settings.RESPONSE_CACHE.get('TIMEOUT', 300)
+
+def _generation_key(scope, user_id):
+    owner = '*' if scope in GLOBAL_SCOPES else user_id
+    return f"response-cache:gen:{scope}:{owner}"
+
+def get_generations(scopes, user_id):
+    """
+    Returns the current generation of each scope for a user in one cache round trip.
+    A generation that is missing (never bumped, or evicted) is started from
+    the clock so it cannot collide with one used before the eviction.
+    """
+    keys = [_generation_key(scope, user_id) for scope in scopes]
+    cache = _cache()
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, None)
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, missing.get(key)) for key in keys]
+
+def invalidate(scope, user_id=None):
+    """
+    Invalidates every cached entry built from a scope, for one user or,
+    for a global scope, for everyone, once the current database
+    transaction commits. Bumping earlier would let a request that reads
+    in between cache the rows as they were before the commit under the
+    new generation. Outside a transaction the bump is immediate.
+
+    Args:
+        scope: Scope name, e.g. 'wallets'
+        user_id: Owner of the changed data; ignored for global scopes
+    """
+    key = _generation_key(scope, user_id)
+    # A fresh clock value rather than incr(): the file backend's incr is a
+    # non-atomic read-modify-write that would also reset the key's timeout
+    db_transaction.on_commit(lambda: _cache().set(key, time.time_ns(), None))
+
+def cache_key(name, user_id, scopes, variant=''):
+    """
+    Builds the key of a cached entry from its current scope generations.
+
+    Args:
+        name: Name of the cached view or payload
+        user_id: User the entry belongs to
+        scopes: Scopes the entry is built from
+        variant: Anything else the content depends on, e.g. the query string
+
+    Returns:
+        Cache key string
+    """
+    generations = ':'.join(str(generation) for generation in get_generations(scopes, user_id))
+    digest = hashlib.md5(f"{variant}|{generations}".encode()).hexdigest()
+    return f"response-cache:{name}:{user_id}:{digest}"
+
+def etag_for(key):
+    return hashlib.md5(key.encode()).hexdigest()
+
+def get_or_build(key, builder):
+    """
+    Returns the cached value for key, building and storing it on a miss.
+    """
+    cache = _cache()
+    value = cache.get(key)
+    if value is None:
+        value = builder()
+        cache.set(key, value, _timeout())
+    return value
+
+def cached_context(request, name, scopes, builder):
+    """
+    Returns a template context for the current user, built by builder on a miss.
+    Builders must evaluate their querysets so the cached value holds rows, not queries.
+    """
+    key = cache_key(name, request.user.id, scopes, request.GET.urlencode())
+    return get_or_build(key, builder)
+
+def cached_page(name, scopes):
+    """
+    View decorator adding an ETag derived from the scope generations, so a
+    repeated GET with If-None-Match is answered with 304 before the view runs.
+    The ETag also covers the server mode, as pages render live updates
+    under ASGI only. Pages with pending flash messages get no ETag, as the
+    browser's copy would not show them, and neither do pages that used the
+    CSRF token, as the copy would hold an old one. Use under login_required.
+    """
+    def etag_func(request, *args, **kwargs):
+        if not request.user.is_authenticated or len(get_messages(request)):
+            return None
+        mode = 'asgi' if isinstance(request, ASGIRequest) else 'wsgi'
+        return etag_for(cache_key(name, request.user.id, scopes, f"{mode}|{request.GET.urlencode()}"))
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            # Set by get_token() when the page rendered {% csrf_token %}
+            if request.META.get('CSRF_COOKIE_NEEDS_UPDATE') and response.has_header('ETag'):
+                del response['ETag']
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
+
+def cached_api_response(request, name, scopes, builder):
+    """
+    Returns a DRF response for a cached serialized payload, honouring If-None-Match.
+
+    Args:
+        request: DRF request
+        name: Name of the cached payload
+        scopes: Scopes the payload is built from
+        builder: Callable returning the serialized data on a miss
+
+    Returns:
+        Response, or HttpResponseNotModified when the client's copy is current
+    """
+    key = cache_key(name, request.user.id, scopes, request.query_params.urlencode())
+    etag = f'"{etag_for(key)}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    response = Response(get_or_build(key, builder))
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
@@ -37,13 +38,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'quantum_defi.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'quantum_defi.static_files.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'quantum_defi.profiler.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,6 +84,81 @@ DATABASES = {
     }
 }
 
+# Cache
+# File-based so every worker process on the host sees the same entries and
+# invalidations; LocMemCache also works for a single-process deployment.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    }
+}
+
+# Per-user response cache for read-heavy pages and API payloads
+RESPONSE_CACHE = {
+    'ALIAS': 'default',  # Cache alias holding responses and scope generations
+    'TIMEOUT': 300,  # Seconds an entry lives if nothing invalidates it first
+}
+
+# Request and stage latency histograms, shared by all workers on the host
+INSTRUMENTATION = {
+    'METRICS_DIR': os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'quantum_defi_metrics'),  # Per-process histogram files
+    'BUCKETS': (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),  # Histogram upper bounds in seconds
+    'SERVER_TIMING': True,  # Add a Server-Timing header listing the stages of each response
+    'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),  # Bearer token accepted by /metrics besides staff sessions
+}
+
+# Token-bucket admission control for expensive endpoints (quantum_defi.admission)
+ADMISSION = {
+    'ENABLED': True,
+    'PATH': os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'quantum_defi_admission.db'),  # Bucket table shared by the workers on a host
+    'SLOTS': 65536,  # Buckets the table holds; the least recently used is reused when its group is full
+    'USER_RATE': 1.0,  # Tokens a second refilled into each user's bucket for an endpoint
+    'USER_BURST': 20,  # Tokens a user's bucket holds; costlier requests get 413
+    'ENDPOINT_RATE': 20.0,  # Tokens a second refilled into an endpoint's bucket shared by all users
+    'ENDPOINT_BURST': 100,  # Tokens an endpoint's bucket holds
+    'COSTS': {  # Base tokens per request
+        'generate_key': 2,
+        'rotate_key': 2,
+        'start_scan': 5,
+        'create_transaction': 1,
+        'create_transactions_batch': 1,  # Per transaction in the batch
+        'analyze_transaction': 1,
+    },
+    'ALGORITHM_COSTS': {  # Multipliers of the key generation and rotation cost, roughly by relative keygen time
+        'Kyber512': 1, 'Kyber768': 1, 'Kyber1024': 1.5,
+        'LightSaber': 1, 'Saber': 1, 'FireSaber': 1.5,
+        'NTRU-HPS-2048-509': 2, 'NTRU-HPS-2048-677': 3, 'NTRU-HPS-4096-821': 4,
+        'FrodoKEM-640-AES': 4, 'FrodoKEM-976-AES': 6, 'FrodoKEM-1344-AES': 8,
+        'BIKE-L1': 4, 'BIKE-L3': 8, 'BIKE-L5': 12,
+        'Dilithium2': 1, 'Dilithium3': 1.5, 'Dilithium5': 2,
+        'Falcon512': 5, 'Falcon-512': 5, 'Falcon1024': 10, 'Falcon-1024': 10,
+        'SPHINCS+-Haraka-128f-simple': 4, 'SPHINCS+-Haraka-256f-simple': 8,
+        'Rainbow-I': 10, 'Rainbow-III': 20, 'Rainbow-V': 20,
+    },
+    'SCOPE_LIMITS': {  # Bucket settings of a scope that differ from the ones above
+        # A full batch of BLOCKCHAIN_SETTINGS['MAX_BATCH_SIZE'] transactions fits in both buckets
+        'create_transactions_batch': {'USER_BURST': 500, 'ENDPOINT_BURST': 2000, 'ENDPOINT_RATE': 50.0},
+    },
+}
+
+# Sampling profiler for live workers; off unless PROFILER_ENABLED=1
+PROFILER = {
+    'ENABLED': os.environ.get('PROFILER_ENABLED') == '1',
+    'SIGNAL': 'SIGUSR2',  # Signal that makes a worker profile itself for DEFAULT_SECONDS
+    'INTERVAL': 0.01,  # Seconds between samples of a whole-worker profile
+    'REQUEST_INTERVAL': 0.001,  # Seconds between samples of a single-request profile
+    'DEFAULT_SECONDS': 30,  # Duration of a whole-worker profile
+    'MAX_SECONDS': 300,  # Longest whole-worker profile that can be requested
+    'HEADER': 'X-Profile',  # Request header that profiles one request; the response names the profile
+    'OUTPUT_DIR': os.path.join(tempfile.gettempdir(), 'quantum_defi_profiles'),  # Collapsed-stack profile files
+}
+
+# Checked by manage.py check_startup; the heavy stacks load lazily through facade modules
+STARTUP_BUDGET = {
+    'SECONDS': 1.0,  # Longest django.setup() plus URL resolution allowed
+    'FORBIDDEN_MODULES': ('numpy', 'pandas', 'sklearn', 'scipy', 'joblib', 'web3', 'eth_account', 'pyarrow'),  # Must not load at startup
+}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -118,12 +196,12 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'quantum_defi.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'quantum_defi.pagination.KeysetPagination',
     'PAGE_SIZE': 10,
 }
 
@@ -143,6 +221,14 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Validated tokens and authenticated users cached per worker
+AUTH_CACHE = {
+    'TTL': 30,  # Seconds a cached user and wallet set are trusted; bounds staleness on other hosts
+    'MAX_ENTRIES': 10000,  # Tokens and users kept per worker, least recently used dropped first
+    'PATH': os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'quantum_defi_auth.db'),  # Per-user change generations shared by the workers on a host
+    'SLOTS': 65536,  # Generation counters; users whose ids collide share one
+}
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -153,17 +239,61 @@ CORS_ALLOWED_ORIGINS = [
 BLOCKCHAIN_SETTINGS = {
     'ETHEREUM_NODE_URL': 'http://localhost:8545',  # Local Ganache or other Ethereum node
     'CHAIN_ID': 1337,  # Local development chain ID
+    'INDEXER_CONFIRMATIONS': 12,  # Blocks behind head before a block is indexed
+    'INDEXER_BATCH_BLOCKS': 100,  # Blocks per indexing round / backfill work item
+    'INDEXER_POLL_INTERVAL': 2,  # Seconds between head checks once caught up
+    'MAX_BATCH_SIZE': 500,  # Transactions accepted per batch submission; keep ADMISSION's batch bursts at least this large
+    'POLICY_WINDOW': 3600,  # Seconds of sends counted by the velocity limits
+    'POLICY_MAX_ENTRIES': 10000,  # Compiled policies kept per worker, least recently used dropped first
+    'POLICY_WINDOW_AMOUNT_MULTIPLE': 10,  # Total a user may send per window, in multiples of max_transaction_amount
+    'POLICY_REFRESH': 10,  # Seconds a compiled policy is reused before its velocity counts are read again
+    'QUANTUM_RESISTANT_ALGORITHMS': (  # Key algorithms allowed with quantum_resistant_only
+        'Kyber512', 'Kyber768', 'Kyber1024', 'Dilithium2', 'Dilithium3', 'Dilithium5',
+        'Falcon512', 'Falcon1024', 'Falcon-512', 'Falcon-1024', 'SPHINCS+-Haraka-128f-simple',
+        'SPHINCS+-Haraka-256f-simple', 'NTRU-HPS-2048-509', 'NTRU-HPS-2048-677', 'NTRU-HPS-4096-821',
+        'LightSaber', 'Saber', 'FireSaber', 'FrodoKEM-640-AES', 'FrodoKEM-976-AES', 'FrodoKEM-1344-AES',
+    ),
+    'BATCH_WORKERS': 8,  # Threads used to sign and send a batch
+    'GAS_ORACLE_INTERVAL': 12,  # Seconds between eth_feeHistory samples
+    'GAS_ORACLE_WINDOW': 20,  # Blocks kept in the rolling fee history window
+    'GAS_ORACLE_PERCENTILES': {'slow': 10, 'standard': 50, 'fast': 90},  # Priority fee reward percentiles
+    'DEPLOY_WORKERS': 4,  # Threads submitting contract deployments
+    'DEPLOY_RECEIPT_TIMEOUT': 120,  # Seconds a deploy thread waits for the receipt before leaving it to watch_deployments
+    'DEPLOY_REQUEUE_AFTER': 300,  # Seconds after which watch_deployments submits a PENDING deployment that has no transaction hash
+    'CONTRACT_CACHE_SIZE': 256,  # Contract factories kept per worker, least recently used dropped first
+    'IMPORT_CHUNK_SIZE': 50000,  # Source rows validated and inserted per committed import chunk
 }
 
 # Quantum cryptography settings
 QUANTUM_CRYPTO_SETTINGS = {
     'KEY_STORAGE_PATH': os.path.join(BASE_DIR, 'secure_keys'),
     'DEFAULT_ALGORITHM': 'Kyber768',  # Quantum-resistant algorithm
+    'AUDIT_FLUSH_SIZE': 500,  # Buffered key usage records that trigger a flush
+    'AUDIT_FLUSH_INTERVAL': 2,  # Seconds a key usage record may wait in the buffer
+    'AUDIT_PARTITIONS_AHEAD': 2,  # Future monthly KeyUsageLog partitions kept created
+    'AUDIT_RETENTION_MONTHS': 12,  # Months of key usage history kept before partitions are dropped
 }
 
 # AI Security settings
 AI_SECURITY_SETTINGS = {
     'MODEL_PATH': os.path.join(BASE_DIR, 'ai_security/ml_models/trained_models'),
     'ANOMALY_THRESHOLD': 0.95,
+    'EXPORT_CHUNK_SIZE': 50000,  # Rows per server-side cursor fetch and per exported record batch
+    'INFERENCE_WORKERS': int(os.environ.get('INFERENCE_WORKERS', 2)),  # Processes scoring transactions for the async views, per server worker
+    'INFERENCE_MAX_PENDING': 32,  # Scoring jobs queued or running per server worker before answering 503
+    'INFERENCE_RETRY_AFTER': 1,  # Seconds sent in Retry-After when scoring is saturated
+    'INFERENCE_START_METHOD': 'spawn',  # Inference processes must not inherit the event loop's threads
+    'VELOCITY_MAX_PER_MINUTE': 5,  # Decayed sends per minute above which a wallet's transactions are anomalous
+    'VELOCITY_MAX_PER_HOUR': 60,  # Decayed sends per hour above which a wallet's transactions are anomalous
+    'VELOCITY_MAX_RECIPIENTS': 20,  # Distinct recipients per recipient window above which a wallet's transactions are anomalous
+    'VELOCITY_RECIPIENT_WINDOW': 3600,  # Seconds per recipient sketch epoch
+    'VELOCITY_MAX_CONFIDENCE': 0.75,  # Confidence of a velocity-only anomaly, kept below the 0.8 at which transactions are rejected
+    'EVENT_BRIDGE': 'auto',  # How feed events reach other workers: 'postgres' (LISTEN/NOTIFY), 'socket' (same host) or 'auto'
+    'EVENT_SOCKET_DIR': os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'quantum_defi_events'),  # Worker sockets of the socket bridge
+    'EVENT_KEEPALIVE': 15,  # Seconds between keep-alive comments on an idle feed
+    'EVENT_QUEUE_SIZE': 100,  # Undelivered events per feed before it falls back to reading the log
+    'EVENT_STREAM_SECONDS': 300,  # Lifetime of one feed response; EventSource reconnects with Last-Event-ID
+    'EVENT_STREAM_WSGI': False,  # Serve feeds under WSGI too, each holding a sync worker while open; for development only
+    'EVENT_RETENTION_HOURS': 24,  # Hours of events kept for clients resuming with Last-Event-ID
 }
 
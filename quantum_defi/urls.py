@@ -2,8 +2,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import TemplateView
 
+from quantum_defi.instrumentation import metrics_view
+from quantum_defi.profiler import profiler_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
+    path('profiler/', profiler_view, name='profiler'),
     path('api/', include('api.urls')),
     path('accounts/', include('accounts.urls')),
     path('blockchain/', include('blockchain.urls')),
@@ -1,5 +1,8 @@
 """
 WSGI config for quantum_defi project.
+
+Served by gunicorn with gunicorn.conf.py, which preloads this module in
+the master and loads the ML models before forking the workers.
 """
 
 import os